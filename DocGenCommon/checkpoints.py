@@ -0,0 +1,243 @@
+"""Persistent checkpoints of the LangGraph runs, so a failed run can be resumed.
+
+Graphs compiled with the shared SqliteSaver save their state after every node.
+A run is identified by its run ID (the LangGraph thread ID): invoking the graph
+again with the ID of a failed run resumes it after the last completed node, so
+the nodes that finished, and the LLM calls they paid for, are not run again.
+Invoking it with the ID of a completed run returns the saved result.
+
+    result = invoke_resumable(graph, "document_review", initial_state, run_id)
+
+Checkpoints are off by default, set DOCGEN_CHECKPOINTS=1 to enable them. They
+are kept until pruned:
+
+    python -m DocGenCommon.checkpoints list
+    python -m DocGenCommon.checkpoints prune --older-than-days 7
+    python -m DocGenCommon.checkpoints prune --run-id review-20250101-120000-1a2b3c4d
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from DocGenCommon.settings import CACHE_DIR, env_flag
+
+DEFAULT_CHECKPOINT_PATH = CACHE_DIR / "checkpoints.sqlite"
+
+
+def new_run_id(prefix: str = "run") -> str:
+    """A new run ID, sortable by start time, such as review-20250101-120000-1a2b3c4d."""
+    return f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class CheckpointStore:
+    """The SQLite checkpointer of the graphs, and a table of the runs it holds checkpoints for."""
+
+    def __init__(self, path: Path = DEFAULT_CHECKPOINT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The saver serializes its own use of the connection with a lock
+        self.saver = SqliteSaver(sqlite3.connect(str(self.path), check_same_thread=False, timeout=30))
+        self.saver.setup()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                graph TEXT NOT NULL,
+                description TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def start_run(self, run_id: str, graph: str, description: str = "") -> None:
+        """Record an attempt of a run, the first one or a resumption."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, graph, description, status, attempts, created, updated)"
+                " VALUES (?, ?, ?, 'running', 1, ?, ?)"
+                " ON CONFLICT(run_id) DO UPDATE SET status = 'running', attempts = attempts + 1, updated = ?",
+                (run_id, graph, description, now, now, now),
+            )
+            self._conn.commit()
+
+    def finish_run(self, run_id: str, status: str) -> None:
+        """Record how an attempt of a run ended: completed or failed."""
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = ?, updated = ? WHERE run_id = ?",
+                               (status, time.time(), run_id))
+            self._conn.commit()
+
+    def runs(self, graph: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The recorded runs, most recently updated first, with the checkpoints and bytes they hold."""
+        query = (
+            "SELECT r.run_id, r.graph, r.description, r.status, r.attempts, r.created, r.updated,"
+            " (SELECT COUNT(*) FROM checkpoints c WHERE c.thread_id = r.run_id),"
+            " (SELECT COALESCE(SUM(LENGTH(c.checkpoint) + LENGTH(c.metadata)), 0) FROM checkpoints c"
+            "  WHERE c.thread_id = r.run_id)"
+            " + (SELECT COALESCE(SUM(LENGTH(w.value)), 0) FROM writes w WHERE w.thread_id = r.run_id)"
+            " FROM runs r"
+        )
+        parameters = ()
+        if graph:
+            query += " WHERE r.graph = ?"
+            parameters = (graph,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY r.updated DESC", parameters).fetchall()
+        return [
+            {"run_id": run_id, "graph": graph_name, "description": description, "status": status,
+             "attempts": attempts, "created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created)),
+             "updated": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(updated)),
+             "checkpoints": checkpoints, "bytes": size}
+            for run_id, graph_name, description, status, attempts, created, updated, checkpoints, size in rows
+        ]
+
+    def prune(self, older_than: Optional[float] = None, run_ids: Sequence[str] = (),
+              status: Optional[str] = None, graph: Optional[str] = None) -> List[str]:
+        """
+        Delete runs and their checkpoints.
+
+        Args:
+            older_than: Only runs not updated for this many seconds.
+            run_ids: Only these runs.
+            status: Only runs with this status, e.g. completed.
+            graph: Only runs of this graph.
+
+        Returns:
+            The IDs of the deleted runs.
+        """
+        conditions, parameters = [], []
+        if older_than is not None:
+            conditions.append("updated < ?")
+            parameters.append(time.time() - older_than)
+        if run_ids:
+            conditions.append(f"run_id IN ({', '.join('?' for _ in run_ids)})")
+            parameters.extend(run_ids)
+        if status:
+            conditions.append("status = ?")
+            parameters.append(status)
+        if graph:
+            conditions.append("graph = ?")
+            parameters.append(graph)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(f"SELECT run_id FROM runs{where}", parameters)]
+        for run_id in stale:
+            self.saver.delete_thread(run_id)
+        with self._lock:
+            self._conn.executemany("DELETE FROM runs WHERE run_id = ?", [(run_id,) for run_id in stale])
+            self._conn.commit()
+        return stale
+
+    def vacuum(self) -> None:
+        """Give the space of deleted checkpoints back to the file system."""
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+
+_stores: Dict[Path, CheckpointStore] = {}
+_stores_lock = threading.Lock()
+
+
+def checkpoints_enabled() -> bool:
+    """Whether runs are checkpointed, DOCGEN_CHECKPOINTS=1, off by default since checkpoints are kept until pruned."""
+    return env_flag("DOCGEN_CHECKPOINTS", False)
+
+
+def get_checkpoint_store(path: Path = DEFAULT_CHECKPOINT_PATH) -> Optional[CheckpointStore]:
+    """The shared checkpoint store, or None when DOCGEN_CHECKPOINTS is off."""
+    if not checkpoints_enabled():
+        return None
+    path = Path(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = CheckpointStore(path)
+        return _stores[path]
+
+
+def invoke_resumable(graph: Any, graph_name: str, input: Dict[str, Any], run_id: str,
+                     config: Optional[Dict[str, Any]] = None, description: str = "",
+                     compatible: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                     store: Optional[CheckpointStore] = None) -> Dict[str, Any]:
+    """
+    Invoke a graph compiled with the store's saver as run run_id.
+
+    A new run starts from input. A failed or interrupted run resumes from its last
+    checkpoint, only the nodes that had not completed run again. A completed run
+    returns its saved final state without running anything.
+
+    Args:
+        graph: The compiled graph.
+        graph_name: Name of the graph, recorded with the run.
+        input: Initial state of a new run.
+        run_id: ID of the run, the thread ID of its checkpoints.
+        config: Invocation config, e.g. callbacks, the thread ID is added to it.
+        description: What the run works on, shown when listing runs.
+        compatible: Tells whether the saved state of an existing run was started from
+            the same input, a run started from a different input is not resumed.
+        store: Defaults to the shared checkpoint store.
+
+    Returns:
+        The final state of the run.
+    """
+    store = store or get_checkpoint_store(DEFAULT_CHECKPOINT_PATH)
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), "thread_id": run_id}
+
+    saved = graph.get_state(config)
+    if saved.values:
+        if compatible is not None and not compatible(saved.values):
+            raise ValueError(f"Run {run_id} was started from a different input, use a new run ID")
+        if not saved.next:
+            print(f"Run {run_id} already completed, returning its result")
+            return saved.values
+        print(f"Resuming run {run_id} at {', '.join(saved.next)}")
+        input = None
+
+    store.start_run(run_id, graph_name, description)
+    try:
+        result = graph.invoke(input, config)
+    except BaseException:
+        store.finish_run(run_id, "failed")
+        print(f"Run {run_id} failed, run it again with the same run ID to resume it")
+        raise
+    store.finish_run(run_id, "completed")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or prune the checkpoints of the LangGraph runs")
+    parser.add_argument("command", choices=("list", "prune"))
+    parser.add_argument("--path", default=str(DEFAULT_CHECKPOINT_PATH), help="SQLite file of the checkpoints")
+    parser.add_argument("--graph", help="Only the runs of this graph: document_review or document_agent")
+    parser.add_argument("--older-than-days", type=float, help="prune: runs not updated for this many days")
+    parser.add_argument("--run-id", nargs="+", default=[], help="prune: these runs")
+    parser.add_argument("--status", choices=("running", "completed", "failed"), help="prune: runs with this status")
+    parser.add_argument("--all", action="store_true", help="prune: every run")
+    args = parser.parse_args()
+
+    store = CheckpointStore(Path(args.path))
+    if args.command == "prune":
+        if not (args.older_than_days is not None or args.run_id or args.status or args.all):
+            parser.error("prune needs --older-than-days, --run-id, --status or --all")
+        older_than = args.older_than_days * 86400 if args.older_than_days is not None else None
+        pruned = store.prune(older_than, args.run_id, args.status, args.graph)
+        store.vacuum()
+        print(json.dumps({"pruned": pruned}, indent=2))
+        return
+    print(json.dumps(store.runs(args.graph), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Shared, lazily created LLM clients.
+
+Agents ask the registry for a model instead of building their own ChatOpenAI.
+Models are keyed by (provider, model, params) so identical configurations share
+one instance, and every model of a provider shares one keep-alive HTTP
+connection pool. The registry counts pooled requests and newly opened
+connections so connection reuse can be checked.
+
+    llm = get_chat_model("openai", "gpt-4o", temperature=0.7)
+
+The pooled connections are closed when the process exits.
+"""
+import asyncio
+import atexit
+import threading
+from typing import Any, Dict, Tuple
+
+import httpx
+
+from DocGenCommon.llm_cache import get_llm_cache
+from DocGenCommon.providers import get_provider, load_model_class
+from DocGenCommon.scheduler import ScheduledRunnable, get_scheduler
+from DocGenCommon.settings import env_int
+
+POOL_LIMITS = httpx.Limits(
+    max_connections=env_int("DOCGEN_HTTP_MAX_CONNECTIONS", 32),
+    max_keepalive_connections=env_int("DOCGEN_HTTP_MAX_KEEPALIVE", 16),
+    keepalive_expiry=60.0,
+)
+POOL_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+
+class ConnectionStats:
+    """Per-provider counters of requests sent and TCP connections opened."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.opened = 0
+
+    def request_hook(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def async_request_hook(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._async_trace
+
+    def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.opened += 1
+
+    async def _async_trace(self, event: str, info: dict):
+        self._trace(event, info)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "opened": self.opened, "reused": max(0, self.requests - self.opened)}
+
+
+class ClientRegistry:
+    """Hands out shared models, one HTTP connection pool per provider."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._models: Dict[Tuple, ScheduledRunnable] = {}
+        self._pools: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._stats: Dict[str, ConnectionStats] = {}
+
+    def http_clients(self, provider: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """Return the keep-alive (sync, async) HTTP clients shared by a provider's models."""
+        with self._lock:
+            if provider not in self._pools:
+                stats = self._stats.setdefault(provider, ConnectionStats())
+                self._pools[provider] = (
+                    httpx.Client(limits=POOL_LIMITS, timeout=POOL_TIMEOUT,
+                                 event_hooks={"request": [stats.request_hook]}),
+                    httpx.AsyncClient(limits=POOL_LIMITS, timeout=POOL_TIMEOUT,
+                                      event_hooks={"request": [stats.async_request_hook]}),
+                )
+            return self._pools[provider]
+
+    def chat_model(self, provider: str, model: str, cache_pipeline: str = None,
+                   use_cache: bool = None, **params: Any) -> ScheduledRunnable:
+        """
+        Return the shared, scheduled model for (provider, model, params), creating it on first use.
+
+        Args:
+            provider: Registered provider name, e.g. "openai" or "anthropic" (see providers.py).
+            model: Model name passed to the provider.
+            cache_pipeline: Pipeline name for the opt-in LLM response cache.
+            use_cache: Explicit cache opt-in, overrides the environment.
+            **params: Model parameters such as temperature or max_tokens.
+        """
+        cache = get_llm_cache(cache_pipeline, enabled=use_cache) if cache_pipeline or use_cache else None
+        key = (provider, model, cache is not None, tuple(sorted((name, repr(value)) for name, value in params.items())))
+        with self._lock:
+            if key not in self._models:
+                # The provider SDK is imported here, the first time one of its models is needed
+                model_class = load_model_class(provider)
+                if get_provider(provider).pooled_http:
+                    params["http_client"], params["http_async_client"] = self.http_clients(provider)
+                # retries are done by the scheduler, for the models that would retry on their own
+                if "max_retries" in getattr(model_class, "model_fields", {}):
+                    params["max_retries"] = 0
+                llm = model_class(model=model, cache=cache, **params)
+                self._models[key] = get_scheduler().wrap(llm)
+            return self._models[key]
+
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests sent, connections opened and connections reused, per provider."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats = {provider: counters.snapshot() for provider, counters in stats.items()}
+        stats["models"] = {"shared_instances": len(self._models)}
+        return stats
+
+    def close(self):
+        """Close every pooled connection, those of the async clients included."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._models.clear()
+        for client, async_client in pools:
+            client.close()
+            _close_async_client(async_client)
+
+    async def aclose(self):
+        """Close every pooled connection from async code, before the event loop of the async clients ends."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._models.clear()
+        for client, async_client in pools:
+            client.close()
+            await async_client.aclose()
+
+
+def _close_async_client(client: httpx.AsyncClient):
+    """Close an async client from sync code."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None:
+        loop.create_task(client.aclose())
+        return
+    try:
+        asyncio.run(client.aclose())
+    except RuntimeError:
+        # its connections belong to an event loop that has already been closed
+        pass
+
+
+_registry = ClientRegistry()
+atexit.register(_registry.close)
+
+
+def get_registry() -> ClientRegistry:
+    """Return the process-wide client registry."""
+    return _registry
+
+
+def get_chat_model(provider: str, model: str, **params: Any) -> ScheduledRunnable:
+    """Shortcut for get_registry().chat_model(...)."""
+    return _registry.chat_model(provider, model, **params)
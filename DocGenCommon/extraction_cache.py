@@ -0,0 +1,188 @@
+"""Persistent cache of the text extracted from PDF / DOCX files.
+
+Parsing a large PDF costs seconds, re-reviewing it should not. An extraction is
+stored under a key made of the file size, its modification time, the SHA-256
+of its content and the extractor name and version, so a changed file or a
+changed extractor never reads a stale entry. Values are the extractor's
+JSON-serializable result (text, pages, tables, ...) compressed with zlib.
+
+    payload = cached_extraction(path, "document_reviewer", "2", lambda: extract(path))
+
+The cache is on by default, set DOCGEN_EXTRACTION_CACHE=0 to disable it.
+
+    python -m DocGenCommon.extraction_cache stats
+    python -m DocGenCommon.extraction_cache clear
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from DocGenCommon.settings import CACHE_DIR, env_flag, env_float
+
+DEFAULT_CACHE_PATH = CACHE_DIR / "extraction_cache.sqlite"
+DEFAULT_MAX_BYTES = int(env_float("DOCGEN_EXTRACTION_CACHE_MAX_MB", 512) * 1024 * 1024)
+
+
+def file_key(file_path: Path, extractor: str, version: str) -> str:
+    """Cache key of a file for an extractor: size, mtime, content hash, extractor and version."""
+    stat = file_path.stat()
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return f"{extractor}:{version}:{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+
+class ExtractionCache:
+    """SQLite store of compressed extractions with least recently used, size-capped eviction."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                extractor TEXT NOT NULL,
+                source TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS extractions_lru ON extractions(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """The extraction stored under key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE extractions SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                               (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, key: str, extractor: str, source: str, payload: Any) -> None:
+        """Store an extraction, evicting the least recently used ones over max_bytes."""
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        value = zlib.compress(raw, 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, extractor, source, value, size, raw_size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, extractor, source, value, len(value), len(raw), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM extractions ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM extractions WHERE key = ?", stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, stored and uncompressed bytes, hits per extractor and the counters of this process."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT extractor, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0), COALESCE(SUM(hits), 0)"
+                " FROM extractions GROUP BY extractor"
+            ).fetchall()
+        extractors = {name: {"entries": entries, "bytes": size, "raw_bytes": raw, "hits": hits}
+                      for name, entries, size, raw, hits in rows}
+        return {
+            "path": str(self.path),
+            "entries": sum(item["entries"] for item in extractors.values()),
+            "bytes": sum(item["bytes"] for item in extractors.values()),
+            "raw_bytes": sum(item["raw_bytes"] for item in extractors.values()),
+            "max_bytes": self.max_bytes,
+            "stored_hits": sum(item["hits"] for item in extractors.values()),
+            "extractors": extractors,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_caches: Dict[Path, ExtractionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_extraction_cache(path: Path = DEFAULT_CACHE_PATH) -> Optional[ExtractionCache]:
+    """The shared extraction cache, or None when DOCGEN_EXTRACTION_CACHE is off."""
+    if not env_flag("DOCGEN_EXTRACTION_CACHE", True):
+        return None
+    path = Path(path)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ExtractionCache(path)
+        return _caches[path]
+
+
+def cached_extraction(file_path, extractor: str, version: str, extract: Callable[[], Any]) -> Any:
+    """
+    Return the cached extraction of a file, or run extract() and cache its result.
+
+    Args:
+        file_path: The extracted file.
+        extractor: Name of the extractor, extractions of different extractors are kept apart.
+        version: Version of the extractor, bump it when its output changes.
+        extract: Parses the file, returns a JSON-serializable result. Errors are not cached.
+    """
+    cache = get_extraction_cache()
+    if cache is None:
+        return extract()
+    file_path = Path(file_path)
+    key = file_key(file_path, extractor, version)
+    payload = cache.get(key)
+    if payload is None:
+        payload = extract()
+        cache.put(key, extractor, str(file_path.resolve()), payload)
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the document extraction cache")
+    parser.add_argument("command", choices=("stats", "clear"))
+    parser.add_argument("--path", default=str(DEFAULT_CACHE_PATH), help="SQLite file of the cache")
+    args = parser.parse_args()
+
+    cache = ExtractionCache(Path(args.path))
+    if args.command == "clear":
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
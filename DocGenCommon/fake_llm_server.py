@@ -0,0 +1,215 @@
+"""Local OpenAI-compatible endpoint that enforces a rate limit and answers 429s.
+
+It also emulates a provider prompt prefix cache and reports cached tokens in the
+usage block, so message layouts can be compared, and answers structured-output
+requests (response_format json_schema) with a JSON document matching the schema.
+
+Used to exercise the LLM scheduler without a provider account:
+
+    python DocGenCommon/fake_llm_server.py --port 8765 --rpm 60 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python OpenDocGen/OpenDocGen.py -c 8
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Chat completions endpoint with a sliding-window RPM limit and random 429s."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rpm: int = 60,
+                 error_rate: float = 0.0, latency: float = 0.05, retry_after: float = 1.0):
+        super().__init__((host, port), _Handler)
+        self.rpm = rpm
+        self.error_rate = error_rate
+        self.latency = latency
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0}
+        self.prefixes = set()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def admit(self) -> bool:
+        """Apply the sliding one-minute window and the random error rate."""
+        now = time.monotonic()
+        with self.lock:
+            self.counts["requests"] += 1
+            while self.window and now - self.window[0] > 60:
+                self.window.popleft()
+            if (self.rpm and len(self.window) >= self.rpm) or random.random() < self.error_rate:
+                self.counts["rate_limited"] += 1
+                return False
+            self.window.append(now)
+            self.counts["ok"] += 1
+            return True
+
+    def cached_tokens(self, prompt: str) -> int:
+        """
+        Emulate a provider prefix cache: prompts are cached in 128-token blocks once
+        they reach 1024 tokens, and the longest previously seen prefix is a hit.
+        """
+        block, minimum = 128 * 4, 1024 * 4
+        digest, cached = hashlib.sha256(), 0
+        with self.lock:
+            for end in range(block, len(prompt) + 1, block):
+                digest.update(prompt[end - block:end].encode("utf-8"))
+                key = digest.copy().hexdigest()
+                if key in self.prefixes:
+                    cached = end // 4
+                elif end >= minimum:
+                    self.prefixes.add(key)
+        return cached if cached >= minimum // 4 else 0
+
+    def start(self) -> "FakeLLMServer":
+        """Serve from a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def schema_instance(schema: dict, defs: dict = None) -> object:
+    """A small value matching a JSON schema, for structured-output requests."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return schema_instance(defs[schema["$ref"].split("/")[-1]], defs)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            return schema_instance(schema[key][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = kind[0]
+    if kind == "object":
+        return {name: schema_instance(value, defs) for name, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [schema_instance(schema.get("items", {}), defs) for _ in range(max(1, schema.get("minItems", 1)))]
+    if kind in ("number", "integer"):
+        return schema.get("minimum", 0)
+    if kind == "boolean":
+        return False
+    return f"fake {schema.get('title', 'value')}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeLLMServer
+    # keep-alive, like a real provider, so connection reuse can be observed
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, request: dict, content: str, usage: dict):
+        """Answer a stream=true request with server-sent events, one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for word in content.split(" "):
+            chunk = {
+                "id": "chatcmpl-fake-stream",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": "chatcmpl-fake-stream", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": request.get("model", "fake"), "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        if not self.server.admit():
+            self._send(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"retry-after": str(self.server.retry_after)},
+            )
+            return
+        time.sleep(self.server.latency)
+        prompt = "".join(f"<{message.get('role')}>{message.get('content', '')}" for message in request.get("messages", []))
+        prompt_tokens = len(prompt) // 4 + 1
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": 16, "total_tokens": prompt_tokens + 16,
+                 "prompt_tokens_details": {"cached_tokens": self.server.cached_tokens(prompt)}}
+        content = f"Generated content for: {prompt[:80]}"
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            content = json.dumps(schema_instance(response_format["json_schema"]["schema"]))
+        elif response_format.get("type") == "json_object":
+            content = json.dumps({"content": content})
+        tool = next((tool["function"] for tool in request.get("tools", []) if tool.get("type") == "function"), None)
+        if tool is not None and request.get("tool_choice") not in (None, "none", "auto"):
+            # a forced function call, as sent for function-calling structured output
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": "call_fake", "type": "function",
+                "function": {"name": tool["name"], "arguments": json.dumps(schema_instance(tool.get("parameters", {})))},
+            }]}
+            self._send(200, {"id": f"chatcmpl-fake-{self.server.counts['requests']}", "object": "chat.completion",
+                             "created": int(time.time()), "model": request.get("model", "fake"),
+                             "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls"}],
+                             "usage": usage})
+            return
+        if request.get("stream"):
+            self._stream(request, content, usage)
+            return
+        self._send(200, {
+            "id": f"chatcmpl-fake-{self.server.counts['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible endpoint returning 429s")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=60, help="Requests per minute before answering 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of admitted requests answered with 429")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds spent per successful request")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(port=args.port, rpm=args.rpm, error_rate=args.error_rate, latency=args.latency)
+    print(f"Fake LLM endpoint listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(server.counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Persistent, content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 of the LangChain llm_string (provider, model
+and invocation parameters) and the serialized prompt messages, so a re-run with
+a byte-identical request is answered from disk instead of the provider.
+
+Caching is opt-in per pipeline, e.g. DOCGEN_LLM_CACHE_OPENDOCGEN=1, or for
+every pipeline with DOCGEN_LLM_CACHE=1.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from DocGenCommon.settings import CACHE_DIR, env_flag, env_float
+
+DEFAULT_CACHE_PATH = CACHE_DIR / "llm_cache.sqlite"
+DEFAULT_MAX_BYTES = int(env_float("DOCGEN_LLM_CACHE_MAX_MB", 256) * 1024 * 1024)
+DEFAULT_TTL_SECONDS = env_float("DOCGEN_LLM_CACHE_TTL_HOURS", 24 * 30) * 3600
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain cache backed by SQLite with TTL and LRU size-capped eviction."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds or None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """Hash the model configuration and the rendered prompt into a cache key."""
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return [loads(item) for item in loads_list(value)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        value = dumps_list([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, stored bytes and the hit/miss counters of this process."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def dumps_list(items: list) -> bytes:
+    """Pack serialized generations into one compressed blob."""
+    return zlib.compress("\0".join(items).encode("utf-8"))
+
+
+def loads_list(blob: bytes) -> list:
+    """Inverse of dumps_list."""
+    return zlib.decompress(blob).decode("utf-8").split("\0")
+
+
+_caches: Dict[Path, SQLiteLLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def llm_cache_enabled(pipeline: Optional[str] = None) -> bool:
+    """Check the global DOCGEN_LLM_CACHE flag and the per-pipeline override."""
+    enabled = env_flag("DOCGEN_LLM_CACHE")
+    if pipeline:
+        enabled = env_flag(f"DOCGEN_LLM_CACHE_{pipeline.upper()}", enabled)
+    return enabled
+
+
+def get_llm_cache(pipeline: Optional[str] = None, enabled: Optional[bool] = None,
+                  path: Path = DEFAULT_CACHE_PATH) -> Optional[SQLiteLLMCache]:
+    """
+    Return the shared cache for a pipeline, or None when caching is not enabled.
+
+    The result is meant to be passed as the cache= argument of a LangChain model.
+
+    Args:
+        pipeline: Name used for the DOCGEN_LLM_CACHE_<PIPELINE> opt-in flag.
+        enabled: Explicit opt-in (e.g. from a --cache CLI flag), overrides the environment.
+        path: SQLite file holding the cache.
+    """
+    if enabled is None:
+        enabled = llm_cache_enabled(pipeline)
+    if not enabled:
+        return None
+    path = Path(path)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = SQLiteLLMCache(path)
+        return _caches[path]
@@ -0,0 +1,161 @@
+"""Single-pass markdown outline parser shared by the document generators.
+
+The outline is read line by line and sections are yielded as soon as the next
+header is seen, so memory is bounded by the largest section rather than by the
+document, and the cost is linear in the input size. Headers inside fenced code
+blocks (``` or ~~~) are treated as body text.
+"""
+import io
+import mmap
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Union
+
+HEADER_RE = re.compile(r"^(#{1,6})(?:[ \t]+(.*?))?[ \t]*$")
+FENCE_RE = re.compile(r"^[ \t]{0,3}(`{3,}|~{3,})")
+
+OutlineSource = Union[str, bytes, mmap.mmap, io.IOBase, Iterable[str]]
+
+
+@dataclass
+class Section:
+    """One outline section: a header line and the raw lines below it."""
+    level: int
+    title: str
+    header: str
+    body: str
+    line_no: int
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.body.strip()
+
+
+def _iter_lines(source: OutlineSource) -> Iterator[str]:
+    """Yield text lines from a string, bytes, mmap, file handle or iterable of lines."""
+    if isinstance(source, str):
+        yield from io.StringIO(source)
+    elif isinstance(source, bytes):
+        for line in io.BytesIO(source):
+            yield line.decode("utf-8")
+    elif isinstance(source, mmap.mmap):
+        for line in iter(source.readline, b""):
+            yield line.decode("utf-8")
+    else:
+        for line in source:
+            yield line.decode("utf-8") if isinstance(line, bytes) else line
+
+
+def iter_sections(source: OutlineSource, levels: Optional[Iterable[int]] = None,
+                  include_preamble: bool = False) -> Iterator[Section]:
+    """
+    Lazily split a markdown outline into sections.
+
+    Args:
+        source: Markdown text, bytes, an mmap, a file handle or any iterable of lines.
+        levels: Header levels that start a new section (e.g. (2,) for '##' only).
+            Headers of other levels stay in the body. Defaults to all levels.
+        include_preamble: Yield the text before the first header as a level 0
+            section with an empty header instead of skipping it.
+
+    Yields:
+        Section objects in document order.
+    """
+    levels = set(levels) if levels is not None else None
+    current = None
+    body = []
+    fence = None
+    if include_preamble:
+        current = Section(level=0, title="", header="", body="", line_no=1)
+
+    for line_no, line in enumerate(_iter_lines(source), start=1):
+        # Cheap prefix checks first, the regexes only run on candidate lines
+        first = line[:1]
+        if first in ("`", "~", " ", "\t"):
+            fence_match = FENCE_RE.match(line)
+            if fence_match:
+                marker = fence_match.group(1)
+                if fence is None:
+                    fence = marker
+                elif marker[0] == fence[0] and len(marker) >= len(fence):
+                    fence = None
+                if current is not None:
+                    body.append(line)
+                continue
+
+        header_match = HEADER_RE.match(line.rstrip("\r\n")) if first == "#" and fence is None else None
+        if header_match and (levels is None or len(header_match.group(1)) in levels):
+            if current is not None:
+                current.body = _join_body(body)
+                if current.level or not current.is_empty:
+                    yield current
+            current = Section(
+                level=len(header_match.group(1)),
+                title=(header_match.group(2) or "").strip(),
+                header=line.strip(),
+                body="",
+                line_no=line_no,
+            )
+            body = []
+        elif current is not None:
+            body.append(line)
+
+    if current is not None:
+        current.body = _join_body(body)
+        if current.level or not current.is_empty:
+            yield current
+
+
+def iter_stream_sections(chunks: Iterable[str], levels: Optional[Iterable[int]] = None,
+                         include_preamble: bool = False) -> Iterator[Section]:
+    """
+    Split streamed text, e.g. the chunks of an LLM response, into sections.
+
+    A section is yielded as soon as the header of the next one has streamed in,
+    so work on it can start while the rest of the document is still generated.
+    """
+    return iter_sections(_iter_chunk_lines(chunks), levels, include_preamble)
+
+
+def _iter_chunk_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Regroup arbitrary text chunks into complete lines."""
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        if "\n" in pending:
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+    if pending:
+        yield pending
+
+
+def _join_body(lines: list) -> str:
+    """Join raw body lines, normalising line endings and terminating the last line."""
+    body = "".join(lines)
+    if "\r" in body:
+        body = body.replace("\r\n", "\n")
+    if body and not body.endswith("\n"):
+        body += "\n"
+    return body
+
+
+def iter_file_sections(file_path: str, levels: Optional[Iterable[int]] = None,
+                       use_mmap: bool = False) -> Iterator[Section]:
+    """
+    Lazily split a markdown file into sections, see iter_sections.
+
+    Args:
+        file_path: Path to the markdown outline.
+        levels: Header levels that start a new section. Defaults to all levels.
+        use_mmap: Read the file through a memory map instead of buffered reads.
+    """
+    if use_mmap:
+        with open(file_path, "rb") as f:
+            if f.seek(0, io.SEEK_END) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from iter_sections(mapped, levels)
+    else:
+        with open(file_path, "r", encoding="utf-8") as f:
+            yield from iter_sections(f, levels)
@@ -0,0 +1,48 @@
+"""Message layouts that let providers reuse their prompt prefix cache.
+
+Providers cache the longest prompt prefix they have already seen. When several
+calls send the same large content (a document, a draft) behind different
+system prompts, nothing can be reused. The shared-prefix layout sends the
+shared content first, identical for every call, and the per-call instructions
+after it:
+
+    [system preamble, shared content, per-call instructions]
+
+The original ordering, DOCGEN_PROMPT_LAYOUT=instructions_first, is the default.
+Select the cache-friendly layout with DOCGEN_PROMPT_LAYOUT=shared_prefix.
+"""
+import os
+from typing import List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+SHARED_PREFIX = "shared_prefix"
+INSTRUCTIONS_FIRST = "instructions_first"
+LAYOUTS = (SHARED_PREFIX, INSTRUCTIONS_FIRST)
+
+
+def prompt_layout() -> str:
+    """Return the configured message layout."""
+    layout = os.getenv("DOCGEN_PROMPT_LAYOUT", INSTRUCTIONS_FIRST).strip().lower()
+    if layout not in LAYOUTS:
+        raise ValueError(f"DOCGEN_PROMPT_LAYOUT must be one of {LAYOUTS}, got '{layout}'")
+    return layout
+
+
+def shared_prefix_enabled() -> bool:
+    return prompt_layout() == SHARED_PREFIX
+
+
+def shared_prefix_messages(preamble: str, shared_content: str, instructions: str) -> List[BaseMessage]:
+    """
+    Build [preamble, shared content, instructions] messages.
+
+    The preamble and the shared content must be byte-identical across the calls
+    that should share the cached prefix, so keep anything call specific (agent
+    names, roles, focus lists) in the instructions.
+    """
+    return [
+        SystemMessage(content=preamble),
+        HumanMessage(content=shared_content),
+        HumanMessage(content=instructions),
+    ]
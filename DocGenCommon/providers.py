@@ -0,0 +1,86 @@
+"""Registry of LLM provider plugins, imported only when first used.
+
+Each provider is described by the module and class of its LangChain chat model.
+Nothing is imported until a model from that provider is requested, so entry
+points only pay the import cost of the SDKs they actually use.
+
+    register_provider("mistral", "langchain_mistralai", "ChatMistralAI")
+"""
+import importlib
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ProviderPlugin:
+    """A provider's LangChain model class, resolved lazily from its module path."""
+    name: str
+    module: str
+    class_name: str
+    # The class accepts http_client / http_async_client, so it can use the shared pool
+    pooled_http: bool = False
+    _model_class: Optional[type] = field(default=None, repr=False)
+
+    @property
+    def loaded(self) -> bool:
+        return self._model_class is not None
+
+    def load(self) -> type:
+        """Import the provider SDK and return its model class."""
+        if self._model_class is None:
+            try:
+                module = importlib.import_module(self.module)
+            except ImportError as e:
+                raise ImportError(
+                    f"Provider '{self.name}' needs the '{self.module}' package, install it with "
+                    f"pip install {self.module.replace('_', '-')}"
+                ) from e
+            self._model_class = getattr(module, self.class_name)
+        return self._model_class
+
+
+_lock = threading.Lock()
+_providers: Dict[str, ProviderPlugin] = {}
+
+
+def register_provider(name: str, module: str, class_name: str, pooled_http: bool = False) -> ProviderPlugin:
+    """Register (or replace) a provider plugin without importing it."""
+    plugin = ProviderPlugin(name, module, class_name, pooled_http)
+    with _lock:
+        _providers[name] = plugin
+    return plugin
+
+
+def get_provider(name: str) -> ProviderPlugin:
+    """Return the plugin of a registered provider."""
+    with _lock:
+        plugin = _providers.get(name)
+    if plugin is None:
+        raise ValueError(f"Unsupported model provider: {name}. Use one of {available_providers()}.")
+    return plugin
+
+
+def load_model_class(name: str) -> type:
+    """Import a provider on first use and return its model class."""
+    plugin = get_provider(name)
+    with _lock:
+        return plugin.load()
+
+
+def available_providers() -> List[str]:
+    with _lock:
+        return sorted(_providers)
+
+
+def loaded_providers() -> List[str]:
+    """Providers whose SDK has been imported in this process."""
+    with _lock:
+        return sorted(name for name, plugin in _providers.items() if plugin.loaded)
+
+
+register_provider("openai", "langchain_openai", "ChatOpenAI", pooled_http=True)
+register_provider("openai-completion", "langchain_openai", "OpenAI", pooled_http=True)
+register_provider("anthropic", "langchain_anthropic", "ChatAnthropic")
+register_provider("groq", "langchain_groq", "ChatGroq", pooled_http=True)
+register_provider("ollama", "langchain_ollama", "ChatOllama")
@@ -0,0 +1,452 @@
+"""Process-wide scheduler for LLM requests.
+
+Every model call is admitted through two token buckets (requests per minute and
+estimated tokens per minute) and an adaptive concurrency limit. The limit grows
+additively while calls succeed and is halved when the provider answers 429 or
+when latency spikes well above its moving average (AIMD). Rate-limited and
+transient failures are retried with jittered exponential backoff, honouring
+Retry-After when the provider sends it.
+
+Limits are configured from the environment:
+
+    DOCGEN_LLM_RPM              requests per minute (0 = unlimited)
+    DOCGEN_LLM_TPM              estimated tokens per minute (0 = unlimited)
+    DOCGEN_LLM_MAX_CONCURRENCY  upper bound of the adaptive in-flight limit
+    DOCGEN_LLM_MAX_RETRIES      retries for 429 / transient errors
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from DocGenCommon.settings import env_float, env_int
+
+TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504, 529}
+TRANSIENT_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "TimeoutException"}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True for provider 429 responses (OpenAI, Anthropic, Groq, raw httpx)."""
+    return _status_code(exc) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for errors worth retrying: overloaded / unavailable servers and timeouts."""
+    return _status_code(exc) in TRANSIENT_STATUS_CODES or type(exc).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read the Retry-After hint of a failed response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token estimate (4 characters per token) of a prompt, message list or input dict."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if hasattr(value, "to_messages"):
+        value = value.to_messages()
+    if hasattr(value, "content"):
+        return estimate_tokens(value.content)
+    if isinstance(value, dict):
+        return sum(estimate_tokens(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    return estimate_tokens(str(value))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding at most one minute of budget."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds to wait before amount can be consumed (0 when available now)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        # A single request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float):
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+
+
+class LLMScheduler:
+    """Admission control, adaptive concurrency and retries for LLM calls."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        latency_spike_factor: float = 3.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial_concurrency or max(min_concurrency, max_concurrency // 2))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latency_spike_factor = latency_spike_factor
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._latency_avg = None
+        self._last_decrease = 0.0
+        self._stats = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "throttled": 0,
+            "latency_spikes": 0,
+            "estimated_tokens": 0,
+            "queue_wait_s": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    # ---- admission ----
+
+    def acquire(self, tokens: int = 0):
+        """Block until a concurrency slot and request/token budget are available."""
+        started = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._waiting)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._in_flight < int(self.limit):
+                        delay = max(self.request_bucket.delay_for(1, now), self.token_bucket.delay_for(tokens, now))
+                        if delay <= 0:
+                            self.request_bucket.consume(1, now)
+                            self.token_bucket.consume(tokens, now)
+                            self._in_flight += 1
+                            self._stats["requests"] += 1
+                            self._stats["estimated_tokens"] += tokens
+                            self._stats["queue_wait_s"] += now - started
+                            return
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._waiting -= 1
+
+    async def aacquire(self, tokens: int = 0):
+        """Async variant of acquire, waiting in a worker thread.
+
+        A slot acquired after the caller was cancelled is given back.
+        """
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire, tokens))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(lambda task: task.cancelled() or task.exception() or self.give_back())
+            raise
+
+    def give_back(self):
+        """Free a slot whose call was cancelled, without adapting the concurrency limit."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, latency: float, throttled: bool = False):
+        """Free a slot and adapt the concurrency limit to the outcome of the call."""
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._stats["throttled"] += 1
+                self._decrease()
+            elif self._latency_avg is not None and latency > self.latency_spike_factor * self._latency_avg:
+                self._stats["latency_spikes"] += 1
+                self._decrease()
+            else:
+                # Additive increase: roughly +1 slot per limit's worth of successful calls
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            if not throttled:
+                self._latency_avg = latency if self._latency_avg is None else 0.8 * self._latency_avg + 0.2 * latency
+            self._cond.notify_all()
+
+    def _decrease(self):
+        """Multiplicative decrease, at most once per average latency so one burst of 429s halves once."""
+        now = time.monotonic()
+        if now - self._last_decrease >= (self._latency_avg or 1.0):
+            self.limit = max(float(self.min_concurrency), self.limit / 2)
+            self._last_decrease = now
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        """Delay before the next retry: Retry-After if given, else jittered exponential backoff."""
+        hinted = retry_after_seconds(exc)
+        if hinted is not None:
+            return hinted + random.uniform(0, self.base_delay)
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _should_retry(self, exc: BaseException, attempt: int) -> bool:
+        if attempt < self.max_retries and (is_rate_limit_error(exc) or is_transient_error(exc)):
+            with self._cond:
+                self._stats["retries"] += 1
+            return True
+        with self._cond:
+            self._stats["failed"] += 1
+        return False
+
+    def _completed(self):
+        with self._cond:
+            self._stats["completed"] += 1
+
+    # ---- execution ----
+
+    def call(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) under admission control, retrying 429 / transient errors."""
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                self.release(time.monotonic() - started, throttled=is_rate_limit_error(exc))
+                if not self._should_retry(exc, attempt):
+                    raise
+                time.sleep(self.backoff(attempt, exc))
+                attempt += 1
+                continue
+            self.release(time.monotonic() - started)
+            self._completed()
+            return result
+
+    async def acall(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """Async variant of call, fn must return an awaitable."""
+        attempt = 0
+        while True:
+            await self.aacquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as exc:
+                self.release(time.monotonic() - started, throttled=is_rate_limit_error(exc))
+                if not self._should_retry(exc, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt, exc))
+                attempt += 1
+                continue
+            except BaseException:
+                # cancelled while the call was in flight
+                self.give_back()
+                raise
+            self.release(time.monotonic() - started)
+            self._completed()
+            return result
+
+    def stream(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Iterator[Any]:
+        """Stream fn(*args, **kwargs) holding one slot for the whole stream.
+
+        Retries are only possible until the first chunk has been received.
+        """
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                iterator = iter(fn(*args, **kwargs))
+                first = next(iterator)
+            except StopIteration:
+                self.release(time.monotonic() - started)
+                self._completed()
+                return
+            except Exception as exc:
+                self.release(time.monotonic() - started, throttled=is_rate_limit_error(exc))
+                if not self._should_retry(exc, attempt):
+                    raise
+                time.sleep(self.backoff(attempt, exc))
+                attempt += 1
+                continue
+            break
+
+        throttled = False
+        try:
+            yield first
+            yield from iterator
+        except Exception as exc:
+            throttled = is_rate_limit_error(exc)
+            with self._cond:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            self.release(time.monotonic() - started, throttled=throttled)
+        self._completed()
+
+    async def astream(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> AsyncIterator[Any]:
+        """Async variant of stream, fn must return an async iterator."""
+        attempt = 0
+        while True:
+            await self.aacquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                iterator = fn(*args, **kwargs).__aiter__()
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.release(time.monotonic() - started)
+                self._completed()
+                return
+            except Exception as exc:
+                self.release(time.monotonic() - started, throttled=is_rate_limit_error(exc))
+                if not self._should_retry(exc, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt, exc))
+                attempt += 1
+                continue
+            except BaseException:
+                self.give_back()
+                raise
+            break
+
+        throttled = False
+        try:
+            yield first
+            async for chunk in iterator:
+                yield chunk
+        except Exception as exc:
+            throttled = is_rate_limit_error(exc)
+            with self._cond:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            self.release(time.monotonic() - started, throttled=throttled)
+        self._completed()
+
+    def wrap(self, runnable: Runnable) -> "ScheduledRunnable":
+        """Route every call of a LangChain model (or any runnable) through this scheduler."""
+        if isinstance(runnable, ScheduledRunnable):
+            return runnable
+        return ScheduledRunnable(runnable, self)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current queue depth, in-flight calls, adaptive limit and cumulative counters."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                queue_depth=self._waiting,
+                in_flight=self._in_flight,
+                concurrency_limit=int(self.limit),
+                latency_avg_s=round(self._latency_avg or 0.0, 3),
+            )
+        admitted = stats["requests"] or 1
+        stats["avg_queue_wait_s"] = round(stats.pop("queue_wait_s") / admitted, 3)
+        return stats
+
+
+class ScheduledRunnable(Runnable):
+    """Runnable wrapper sending invoke / ainvoke / stream / astream of the bound runnable through a scheduler.
+
+    batch and abatch fall back to invoke / ainvoke and are scheduled as well.
+    """
+
+    # Model methods returning a new runnable that must stay scheduled
+    WRAPPED_FACTORIES = ("with_structured_output", "bind_tools")
+
+    def __init__(self, bound: Runnable, scheduler: LLMScheduler):
+        self.bound = bound
+        self.scheduler = scheduler
+        self.name = getattr(bound, "name", None)
+
+    @property
+    def InputType(self):
+        return self.bound.InputType
+
+    @property
+    def OutputType(self):
+        return self.bound.OutputType
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.scheduler.call(self.bound.invoke, input, config, estimated_tokens=estimate_tokens(input), **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.scheduler.acall(self.bound.ainvoke, input, config, estimated_tokens=estimate_tokens(input), **kwargs)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.scheduler.stream(self.bound.stream, input, config, estimated_tokens=estimate_tokens(input), **kwargs)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        async for chunk in self.scheduler.astream(self.bound.astream, input, config,
+                                                  estimated_tokens=estimate_tokens(input), **kwargs):
+            yield chunk
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("bound", "scheduler"):
+            raise AttributeError(name)
+        attr = getattr(self.bound, name)
+        if name in self.WRAPPED_FACTORIES:
+            def factory(*args, **kwargs):
+                return self.scheduler.wrap(attr(*args, **kwargs))
+            return factory
+        return attr
+
+    def __repr__(self) -> str:
+        return f"ScheduledRunnable({self.bound!r})"
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler, created from the environment on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                requests_per_minute=env_float("DOCGEN_LLM_RPM", 0),
+                tokens_per_minute=env_float("DOCGEN_LLM_TPM", 0),
+                max_concurrency=env_int("DOCGEN_LLM_MAX_CONCURRENCY", 16),
+                max_retries=env_int("DOCGEN_LLM_MAX_RETRIES", 5),
+            )
+        return _scheduler
+
+
+def scheduled(runnable: Runnable) -> ScheduledRunnable:
+    """Wrap a model so its calls go through the process-wide scheduler."""
+    return get_scheduler().wrap(runnable)
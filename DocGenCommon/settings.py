@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+
+# Root of the repository, used to resolve the default cache locations
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Directory holding the on-disk caches (LLM responses, extractions, ...)
+CACHE_DIR = Path(os.getenv("DOCGEN_CACHE_DIR", REPO_ROOT / ".docgen_cache"))
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean flag such as DOCGEN_LLM_CACHE=1 from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
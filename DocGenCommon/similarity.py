@@ -0,0 +1,46 @@
+"""Cheap local measures of how much a document changed between two versions.
+
+Both return the fraction of the document that changed, 0.0 for identical text
+and 1.0 for completely different text, so they can be compared against the same
+convergence threshold.
+"""
+import difflib
+from typing import Set
+
+METRICS = ("lines", "shingles")
+
+
+def line_change_ratio(old: str, new: str) -> float:
+    """Fraction of lines added, removed or modified, from a line diff."""
+    old_lines = [line.strip() for line in old.splitlines() if line.strip()]
+    new_lines = [line.strip() for line in new.splitlines() if line.strip()]
+    if not old_lines and not new_lines:
+        return 0.0
+    # autojunk would ignore frequent lines such as table separators in long documents
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return 1.0 - matcher.ratio()
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Hashes of the overlapping word n-grams of a text."""
+    words = text.lower().split()
+    if len(words) < size:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def shingle_jaccard(old: str, new: str, size: int = 5) -> float:
+    """Jaccard similarity of the word shingles of two texts."""
+    old_shingles, new_shingles = shingles(old, size), shingles(new, size)
+    if not old_shingles and not new_shingles:
+        return 1.0
+    return len(old_shingles & new_shingles) / len(old_shingles | new_shingles)
+
+
+def change_ratio(old: str, new: str, metric: str = "lines") -> float:
+    """Fraction of the document that changed, measured with one of METRICS."""
+    if metric == "lines":
+        return line_change_ratio(old, new)
+    if metric == "shingles":
+        return 1.0 - shingle_jaccard(old, new)
+    raise ValueError(f"Unknown change metric: {metric}. Use one of {METRICS}.")
@@ -0,0 +1,72 @@
+"""Callback handler counting LLM calls and token usage.
+
+Input tokens served from the provider's prompt prefix cache are counted
+separately, so the cache hit rate of a message layout can be measured.
+
+Pass a tracker in the run config of a chain to attribute calls and tokens to a
+pipeline, one tracker per pipeline:
+
+    usage = UsageTracker()
+    chain.invoke(inputs, config={"callbacks": [usage]})
+    print(usage.snapshot())
+"""
+import threading
+from typing import Any, Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+class UsageTracker(BaseCallbackHandler):
+    """Thread-safe counters of LLM calls, errors and tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_input_tokens = 0
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, **kwargs: Any):
+        with self._lock:
+            self.calls += 1
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, **kwargs: Any):
+        with self._lock:
+            self.calls += 1
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any):
+        with self._lock:
+            self.errors += 1
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        input_tokens = output_tokens = cached_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+                    cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        # completion models only report usage for the whole call
+        if not (input_tokens or output_tokens) and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or {}
+            input_tokens = token_usage.get("prompt_tokens", 0)
+            output_tokens = token_usage.get("completion_tokens", 0)
+            cached_tokens = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.cached_input_tokens += cached_tokens
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "llm_calls": self.calls,
+                "llm_errors": self.errors,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cached_input_tokens": self.cached_input_tokens,
+                "cache_hit_rate": round(self.cached_input_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            }
@@ -1,30 +1,46 @@
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-from langchain_ollama import ChatOllama
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-
 from rich import print
 
 from dotenv import load_dotenv
 
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 load_dotenv()
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_chat_model
+from DocGenCommon.llm_cache import llm_cache_enabled
+from DocGenCommon.outline import iter_stream_sections
+from DocGenCommon.prompt_layout import shared_prefix_enabled
+from DocGenCommon.settings import env_flag, env_float, env_int
+from DocGenCommon.similarity import change_ratio
+from DocGenCommon.usage import UsageTracker
+
+# opt-in with DOCGEN_LLM_CACHE_DOCGENREFLECT=1, streaming is turned off when caching
+# because LangChain only consults the cache on non-streamed calls
+ReflectCaching = llm_cache_enabled("DOCGENREFLECT")
+
 
+# Provider SDKs are only imported when a model is first requested (see DocGenCommon/providers.py)
+#OllamaLLM = get_chat_model("ollama", "llama3.2", temperature=0.2)
+#OllamaLLM = get_chat_model("ollama", "deepseek-r1:14b", temperature=0.2)
+#AnthopicLLM = get_chat_model("anthropic", "llama-3.2-90b-text-preview", temperature=0.7)
+#GroqLLM = get_chat_model("groq", "Deepseek-R1-Distill-llama-70b", temperature=0.7)
+#GroqLLM = get_chat_model("groq", "llama-3.3-70b-Specdec", temperature=0.7)
 
-#OllamaLLM = ChatOllama(model="llama3.2", temperature=0.2)
-#OllamaLLM = ChatOllama(model="deepseek-r1:14b", temperature=0.2)
-#AnthopicLLM = ChatAnthropic(model_name="llama-3.2-90b-text-preview", temperature=0.7)
-OpenAILLM = ChatOpenAI(model="gpt-4o", temperature=0.7, max_tokens=None, max_retries=2)
-#GroqLLM =  ChatGroq(model = "Deepseek-R1-Distill-llama-70b", temperature=0.7 )
-#GroqLLM =  ChatGroq(model = "Deepseek-R1-Distill-llama-70b", temperature=0.7 )
-#GroqLLM =  ChatGroq(model = "llama-3.3-70b-Specdec", temperature=0.7 )
+def OpenAILLM():
+    """Shared, pooled gpt-4o client; retries are done by the scheduler so 429s feed its adaptive concurrency."""
+    return get_chat_model("openai", "gpt-4o", temperature=0.7, max_tokens=None,
+                          use_cache=ReflectCaching, disable_streaming=ReflectCaching)
 
-GenLLM = OpenAILLM 
+GenLLM = OpenAILLM
 ReflectLLM = OpenAILLM
 
 
@@ -73,32 +89,9 @@ generatePrompt = ChatPromptTemplate(
     ]
 )
 
-## generate the generate langchain
-generateChain = generatePrompt | GenLLM
-
-## define the question
-OriginalDoc = ""
-request = HumanMessage(
-    content="Write a component standard on Azure API Management"
-)
-
-## generate the request
-print("\n📝 Generating document")
-for chunk in generateChain.stream({"messages" : [request]}):
-    #print( chunk.content, end="")
-    print( ".", end="")
-    OriginalDoc += chunk.content
-
-with open("GeneratedDocs/OriginalDoc.md", "w", encoding="utf-8") as f:
-    f.write(OriginalDoc)
-
 #####  Reflect and improve ####################################################
 
-reflectPrompt = ChatPromptTemplate(
-    [
-        (
-            "system",
-            """
+reflectInstructions = """
             You are an expert Solution architect grading an component standard submission. Generate critique and recommendations for the user's submission. 
             Provide detailed recommendations, including requests for Technical accuracy, completeness, length, depth, style, etc.
             
@@ -112,40 +105,262 @@ reflectPrompt = ChatPromptTemplate(
             - the document should be focused towards architects
             - the document should be used to select the appropriate products for their designs
             - the document should refer to you own company 'PenCo', never simply refer to organisaion, always use the company name
+            
+            if the submission already meets all of the above and needs no further changes, reply with the single word APPROVED
             """
+
+# Answer of the critic when the document needs no further changes
+APPROVED = "APPROVED"
+
+# Opens the review turn of the shared-prefix layout, where the review runs under the author's system prompt
+CRITIC_ROLE = """
+            Do not act as the author of the component standard above and do not revise it.
+            For this answer you are its reviewer, follow these instructions only:
+            """
+
+reflectPrompt = ChatPromptTemplate(
+    [
+        (
+            "system",
+            reflectInstructions
         ),
         MessagesPlaceholder(variable_name="messages"),
     ]
 )
 
-## generate the reflection
 
+def reflect_messages(request, OriginalDoc):
+    """
+    Messages of the review call.
 
-reflectChain = reflectPrompt | ReflectLLM
+    With the shared-prefix layout the review reuses the generate system prompt,
+    the request and the draft as its prefix, the same prefix the regenerate call
+    sends, so the provider can serve the shared part of both calls from its
+    prompt cache. The last turn sets the critic's role over the author's, then
+    gives the review instructions.
+    """
+    if shared_prefix_enabled():
+        return generatePrompt, [
+            request,
+            AIMessage(content=OriginalDoc),
+            HumanMessage(content=f"{CRITIC_ROLE}{reflectInstructions}\nCritique the component standard above."),
+        ]
+    return reflectPrompt, [request, HumanMessage(content=OriginalDoc)]
 
-reflection = ""
-## generate the reflection
-print("\n📝 Reviewing document")
-for chunk in reflectChain.stream({"messages" : [request, HumanMessage(content=OriginalDoc)]}):
-    print( ".", end="")
-    reflection += chunk.content
-with open("GeneratedDocs/ReflectionDoc.md", "w", encoding="utf-8") as f:
-    f.write(reflection)
 
+def reflect_section_messages(request, section):
+    """Messages of the review of a single section, see reflect_messages."""
+    if shared_prefix_enabled():
+        return generatePrompt, [
+            request,
+            AIMessage(content=section),
+            HumanMessage(content=f"{CRITIC_ROLE}{reflectInstructions}\nThe text above is one section of the component standard, "
+                                 "the other sections are reviewed separately. Critique this section only."),
+        ]
+    return reflectPrompt, [request, HumanMessage(content=section)]
 
 
-finalDoc = ""
-## re-generate taking into account he feedback
-print("\n✍️ Editing document")
-for chunk in generateChain.stream({"messages" :
-    [
-        request, 
-        AIMessage(content=OriginalDoc),
-        HumanMessage(content=reflection)
-        ]}):
-    finalDoc += chunk.content
-    print( ".", end="")
+def stream_text(chain, messages, config=None, show_progress=True) -> str:
+    """Stream a chain's answer, printing a dot per chunk, and return the full text."""
+    text = ""
+    for chunk in chain.stream({"messages": messages}, config=config):
+        if show_progress:
+            print( ".", end="")
+        text += chunk.content
+    return text
+
+
+def is_approved(reflection):
+    """
+    The critic answers APPROVED when the document needs no further changes. Only a
+    first line that is the word itself counts, "Approved, but ..." asks for changes.
+    """
+    lines = reflection.strip().splitlines()
+    return bool(lines) and lines[0].strip().strip("*#.! ").upper() == APPROVED
+
+
+def run_component_standard(product, output_dir="GeneratedDocs", request_text=None, callbacks=None, show_progress=True,
+                           max_rounds=None, min_change=None, change_metric=None, pipelined=None):
+    """
+    Generate the component standard of one product, then review and regenerate it
+    until the critic approves, a round changes less than min_change of the
+    document, or max_rounds reviews have been done.
+
+    Writes OriginalDoc.md, ReflectionDoc.md (every round's critique) and
+    finaldoc.md to output_dir and returns the final document, the per-round
+    log and the reason the loop stopped.
+
+    With pipelined=True (or DOCGENREFLECT_PIPELINED=1) the document is reviewed
+    and rewritten section by section while it streams, see
+    run_component_standard_pipelined.
+    """
+    if pipelined if pipelined is not None else env_flag("DOCGENREFLECT_PIPELINED"):
+        return run_component_standard_pipelined(product, output_dir, request_text, callbacks, show_progress,
+                                                change_metric=change_metric)
+    max_rounds = max_rounds if max_rounds is not None else env_int("DOCGENREFLECT_MAX_ROUNDS", 3)
+    if max_rounds < 1:
+        raise ValueError(f"max_rounds (DOCGENREFLECT_MAX_ROUNDS) must be at least 1, got {max_rounds}")
+    min_change = min_change if min_change is not None else env_float("DOCGENREFLECT_MIN_CHANGE", 0.05)
+    change_metric = change_metric or os.getenv("DOCGENREFLECT_CHANGE_METRIC", "lines")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config = {"callbacks": callbacks} if callbacks else None
+
+    ## generate the generate langchain
+    generateChain = generatePrompt | GenLLM()
+
+    ## define the question
+    request = HumanMessage(
+        content=request_text or f"Write a component standard on {product}"
+    )
+
+    ## generate the request
+    if show_progress:
+        print("\n📝 Generating document")
+    OriginalDoc = stream_text(generateChain, [request], config, show_progress)
+    with open(output_dir / "OriginalDoc.md", "w", encoding="utf-8") as f:
+        f.write(OriginalDoc)
+
+    draft = OriginalDoc
+    reflections, rounds = [], []
+    stop_reason = "max_rounds"
+    for round_no in range(1, max_rounds + 1):
+        ## build the reflection langchain
+        reviewPrompt, reviewMessages = reflect_messages(request, draft)
+        reflectChain = reviewPrompt | ReflectLLM()
+
+        ## generate the reflection
+        if show_progress:
+            print(f"\n📝 Reviewing document (round {round_no})")
+        reflection = stream_text(reflectChain, reviewMessages, config, show_progress)
+        reflections.append(f"## Round {round_no}\n\n{reflection}")
+        if is_approved(reflection):
+            rounds.append({"round": round_no, "approved": True, "change": 0.0})
+            stop_reason = "approved"
+            if show_progress:
+                print(f"\n✅ Round {round_no}: the reviewer approved the document")
+            break
+
+        ## re-generate taking into account he feedback
+        if show_progress:
+            print(f"\n✍️ Editing document (round {round_no})")
+        revised = stream_text(generateChain,
+            [
+                request, 
+                AIMessage(content=draft),
+                HumanMessage(content=reflection)
+                ], config, show_progress)
+
+        change = change_ratio(draft, revised, change_metric)
+        rounds.append({"round": round_no, "approved": False, "change": round(change, 4)})
+        draft = revised
+        if show_progress:
+            print(f"\n🔁 Round {round_no}: {change:.1%} of the document changed ({change_metric}, stop below {min_change:.1%})")
+        if change < min_change:
+            stop_reason = "converged"
+            break
+
+    with open(output_dir / "ReflectionDoc.md", "w", encoding="utf-8") as f:
+        f.write("\n\n".join(reflections) if len(reflections) > 1 else reflection)
+    with open(output_dir / "finaldoc.md", "w", encoding="utf-8") as f:
+        f.write(draft)
+    if show_progress:
+        print(f"\nStopped after {len(rounds)} review round(s): {stop_reason}")
+    return {"document": draft, "rounds": rounds, "stop_reason": stop_reason}
+
+
+def section_text(section):
+    """Markdown of a section, header line included."""
+    text = f"{section.header}\n{section.body}" if section.header else section.body
+    return text.rstrip() + "\n\n"
+
+
+def review_section(request, section, generateChain, config):
+    """Critique one section, then rewrite it on its own. Returns (rewritten section, critique)."""
+    if not section.body.strip():
+        # a title or an empty heading, nothing to review
+        return section_text(section), None
+    draft = section_text(section)
+    reviewPrompt, reviewMessages = reflect_section_messages(request, draft)
+    critique = (reviewPrompt | ReflectLLM()).invoke({"messages": reviewMessages}, config=config).content
+    if is_approved(critique):
+        return draft, critique
+    rewritten = generateChain.invoke({"messages": [
+        request,
+        AIMessage(content=draft),
+        HumanMessage(content=f"{critique}\n\nRewrite only this section, starting with its heading '{section.header}'."
+                             if section.header else f"{critique}\n\nRewrite only this text."),
+    ]}, config=config).content
+    return rewritten.rstrip() + "\n\n", critique
+
+
+def run_component_standard_pipelined(product, output_dir="GeneratedDocs", request_text=None, callbacks=None,
+                                     show_progress=True, max_workers=None, change_metric=None):
+    """
+    Generate the component standard of one product, reviewing and rewriting each
+    section as soon as it has streamed in.
+
+    The draft is split at the headers of DOCGENREFLECT_SECTION_LEVELS (default
+    1 and 2, the numbered sections of the layout). The review of section N
+    starts while section N+1 is still generated and every section is rewritten
+    on its own, so the run takes about the generation time plus the review and
+    rewrite of the last section. One review round is done per section.
+    """
+    levels = [int(level) for level in os.getenv("DOCGENREFLECT_SECTION_LEVELS", "1,2").split(",")]
+    max_workers = max_workers or env_int("DOCGENREFLECT_SECTION_WORKERS", 8)
+    change_metric = change_metric or os.getenv("DOCGENREFLECT_CHANGE_METRIC", "lines")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config = {"callbacks": callbacks} if callbacks else None
+
+    generateChain = generatePrompt | GenLLM()
+    request = HumanMessage(
+        content=request_text or f"Write a component standard on {product}"
+    )
+
+    start = time.perf_counter()
+    if show_progress:
+        print("\n📝 Generating document, reviewing sections as they complete")
+    drafts, futures = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chunks = (chunk.content for chunk in generateChain.stream({"messages": [request]}, config=config))
+        for section in iter_stream_sections(chunks, levels, include_preamble=True):
+            drafts.append(section_text(section))
+            futures.append(executor.submit(review_section, request, section, generateChain, config))
+            if show_progress:
+                print(f"\n  section {len(drafts)} streamed after {time.perf_counter() - start:.1f}s: {section.title or '(preamble)'}")
+        generated = time.perf_counter() - start
+        results = [future.result() for future in futures]
+
+    OriginalDoc = "".join(drafts)
+    finalDoc = "".join(rewritten for rewritten, _ in results)
+    reviews = [f"## Review of: {section.splitlines()[0]}\n\n{critique}"
+               for section, (_, critique) in zip(drafts, results) if critique is not None]
+    with open(output_dir / "OriginalDoc.md", "w", encoding="utf-8") as f:
+        f.write(OriginalDoc)
+    with open(output_dir / "ReflectionDoc.md", "w", encoding="utf-8") as f:
+        f.write("\n\n".join(reviews))
+    with open(output_dir / "finaldoc.md", "w", encoding="utf-8") as f:
+        f.write(finalDoc)
+
+    approved = sum(critique is not None and is_approved(critique) for _, critique in results)
+    change = change_ratio(OriginalDoc, finalDoc, change_metric)
+    if show_progress:
+        print(f"\n✨ {len(drafts)} sections ({len(reviews)} reviewed, {approved} approved) in "
+              f"{time.perf_counter() - start:.1f}s, generation took {generated:.1f}s, {change:.1%} of the document changed")
+    return {
+        "document": finalDoc,
+        "rounds": [{"round": 1, "approved": approved == len(reviews), "change": round(change, 4),
+                    "sections": len(drafts), "approved_sections": approved}],
+        "stop_reason": "pipelined",
+    }
+
+
+def main():
+    usage = UsageTracker()
+    run_component_standard("Azure API Management", callbacks=[usage])
+    print(f"\nLLM usage: {usage.snapshot()}")
 
 
-with open("GeneratedDocs/finaldoc.md", "w", encoding="utf-8") as f:
-    f.write(finalDoc)
+if __name__ == "__main__":
+    main()
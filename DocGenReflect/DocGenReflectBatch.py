@@ -0,0 +1,150 @@
+"""Run the DocGenReflect pipeline for every product of a manifest.
+
+The manifest is a CSV file with a `product` column, or a YAML list of product
+names or mappings. Optional fields are `request` (the request sent instead of
+"Write a component standard on <product>") and `output` (the folder name under
+the output directory).
+
+    python DocGenReflect/DocGenReflectBatch.py products.csv --concurrency 8
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from rich import print
+
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenReflect import run_component_standard
+from DocGenCommon.clients import get_registry
+from DocGenCommon.scheduler import get_scheduler
+from DocGenCommon.similarity import METRICS
+from DocGenCommon.usage import UsageTracker
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-") or "product"
+
+
+def load_manifest(path: str) -> list:
+    """Read the manifest into a list of {"product", "request", "output"} entries."""
+    path = Path(path)
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("YAML manifests need PyYAML, install it with pip install pyyaml") from e
+        with open(path, encoding="utf-8") as f:
+            rows = yaml.safe_load(f) or []
+        if isinstance(rows, dict):
+            rows = rows.get("products", [])
+        rows = [{"product": row} if isinstance(row, str) else row for row in rows]
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+    entries, outputs = [], set()
+    for line_no, row in enumerate(rows, 1):
+        product = (row.get("product") or "").strip()
+        if not product:
+            raise ValueError(f"{path}: entry {line_no} has no product")
+        output = (row.get("output") or "").strip() or slugify(product)
+        if output in outputs:
+            raise ValueError(f"{path}: output folder '{output}' is used twice")
+        outputs.add(output)
+        entries.append({"product": product, "request": (row.get("request") or "").strip() or None, "output": output})
+    return entries
+
+
+def run_entry(entry: dict, output_dir: Path, loop_options: dict) -> dict:
+    """Run one product's pipeline and return its summary record."""
+    usage = UsageTracker()
+    start = time.perf_counter()
+    record = {"product": entry["product"], "output": str(output_dir / entry["output"])}
+    try:
+        result = run_component_standard(entry["product"], output_dir / entry["output"], request_text=entry["request"],
+                                        callbacks=[usage], show_progress=False, **loop_options)
+        record["status"] = "ok"
+        record["rounds"] = len(result["rounds"])
+        record["stop_reason"] = result["stop_reason"]
+        record["round_changes"] = [round_log["change"] for round_log in result["rounds"]]
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 2)
+    record.update(usage.snapshot())
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate component standards for every product of a manifest")
+    parser.add_argument("manifest", help="CSV or YAML manifest of products")
+    parser.add_argument("-o", "--output-dir", default="GeneratedDocs", help="Folder receiving one sub-folder per product")
+    parser.add_argument("-c", "--concurrency", type=int, default=4,
+                        help="Pipelines run at once, LLM calls are further capped by DOCGEN_LLM_MAX_CONCURRENCY")
+    parser.add_argument("--max-rounds", type=int, help="Review rounds per product (DOCGENREFLECT_MAX_ROUNDS, default 3)")
+    parser.add_argument("--min-change", type=float,
+                        help="Stop once a round changes less than this fraction (DOCGENREFLECT_MIN_CHANGE, default 0.05)")
+    parser.add_argument("--metric", choices=METRICS, help="Change metric (DOCGENREFLECT_CHANGE_METRIC, default lines)")
+    parser.add_argument("--pipelined", action="store_true", default=None,
+                        help="Review and rewrite each section while the draft streams (DOCGENREFLECT_PIPELINED)")
+    parser.add_argument("--skip-existing", action="store_true", help="Skip products that already have a finaldoc.md")
+    parser.add_argument("--summary", help="Summary JSON path (default: <output-dir>/batch_summary.json)")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    entries = load_manifest(args.manifest)
+    if args.skip_existing:
+        entries = [entry for entry in entries if not (output_dir / entry["output"] / "finaldoc.md").exists()]
+    print(f"📝 Generating {len(entries)} component standards with {args.concurrency} concurrent pipelines")
+
+    start = time.perf_counter()
+    records = []
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        loop_options = {"max_rounds": args.max_rounds, "min_change": args.min_change, "change_metric": args.metric,
+                        "pipelined": args.pipelined}
+        futures = [executor.submit(run_entry, entry, output_dir, loop_options) for entry in entries]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            mark = "✅" if record["status"] == "ok" else "❌"
+            print(f"{mark} [{len(records)}/{len(entries)}] {record['product']} in {record['seconds']}s, "
+                  f"{record['llm_calls']} LLM calls"
+                  + (f", {record['rounds']} round(s) ({record['stop_reason']})" if "rounds" in record else "")
+                  + (f" - {record['error']}" if "error" in record else ""))
+    wall_time = time.perf_counter() - start
+
+    summary = {
+        "manifest": args.manifest,
+        "concurrency": args.concurrency,
+        "wall_time_s": round(wall_time, 2),
+        "products": len(records),
+        "succeeded": sum(record["status"] == "ok" for record in records),
+        "failed": sum(record["status"] != "ok" for record in records),
+        "llm_calls": sum(record["llm_calls"] for record in records),
+        "input_tokens": sum(record["input_tokens"] for record in records),
+        "output_tokens": sum(record["output_tokens"] for record in records),
+        "cached_input_tokens": sum(record["cached_input_tokens"] for record in records),
+        "review_rounds": sum(record.get("rounds", 0) for record in records),
+        "pipeline_seconds": round(sum(record["seconds"] for record in records), 2),
+        "scheduler": get_scheduler().metrics(),
+        "connections": get_registry().connection_stats(),
+        "results": sorted(records, key=lambda record: record["product"]),
+    }
+    summary_path = Path(args.summary) if args.summary else output_dir / "batch_summary.json"
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n✨ {summary['succeeded']}/{summary['products']} succeeded in {summary['wall_time_s']}s "
+          f"({summary['pipeline_seconds']}s of pipeline time), {summary['llm_calls']} LLM calls")
+    print(f"Summary written to {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,42 @@
+import argparse
+import hashlib
 import os
+import sys
+import time
+from pathlib import Path
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI 
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
-from langchain.memory import ConversationBufferMemory  
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
 # Load API Key
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# Initialize GPT-4o Model
-llm = ChatOpenAI(model="gpt-4o", temperature=0.7, api_key=openai_api_key)
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_chat_model
+from DocGenCommon.usage import UsageTracker
+from DocPatch import PatchError, apply_patch, parse_patch, section_headers
+from Publisher import normalize_markdown, publish
+from TeamMemory import team_memory_from_env
 
-# Shared Memory for Agents
-memory = ConversationBufferMemory()
+def get_llm():
+    """GPT-4o Model, created on first use and shared through the client registry and scheduler."""
+    return get_chat_model("openai", "gpt-4o", temperature=0.7, api_key=openai_api_key)
+
+# Shared Memory for Agents, scoped per document and bounded (see TeamMemory.py)
+memory = team_memory_from_env()
+
+DEFAULT_DOCUMENT = "default"
+
+def document_id_for(project_details):
+    """Memory scope of a document, derived from its project details."""
+    return hashlib.sha256(project_details.encode("utf-8")).hexdigest()[:16]
 
 # ===========================
 # Define Agent Functions
 # ===========================
 
-def architect_agent(project_details):
+def architect_agent(project_details, document_id=DEFAULT_DOCUMENT):
     """Creates the initial architectural document."""
     prompt = f"""
     You are an experienced architect responsible for generating technical documentation. 
@@ -37,11 +55,11 @@ def architect_agent(project_details):
 
     Ensure clarity, technical accuracy, and completeness.
     """
-    response = llm.invoke([SystemMessage(content=prompt)])
-    memory.save_context({"role": "Architect-Agent"}, {"content": response.content})
+    response = get_llm().invoke([SystemMessage(content=prompt)])
+    memory.save(document_id, "Architect-Agent", response.content)
     return response.content
 
-def reviewer_agent(document):
+def reviewer_agent(document, document_id=DEFAULT_DOCUMENT):
     """Reviews the document for errors, best practices, and security considerations."""
     prompt = f"""
     You are an expert architectural reviewer. Your task is to analyze the following document for:
@@ -55,18 +73,68 @@ def reviewer_agent(document):
 
     Provide detailed feedback and necessary corrections.
     """
-    response = llm.invoke([SystemMessage(content=prompt)])
-    memory.save_context({"role": "Reviewer-Agent"}, {"content": response.content})
+    response = get_llm().invoke([SystemMessage(content=prompt)])
+    memory.save(document_id, "Reviewer-Agent", response.content)
     return response.content
 
-def editor_agent(document, review_feedback):
-    """Edits the document based on the review feedback."""
-    prompt = f"""
-    You are a technical editor refining an architectural document. 
+EDIT_MODES = ("rewrite", "patch")
 
-    Original Document:
+def edit_mode(mode=None):
+    """Edit mode of the editor and publisher, DOCGENTEAM_EDIT_MODE=rewrite (default) or patch."""
+    mode = (mode or os.getenv("DOCGENTEAM_EDIT_MODE", "rewrite")).strip().lower()
+    if mode not in EDIT_MODES:
+        raise ValueError(f"Unknown edit mode: {mode}. Use one of {EDIT_MODES}.")
+    return mode
+
+def patch_prompt(role_description, document, tasks):
+    """Prompt asking for section-addressed JSON patches instead of the whole document."""
+    headers = "\n".join(f"    {header}" for header in section_headers(document))
+    return f"""
+    {role_description}
+
+    Document:
     {document}
 
+    {tasks}
+
+    Do not return the document. Return only a JSON object with the changes, as
+    section-addressed operations:
+    {{"operations": [
+        {{"op": "replace", "section": "<exact header line>", "content": "<the whole new section, header and subsections included>"}},
+        {{"op": "insert_after", "section": "<exact header line>", "content": "<new sections to add after it and its subsections>"}},
+        {{"op": "delete", "section": "<exact header line>"}}
+    ]}}
+    A section spans its subsections. Only include sections that change. The header lines you can address are:
+{headers}
+    """
+
+def run_editing_agent(role, document, rewrite_prompt, patch_instructions, document_id, mode, stats):
+    """
+    Run the editor or publisher. In patch mode the agent returns JSON patches that
+    are applied locally, and a full rewrite is requested when they do not apply.
+    """
+    usage = UsageTracker()
+    config = {"callbacks": [usage]}
+    start = time.perf_counter()
+    result, fallback = None, False
+    if mode == "patch":
+        response = get_llm().invoke([SystemMessage(content=patch_instructions)], config=config)
+        try:
+            result = apply_patch(document, parse_patch(response.content))
+        except PatchError as e:
+            print(f"⚠️ {role}: the patch could not be applied ({e}), falling back to a full rewrite")
+            fallback = True
+    if result is None:
+        result = get_llm().invoke([SystemMessage(content=rewrite_prompt)], config=config).content
+    if stats is not None:
+        stats.append({"agent": role, "mode": mode, "fallback": fallback,
+                      "seconds": round(time.perf_counter() - start, 2), **usage.snapshot()})
+    memory.save(document_id, role, result)
+    return result
+
+def editor_agent(document, review_feedback, document_id=DEFAULT_DOCUMENT, mode=None, stats=None):
+    """Edits the document based on the review feedback."""
+    tasks = f"""
     Review Feedback:
     {review_feedback}
 
@@ -75,59 +143,123 @@ def editor_agent(document, review_feedback):
     - Improve readability and structure
     - Ensure consistent formatting
     - Summarize complex sections if needed
+    """
+    prompt = f"""
+    You are a technical editor refining an architectural document. 
 
+    Original Document:
+    {document}
+    {tasks}
     Provide a refined version of the document.
     """
-    response = llm.invoke([SystemMessage(content=prompt)])
-    memory.save_context({"role": "Editor-Agent"}, {"content": response.content})
-    return response.content
+    return run_editing_agent("Editor-Agent", document, prompt,
+                             patch_prompt("You are a technical editor refining an architectural document.", document, tasks),
+                             document_id, edit_mode(mode), stats)
 
-def publisher_agent(final_document):
+def publisher_agent(final_document, document_id=DEFAULT_DOCUMENT, mode=None, stats=None):
     """Prepares and formats the document for publishing."""
+    tasks = """
+    - Ensure all figures, tables, and diagrams are properly formatted
+    - Apply branding if required
+    """
     prompt = f"""
     You are responsible for formatting and publishing the architectural document.
 
     Document:
     {final_document}
-
-    - Ensure all figures, tables, and diagrams are properly formatted
-    - Apply branding if required
+    {tasks}
     - Provide a final version ready for publishing
 
     Return the formatted version.
     """
-    response = llm.invoke([SystemMessage(content=prompt)])
-    memory.save_context({"role": "Publisher-Agent"}, {"content": response.content})
-    return response.content
+    return run_editing_agent("Publisher-Agent", final_document, prompt,
+                             patch_prompt("You are responsible for formatting and publishing the architectural document.",
+                                          final_document, tasks),
+                             document_id, edit_mode(mode), stats)
 
-def coordinator_agent(project_details):
+def publishing_stage(final_document, document_id=DEFAULT_DOCUMENT, mode=None, stats=None):
+    """
+    Publish the document locally: normalize headings, tables, lists and whitespace
+    and apply the branding template. The publisher agent is only called when the
+    linter finds issues it cannot fix, or when DOCGENTEAM_PUBLISHER=llm.
+    """
+    template = os.getenv("DOCGENTEAM_BRANDING_TEMPLATE")
+    if os.getenv("DOCGENTEAM_PUBLISHER", "local").strip().lower() == "llm":
+        return publish(publisher_agent(final_document, document_id, mode, stats), template).document
+
+    start = time.perf_counter()
+    result = publish(final_document, template)
+    print(f"   {len(result.fixes)} formatting fixes applied locally")
+    if result.issues:
+        print(f"   {len(result.issues)} issues need the publisher agent: {result.issues}")
+        published = publisher_agent(normalize_markdown(final_document)[0], document_id, mode, stats)
+        result = publish(published, template)
+    else:
+        # the publisher agent saves its own turn
+        memory.save(document_id, "Publisher-Agent", result.document)
+        if stats is not None:
+            stats.append({"agent": "Publisher-Local", "mode": "local", "fallback": False,
+                          "seconds": round(time.perf_counter() - start, 3), **UsageTracker().snapshot()})
+    return result.document
+
+def coordinator_agent(project_details, document_id=None, mode=None, stats=None):
     """Manages the workflow between agents."""
     print("📌 Starting Architectural Documentation Process...")
+    document_id = document_id or document_id_for(project_details)
 
     # 1. Architect Agent Generates the Document
     print("\n📝 Architect-Agent: Generating initial documentation...")
-    initial_doc = architect_agent(project_details)
+    initial_doc = architect_agent(project_details, document_id)
     
     # 2. Reviewer Agent Reviews the Document
     print("\n🔍 Reviewer-Agent: Reviewing the document...")
-    review_feedback = reviewer_agent(initial_doc)
+    review_feedback = reviewer_agent(initial_doc, document_id)
 
     # 3. Editor Agent Refines the Document
-    print("\n✍️ Editor-Agent: Editing the document...")
-    final_doc = editor_agent(initial_doc, review_feedback)
+    print(f"\n✍️ Editor-Agent: Editing the document ({edit_mode(mode)})...")
+    final_doc = editor_agent(initial_doc, review_feedback, document_id, mode, stats)
 
     # 4. Publisher Agent Publishes the Document
     print("\n📤 Publisher-Agent: Publishing the final document...")
-    published_doc = publisher_agent(final_doc)
+    published_doc = publishing_stage(final_doc, document_id, mode, stats)
 
     print("\n✅ Documentation Process Completed!")
     return published_doc
 
+def compare_edit_modes(project_details):
+    """
+    Generate and review one draft, then run the editor and publisher in both edit
+    modes on it and print their output tokens and wall time side by side.
+    Returns the published document of each mode.
+    """
+    document_id = document_id_for(project_details)
+    print("\n📝 Architect-Agent: Generating initial documentation...")
+    initial_doc = architect_agent(project_details, document_id)
+    print("\n🔍 Reviewer-Agent: Reviewing the document...")
+    review_feedback = reviewer_agent(initial_doc, document_id)
+
+    stats, published = [], {}
+    for mode in EDIT_MODES:
+        print(f"\n✍️ Editing and publishing ({mode})...")
+        final_doc = editor_agent(initial_doc, review_feedback, document_id, mode, stats)
+        published[mode] = publisher_agent(final_doc, document_id, mode, stats)
+
+    print(f"\n{'agent':<16} {'mode':<8} {'output tokens':>14} {'seconds':>8}  fallback")
+    for record in stats:
+        print(f"{record['agent']:<16} {record['mode']:<8} {record['output_tokens']:>14} {record['seconds']:>8}  {record['fallback']}")
+    return published
+
 # ===========================
 # Run the Multi-Agent System
 # ===========================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate an architectural document with a team of agents")
+    parser.add_argument("--edit-mode", choices=EDIT_MODES + ("compare",),
+                        help="rewrite: editor and publisher return the whole document, patch: they return "
+                             "section patches applied locally, compare: run both and report tokens and time")
+    args = parser.parse_args()
+
     project_info = """
     Project Name: resilient Database
     Scope: A database component based on MS SQL Server that is highly resilient and scalable.
@@ -136,8 +268,14 @@ if __name__ == "__main__":
     Industry Standards: TOGAF, Microservices Best Practices
     """
     
-    final_output = coordinator_agent(project_info)
+    if args.edit_mode == "compare":
+        final_output = compare_edit_modes(project_info)["patch"]
+    else:
+        edit_stats = []
+        final_output = coordinator_agent(project_info, mode=args.edit_mode, stats=edit_stats)
+        print(f"Editing: {edit_stats}")
     with open("GeneratedDocs/AgentTeamDoc.md", "w", encoding="utf-8") as f:
         f.write(final_output)
+    print(f"Team memory: {memory.metrics()}")
 
 
@@ -0,0 +1,122 @@
+"""Section-addressed patches applied locally to a markdown document.
+
+Instead of returning the whole document, an editing agent returns the changes
+as JSON, which are applied here:
+
+    {"operations": [
+        {"op": "replace", "section": "## Security", "content": "## Security\\n..."},
+        {"op": "insert_after", "section": "## Security", "content": "## Compliance\\n..."},
+        {"op": "delete", "section": "## Appendix"}
+    ]}
+
+Sections are addressed by their exact header line and span their whole subtree,
+up to the next header of the same or a higher level. "replace" swaps a whole
+section (header and subsections included), "insert_after" adds new sections
+after one and its subsections, and "delete" removes one. Use "section": "" to
+address the text before the first header. The text outside the patched
+sections is kept byte for byte. PatchError is raised when a patch cannot be
+parsed or applied, so callers can fall back to a full rewrite.
+"""
+import io
+import json
+import re
+from typing import Dict, List
+
+from DocGenCommon.outline import iter_sections
+
+OPERATIONS = ("replace", "insert_after", "delete")
+# only a fence around the whole answer: the content of a patch may hold fenced code blocks
+FENCED_JSON_RE = re.compile(r"^\s*```(?:json)?[ \t]*\n(.*)\n[ \t]*```\s*$", re.DOTALL)
+
+
+class PatchError(ValueError):
+    """A patch that cannot be parsed or applied to the document."""
+
+
+def section_spans(document: str) -> List[Dict]:
+    """
+    The {"header", "level", "start", "end"} spans of the sections of a document.
+
+    start and end are character offsets, a section ends at the next header of
+    the same or a higher level, so its span holds its subsections. The text
+    before the first header is the level 0 section with an empty header.
+    """
+    offsets = [0]
+    for line in io.StringIO(document):
+        offsets.append(offsets[-1] + len(line))
+    headers = [(section.level, section.header, offsets[section.line_no - 1]) for section in iter_sections(document)]
+    spans = [{"header": "", "level": 0, "start": 0, "end": headers[0][2] if headers else len(document)}]
+    for i, (level, header, start) in enumerate(headers):
+        end = next((other for other_level, _, other in headers[i + 1:] if other_level <= level), len(document))
+        spans.append({"header": header, "level": level, "start": start, "end": end})
+    return spans
+
+
+def section_headers(document: str) -> List[str]:
+    """The header lines an agent can address in a patch."""
+    return [span["header"] for span in section_spans(document) if span["header"]]
+
+
+def parse_patch(text: str) -> List[Dict[str, str]]:
+    """Read the operations of a patch answer, with or without a ```json fence."""
+    # the inside of a fence around the whole answer, else the outermost {...}
+    candidates = [text[text.find("{"):text.rfind("}") + 1]]
+    fenced = FENCED_JSON_RE.match(text)
+    if fenced:
+        candidates.insert(0, fenced.group(1))
+    error = None
+    for raw in candidates:
+        try:
+            patch = json.loads(raw)
+            break
+        except json.JSONDecodeError as e:
+            error = error or e
+    else:
+        raise PatchError(f"not valid JSON: {error}") from error
+    operations = patch.get("operations") if isinstance(patch, dict) else patch
+    if not isinstance(operations, list):
+        raise PatchError("the patch has no list of operations")
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            raise PatchError(f"unsupported operation: {operation}")
+        if not isinstance(operation.get("section"), str):
+            raise PatchError(f"operation without section: {operation}")
+        if operation["op"] != "delete" and not isinstance(operation.get("content"), str):
+            raise PatchError(f"operation without content: {operation}")
+    return operations
+
+
+def _find_span(document: str, address: str) -> Dict:
+    """The span of the one section with this header line."""
+    matches = [span for span in section_spans(document) if span["header"] == address]
+    if len(matches) != 1:
+        raise PatchError(f"section '{address}' matches {len(matches)} sections")
+    return matches[0]
+
+
+def _separated(before: str) -> str:
+    """before, ending with a blank line unless it is empty."""
+    if not before or before.endswith("\n\n"):
+        return before
+    return before + ("\n" if before.endswith("\n") else "\n\n")
+
+
+def apply_patch(document: str, operations: List[Dict[str, str]]) -> str:
+    """Apply replace / insert_after / delete operations to a document and return the new document."""
+    for operation in operations:
+        span = _find_span(document, operation["section"].strip())
+        start, end = span["start"], span["end"]
+        content = operation.get("content", "").strip("\n")
+        rest = document[end:]
+        if operation["op"] == "delete":
+            document = document[:start] + rest
+        elif operation["op"] == "replace":
+            # the replaced section keeps the blank lines that separated it from the next one
+            old = document[start:end]
+            trailing = old[len(old.rstrip()):] if old.strip() else ""
+            if rest and not trailing.endswith("\n"):
+                trailing = "\n\n"
+            document = document[:start] + content + (trailing or "\n") + rest
+        else:
+            document = _separated(document[:end]) + content + ("\n\n" if rest else "\n") + rest
+    return document
@@ -0,0 +1,218 @@
+"""Deterministic markdown publishing stage for DocGenTeam.
+
+normalize_markdown fixes the mechanical formatting the publisher agent used to
+do with an LLM call: heading syntax and levels, table alignment, list markers
+and whitespace. lint_markdown reports the problems it cannot fix, and only
+then is the LLM publisher needed. apply_branding wraps the document in a
+header/footer template.
+
+    result = publish(document)
+    if result.issues:
+        ...  # ask the LLM publisher
+"""
+import datetime
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent / "branding_template.md"
+
+# "## Title", and "##Title" which is a heading missing its space ("#tag" is left alone)
+ATX_RE = re.compile(r"^(#{1,6})(?:[ \t]+|(?<=##)(?=\w)|$)(.*?)(?:[ \t]+#+)?[ \t]*$")
+SETEXT_RE = re.compile(r"^(=+|-+)[ \t]*$")
+FENCE_RE = re.compile(r"^[ \t]{0,3}(`{3,}|~{3,})")
+BULLET_RE = re.compile(r"^([ \t]*)[*+•][ \t]+(.*)$")
+THEMATIC_BREAK_RE = re.compile(r"^\s*([*_-])(\s*\1){2,}\s*$")
+ORDERED_RE = re.compile(r"^([ \t]*)(\d+)\)[ \t]+(.*)$")
+SEPARATOR_CELL_RE = re.compile(r"^:?-{1,}:?$")
+EMPTY_LINK_RE = re.compile(r"\[[^\]]+\]\(\s*\)")
+
+
+@dataclass
+class PublishResult:
+    """The normalized document, the fixes applied and the issues left for a human or an LLM."""
+    document: str
+    fixes: List[str] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+
+
+def _split_row(line: str) -> List[str]:
+    """Cells of a table row, escaped pipes kept inside cells."""
+    row = line.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    return [cell.strip() for cell in re.split(r"(?<!\\)\|", row)]
+
+
+def _format_table(rows: List[str], fixes: List[str], issues: List[str], line_no: int) -> List[str]:
+    """Align a table's columns, padding short rows. Tables without a separator row are reported."""
+    cells = [_split_row(row) for row in rows]
+    if len(cells) < 2 or not all(SEPARATOR_CELL_RE.match(cell) for cell in cells[1]):
+        issues.append(f"line {line_no}: table without a header separator row")
+        return rows
+    columns = len(cells[0])
+    if any(len(row) > columns for row in cells[2:]):
+        issues.append(f"line {line_no}: table row with more cells than the header")
+        return rows
+    if any(len(row) < columns for row in cells):
+        fixes.append(f"line {line_no}: padded short table rows")
+        cells = [row + [""] * (columns - len(row)) for row in cells]
+    alignments = [(cell.startswith(":"), cell.endswith(":")) for cell in cells[1][:columns]]
+    widths = [max([3] + [len(row[column]) for index, row in enumerate(cells) if index != 1])
+              for column in range(columns)]
+    formatted = []
+    for index, row in enumerate(cells):
+        if index == 1:
+            row = [(":" if left else "-") + "-" * (width - 2) + (":" if right else "-")
+                   for (left, right), width in zip(alignments, widths)]
+        else:
+            row = [cell.ljust(width) for cell, width in zip(row, widths)]
+        formatted.append("| " + " | ".join(row) + " |")
+    if formatted != [row.rstrip() for row in rows]:
+        fixes.append(f"line {line_no}: aligned table")
+    return formatted
+
+
+def normalize_markdown(text: str) -> Tuple[str, List[str], List[str]]:
+    """
+    Normalize a markdown document.
+
+    Returns:
+        The normalized text, the fixes applied and the issues that could not be fixed.
+    """
+    fixes, issues = [], []
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").split("\n")]
+    output: List[str] = []
+    fence = None
+    previous_level = 0
+    seen_h1 = False
+    table: List[str] = []
+    table_start = 0
+
+    def flush_table():
+        if table:
+            # tables are surrounded by blank lines
+            if output and output[-1]:
+                output.append("")
+            output.extend(_format_table(table, fixes, issues, table_start))
+            output.append("")
+            table.clear()
+
+    for line_no, line in enumerate(lines, 1):
+        fence_match = FENCE_RE.match(line)
+        if fence_match or fence is not None:
+            flush_table()
+            if fence_match:
+                marker = fence_match.group(1)
+                if fence is None:
+                    fence = marker
+                elif marker[0] == fence[0] and len(marker) >= len(fence):
+                    fence = None
+            output.append(line)
+            continue
+
+        if line.lstrip().startswith("|"):
+            if not table:
+                table_start = line_no
+            table.append(line)
+            continue
+        flush_table()
+
+        # setext headings become ATX headings
+        if SETEXT_RE.match(line) and output and output[-1].strip() and not output[-1].startswith(("#", "-", "|", ">")):
+            title = output.pop()
+            line = ("# " if line.startswith("=") else "## ") + title.strip()
+            fixes.append(f"line {line_no}: setext heading converted")
+
+        heading = ATX_RE.match(line) if line.startswith("#") else None
+        if heading:
+            level, title = len(heading.group(1)), heading.group(2)
+            if not title:
+                issues.append(f"line {line_no}: empty heading")
+                output.append(line)
+                continue
+            if level == 1 and seen_h1:
+                level = 2
+                fixes.append(f"line {line_no}: demoted a second level 1 heading")
+            elif previous_level and level > previous_level + 1:
+                level = previous_level + 1
+                fixes.append(f"line {line_no}: heading level jump fixed")
+            seen_h1 = seen_h1 or level == 1
+            previous_level = level
+            normalized = f"{'#' * level} {title}"
+            if normalized != line:
+                fixes.append(f"line {line_no}: heading normalized")
+            # headings are surrounded by blank lines
+            if output and output[-1]:
+                output.append("")
+            output.extend([normalized, ""])
+            continue
+
+        # a thematic break such as * * * is not a list item
+        bullet = None if THEMATIC_BREAK_RE.match(line) else BULLET_RE.match(line)
+        ordered = ORDERED_RE.match(line)
+        if bullet:
+            line = f"{bullet.group(1)}- {bullet.group(2)}"
+            fixes.append(f"line {line_no}: list marker normalized")
+        elif ordered:
+            line = f"{ordered.group(1)}{ordered.group(2)}. {ordered.group(3)}"
+            fixes.append(f"line {line_no}: ordered list marker normalized")
+
+        if EMPTY_LINK_RE.search(line):
+            issues.append(f"line {line_no}: link without a target")
+        output.append(line)
+    flush_table()
+
+    if fence is not None:
+        issues.append("unclosed code block")
+    if not any(line.startswith("#") for line in output):
+        issues.append("document has no headings")
+
+    # collapse runs of blank lines and trim the ends
+    normalized = re.sub(r"\n{3,}", "\n\n", "\n".join(output)).strip() + "\n"
+    return normalized, sorted(set(fixes), key=fixes.index), issues
+
+
+def lint_markdown(text: str) -> List[str]:
+    """Issues normalize_markdown cannot fix."""
+    return normalize_markdown(text)[2]
+
+
+def _branding_re(header: str) -> Optional[re.Pattern]:
+    """The first line of a branding header, with any title and date, None when it has no fixed text."""
+    first = next((line.strip() for line in header.splitlines() if line.strip()), "")
+    parts = re.split(r"\{\{\w+\}\}", first)
+    if not "".join(parts).strip():
+        return None
+    return re.compile(".*?".join(re.escape(part) for part in parts))
+
+
+def apply_branding(document: str, template_path: Optional[str] = None) -> str:
+    """
+    Wrap a document in the branding template. The template contains {{content}}
+    and may use {{title}} (the first heading) and {{date}}.
+    """
+    path = Path(template_path) if template_path else DEFAULT_TEMPLATE
+    if not path.exists():
+        return document
+    template = path.read_text(encoding="utf-8")
+    header, _, footer = template.partition("{{content}}")
+    # do not brand twice, whatever title and date the existing branding has
+    branded = _branding_re(header)
+    first_line = next((line.strip() for line in document.splitlines() if line.strip()), "")
+    if branded is not None and branded.fullmatch(first_line):
+        return document
+    title = next((line.lstrip("#").strip() for line in document.splitlines() if line.startswith("#")), "")
+    values = {"{{title}}": title, "{{date}}": datetime.date.today().isoformat()}
+    for key, value in values.items():
+        header, footer = header.replace(key, value), footer.replace(key, value)
+    return f"{header}{document}{footer}"
+
+
+def publish(document: str, template_path: Optional[str] = None) -> PublishResult:
+    """Normalize and brand a document, reporting what was fixed and what is left."""
+    normalized, fixes, issues = normalize_markdown(document)
+    return PublishResult(apply_branding(normalized, template_path), fixes, issues)
@@ -0,0 +1,143 @@
+"""Bounded shared memory for the DocGenTeam agents.
+
+Agent turns are stored per document. Each document has a byte budget: when it
+is exceeded the oldest turns are folded into a running summary, a local digest
+of the start of every turn, and only the most recent turns are kept verbatim. Only the most recently used documents are kept,
+so a process generating thousands of documents keeps a flat heap.
+
+    memory = TeamMemory(max_bytes=64_000, max_documents=16)
+    memory.save("doc-1", "Architect-Agent", text)
+    memory.context("doc-1")
+    memory.metrics()
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from DocGenCommon.settings import env_int
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+@dataclass
+class DocumentMemory:
+    """The turns and the summary of older turns of one document."""
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    summary: str = ""
+    bytes: int = 0
+
+
+class TeamMemory:
+    """Per-document agent memory with a byte budget and least recently used eviction."""
+
+    def __init__(self, max_bytes: int = 64_000, max_documents: int = 16, keep_recent: int = 2,
+                 digest_chars: int = 300):
+        """
+        Args:
+            max_bytes: Budget of one document's turns and summary, in UTF-8 bytes.
+            max_documents: Documents kept before the least recently used one is dropped.
+            keep_recent: Most recent turns never folded into the summary.
+            digest_chars: Characters of each old turn kept in the summary.
+        """
+        self.max_bytes = max_bytes
+        self.max_documents = max_documents
+        self.keep_recent = keep_recent
+        self.digest_chars = digest_chars
+        self._lock = threading.Lock()
+        self._documents: "OrderedDict[str, DocumentMemory]" = OrderedDict()
+        self._bytes = 0
+        self._peak_bytes = 0
+        self._counters = {"turns_saved": 0, "turns_summarized": 0, "turns_truncated": 0, "documents_evicted": 0}
+
+    def save(self, document_id: str, role: str, content: str):
+        """Record an agent turn for a document, compacting the document if it is over budget."""
+        # the recent turns kept verbatim may use half of the budget, the summary a quarter
+        limit = self.max_bytes // (2 * max(1, self.keep_recent))
+        truncated = _size(content) > limit
+        if truncated:
+            content = content.encode("utf-8")[:limit].decode("utf-8", "ignore") + "\n…[truncated]"
+        with self._lock:
+            memory = self._documents.pop(document_id, None) or DocumentMemory()
+            self._documents[document_id] = memory
+            memory.turns.append((role, content))
+            self._resize(memory, memory.bytes + _size(role) + _size(content))
+            self._counters["turns_saved"] += 1
+            self._counters["turns_truncated"] += truncated
+            while len(self._documents) > self.max_documents:
+                _, evicted = self._documents.popitem(last=False)
+                self._resize(evicted, 0)
+                self._counters["documents_evicted"] += 1
+        if memory.bytes > self.max_bytes:
+            self._compact(document_id)
+
+    def _resize(self, memory: DocumentMemory, size: int):
+        """Update a document's size and the totals, the caller holds the lock."""
+        self._bytes += size - memory.bytes
+        memory.bytes = size
+        self._peak_bytes = max(self._peak_bytes, self._bytes)
+
+    def _compact(self, document_id: str):
+        """Fold a document's oldest turns into its summary until it fits the budget."""
+        with self._lock:
+            memory = self._documents.get(document_id)
+            if memory is None or len(memory.turns) <= self.keep_recent:
+                return
+            old_turns = memory.turns[:-self.keep_recent] if self.keep_recent else list(memory.turns)
+            previous_summary = memory.summary
+        digest = "\n".join(f"- {role}: {' '.join(content.split())[:self.digest_chars]}" for role, content in old_turns)
+        summary = f"{previous_summary}\n{digest}".strip()
+        # keep the summary within a quarter of the budget, newest digests last
+        summary = summary.encode("utf-8")[-(self.max_bytes // 4):].decode("utf-8", "ignore")
+        with self._lock:
+            if self._documents.get(document_id) is not memory:
+                return
+            del memory.turns[:len(old_turns)]
+            memory.summary = summary
+            self._resize(memory, _size(summary) + sum(_size(role) + _size(content) for role, content in memory.turns))
+            self._counters["turns_summarized"] += len(old_turns)
+
+    def turns(self, document_id: str) -> List[Tuple[str, str]]:
+        """The (role, content) turns kept verbatim for a document."""
+        with self._lock:
+            memory = self._documents.get(document_id)
+            return list(memory.turns) if memory else []
+
+    def context(self, document_id: str) -> str:
+        """Summary of older turns followed by the recent turns, ready to add to a prompt."""
+        with self._lock:
+            memory = self._documents.get(document_id)
+            if memory is None:
+                return ""
+            parts = [f"Summary of earlier work:\n{memory.summary}"] if memory.summary else []
+            parts += [f"{role}:\n{content}" for role, content in memory.turns]
+        return "\n\n".join(parts)
+
+    def clear(self, document_id: str):
+        """Forget a document."""
+        with self._lock:
+            memory = self._documents.pop(document_id, None)
+            if memory is not None:
+                self._resize(memory, 0)
+
+    def metrics(self) -> Dict[str, int]:
+        """Memory size and activity counters."""
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "turns": sum(len(memory.turns) for memory in self._documents.values()),
+                "bytes": self._bytes,
+                "peak_bytes": self._peak_bytes,
+                "max_bytes_per_document": self.max_bytes,
+                **self._counters,
+            }
+
+
+def team_memory_from_env() -> TeamMemory:
+    """Build the team memory from DOCGENTEAM_MEMORY_MAX_KB (default 64) and DOCGENTEAM_MEMORY_MAX_DOCUMENTS (default 16)."""
+    return TeamMemory(
+        max_bytes=env_int("DOCGENTEAM_MEMORY_MAX_KB", 64) * 1024,
+        max_documents=env_int("DOCGENTEAM_MEMORY_MAX_DOCUMENTS", 16),
+    )
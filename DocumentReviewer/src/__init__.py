@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the shared DocGenCommon package (repository root) importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
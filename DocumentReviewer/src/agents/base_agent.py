@@ -1,9 +1,17 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from src.core.document_processor import Document
+from src.core.document_processor import Document, DocumentProcessor
+from src.core.retrieval import BM25Index, focus_query, route_chunks
+from DocGenCommon.clients import get_chat_model
+from DocGenCommon.prompt_layout import shared_prefix_enabled, shared_prefix_messages
+from DocGenCommon.scheduler import estimate_tokens
+
+# Identical for every agent so the preamble and the document form a prompt prefix
+# the provider can cache once and reuse for the other agents
+REVIEW_PREAMBLE = """You are one of several architects reviewing the same document, each from their own perspective.
+The document is provided first. Your role, focus areas and the review request follow after it."""
 
 class AgentResponse(BaseModel):
     """Structured response from an agent's review."""
@@ -12,6 +20,8 @@ class AgentResponse(BaseModel):
     recommendations: list[str]
     risk_level: str
     confidence_score: float
+    # Chunks reviewed when the document was routed, for auditing coverage
+    routing: Optional[Dict[str, Any]] = None
 
 class BaseArchitectAgent:
     """Base class for all architect agents in the system."""
@@ -19,40 +29,129 @@ class BaseArchitectAgent:
     def __init__(self, name: str, system_prompt: str):
         self.name = name
         self.system_prompt = system_prompt
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"),
+        # Agents with the same settings share one pooled, scheduled client
+        self.llm = get_chat_model(
+            "openai",
+            os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"),
             temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000"))
+            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000")),
+            cache_pipeline="DOCUMENT_REVIEWER"
         )
+        # Documents above this estimate are reviewed in chunks of chunk_tokens
+        self.max_document_tokens = int(os.getenv("REVIEW_MAX_DOCUMENT_TOKENS", "24000"))
+        self.chunk_tokens = int(os.getenv("REVIEW_CHUNK_TOKENS", "8000"))
+        self.chunk_concurrency = int(os.getenv("REVIEW_CHUNK_CONCURRENCY", "4"))
+        # Number of chunks routed to this agent, 0 to review the whole document
+        self.routing_top_k = int(os.getenv("REVIEW_ROUTING_TOP_K", "0"))
         
-    def analyze_document(self, document: Document) -> AgentResponse:
+    def analyze_document(self, document: Document, index: Optional[BM25Index] = None) -> AgentResponse:
         """
         Analyze the document and return structured findings.
         
+        Documents estimated above REVIEW_MAX_DOCUMENT_TOKENS are reviewed in
+        chunks and the chunk reviews reduced into one (see _review_chunked).
+        
         Args:
             document: The Document object containing the content to analyze.
+            index: Chunk index of the document. When given and REVIEW_ROUTING_TOP_K
+                is set, only the chunks most relevant to this agent's focus are reviewed.
             
         Returns:
             AgentResponse containing the analysis results.
         """
         print(f"Analyzing document with {self.name} agent...")
-        messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"Please analyze the following document from your perspective as {self.name}:\n\n{document.content}")
-        ]
-        
-        response = self.llm.invoke(messages)
+        routing = None
+        if index is not None and 0 < self.routing_top_k < len(index.chunks) - 1:
+            document, routing = self._route(document, index)
+        if estimate_tokens(document.content) > self.max_document_tokens:
+            content = self._review_chunked(document)
+        else:
+            content = self.llm.invoke(self._review_messages("Document to review", document.content)).content
         
         # Process the response into structured format
         # This is a simplified version - in practice, you'd want to prompt
         # the LLM to return structured data that can be easily parsed
         return AgentResponse(
             agent_name=self.name,
-            findings=self._extract_findings(response.content),
-            recommendations=self._extract_recommendations(response.content),
-            risk_level=self._assess_risk_level(response.content),
-            confidence_score=0.85  # This would be dynamically calculated in practice
+            findings=self._extract_findings(content),
+            recommendations=self._extract_recommendations(content),
+            risk_level=self._assess_risk_level(content),
+            confidence_score=0.85,  # This would be dynamically calculated in practice
+            routing=routing
         )
+
+    def _route(self, document: Document, index: BM25Index):
+        """Keep the chunks relevant to this agent's focus list, returns the routed document and the audit record."""
+        routed = route_chunks(index, focus_query(self.system_prompt), self.routing_top_k)
+        audit = routed["audit"]
+        print(f"{self.name}: routed {len(audit['selected'])}/{audit['total_chunks']} chunks, "
+              f"{audit['selected_tokens']}/{audit['total_tokens']} tokens: "
+              + ", ".join(f"{item['chunk']}: {item['label']} ({item['score']})" for item in audit["selected"]))
+        content = "\n\n".join(f"[{chunk.label}]\n{chunk.text}" for chunk in routed["chunks"])
+        return document.model_copy(update={"content": content, "sections": []}), audit
+
+    def _review_messages(self, title: str, text: str, note: str = "") -> list:
+        """Messages asking this agent to review a document, or a part of it described by the note."""
+        if shared_prefix_enabled():
+            return shared_prefix_messages(
+                REVIEW_PREAMBLE,
+                f"{title}:\n\n{text}",
+                f"{self.system_prompt}\n\nPlease analyze the document above from your perspective as {self.name}.{note}"
+            )
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=f"Please analyze the following document from your perspective as {self.name}:{note}\n\n{text}")
+        ]
+
+    def _review_chunked(self, document: Document) -> str:
+        """
+        Map-reduce review of a large document.
+
+        The document is split on its structure into chunks of REVIEW_CHUNK_TOKENS,
+        the chunks are reviewed concurrently and the chunk reviews are merged
+        into a single review.
+        """
+        chunks = DocumentProcessor.chunk_document(document, self.chunk_tokens)
+        print(f"{self.name}: reviewing {len(chunks)} chunks of up to {self.chunk_tokens} tokens")
+        note = " It is one part of a larger document, the other parts are reviewed separately: report what this part shows."
+        requests = [
+            self._review_messages(f"Document to review, part {chunk.index + 1} of {len(chunks)} ({chunk.label})",
+                                  chunk.text, note)
+            for chunk in chunks
+        ]
+        responses = self.llm.batch(requests, config={"max_concurrency": self.chunk_concurrency})
+        reviews = [f"### Part {chunk.index + 1} ({chunk.label})\n{response.content}"
+                   for chunk, response in zip(chunks, responses)]
+        return self._reduce_reviews(reviews)
+
+    def _reduce_reviews(self, reviews: list) -> str:
+        """Merge chunk reviews into one review, in several levels if they do not fit one request."""
+        if len(reviews) == 1:
+            return reviews[0]
+        groups, current = [], []
+        for review in reviews:
+            if current and estimate_tokens(current + [review]) > self.chunk_tokens:
+                groups.append(current)
+                current = []
+            current.append(review)
+        groups.append(current)
+        if all(len(group) == 1 for group in groups):
+            # every review fills a request on its own, merge them in pairs to make progress
+            groups = [reviews[i:i + 2] for i in range(0, len(reviews), 2)]
+        requests = [
+            [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=(
+                    f"Below are your reviews, as {self.name}, of consecutive parts of one document. "
+                    "Merge them into a single review of the whole document: remove duplicates, keep the most "
+                    "important findings and recommendations, and give one overall risk assessment.\n\n"
+                    + "\n\n".join(group)
+                ))
+            ]
+            for group in groups
+        ]
+        merged = [response.content for response in self.llm.batch(requests, config={"max_concurrency": self.chunk_concurrency})]
+        return merged[0] if len(merged) == 1 else self._reduce_reviews(merged)
     
     def _extract_findings(self, response: str) -> list[str]:
         """Extract key findings from the LLM response."""
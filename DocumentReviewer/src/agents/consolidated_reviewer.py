@@ -0,0 +1,80 @@
+from typing import Dict, List, Literal
+import os
+from pydantic import BaseModel, Field
+from langchain_core.messages import HumanMessage, SystemMessage
+from src.core.document_processor import Document
+from src.agents.base_agent import AgentResponse, BaseArchitectAgent, REVIEW_PREAMBLE
+from DocGenCommon.clients import get_chat_model
+from DocGenCommon.prompt_layout import shared_prefix_enabled, shared_prefix_messages
+
+class PerspectiveReview(BaseModel):
+    """The review of the document from one architect's perspective."""
+    perspective: str = Field(description="Name of the architect perspective, exactly as listed")
+    findings: List[str] = Field(description="Specific findings about the document from this perspective")
+    recommendations: List[str] = Field(description="Actionable recommendations from this perspective")
+    risk_level: Literal["LOW", "MEDIUM", "HIGH"] = Field(description="Risk of the design from this perspective")
+    confidence_score: float = Field(ge=0, le=1, description="Confidence in this review, from 0 to 1")
+
+class ConsolidatedReview(BaseModel):
+    """The reviews of the document from every requested perspective."""
+    reviews: List[PerspectiveReview]
+
+class ConsolidatedReviewer:
+    """
+    Reviews a document from every agent's perspective in one structured-output call,
+    so the document is sent once instead of once per agent.
+    """
+
+    def __init__(self, agents: List[BaseArchitectAgent]):
+        self.agents = agents
+        self.llm = get_chat_model(
+            "openai",
+            os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"),
+            temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
+            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000")),
+            cache_pipeline="DOCUMENT_REVIEWER"
+        # function calling works with every tool-calling model, json_schema (the default)
+        # is rejected by older ones such as the default gpt-4-turbo-preview
+        ).with_structured_output(ConsolidatedReview, method="function_calling")
+
+    def _messages(self, document: Document) -> list:
+        """One request listing every perspective's role and focus, after the document."""
+        perspectives = "\n\n".join(f"### {agent.name}\n{agent.system_prompt}" for agent in self.agents)
+        instructions = (
+            f"Review the document above from each of the following {len(self.agents)} perspectives, "
+            "one review per perspective, named exactly as in its heading. Findings and recommendations "
+            f"must be specific to the document.\n\n{perspectives}"
+        )
+        if shared_prefix_enabled():
+            return shared_prefix_messages(REVIEW_PREAMBLE, f"Document to review:\n\n{document.content}", instructions)
+        return [
+            SystemMessage(content="You are a panel of architects reviewing a document, each from their own perspective."),
+            HumanMessage(content=f"{instructions}\n\nDocument to review:\n\n{document.content}")
+        ]
+
+    def analyze_document(self, document: Document) -> Dict[str, AgentResponse]:
+        """
+        Review the document from every perspective at once.
+
+        Args:
+            document: The Document object containing the content to analyze.
+
+        Returns:
+            The AgentResponse of every perspective the model returned, by agent name.
+            Perspectives missing from the answer are left out, for the caller to review separately.
+        """
+        print(f"Analyzing document with {len(self.agents)} perspectives in one call...")
+        result = self.llm.invoke(self._messages(document))
+        names = {agent.name.lower(): agent.name for agent in self.agents}
+        responses = {}
+        for review in result.reviews:
+            name = names.get(review.perspective.strip().lower())
+            if name is not None and name not in responses:
+                responses[name] = AgentResponse(
+                    agent_name=name,
+                    findings=review.findings,
+                    recommendations=review.recommendations,
+                    risk_level=review.risk_level,
+                    confidence_score=review.confidence_score
+                )
+        return responses
@@ -0,0 +1,162 @@
+import glob
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, IO, List, Optional
+
+from src.core.orchestrator import DocumentReviewOrchestrator
+from src.core.dedup import MinHashDeduplicator, dedup_items
+from DocGenCommon.clients import get_registry
+from DocGenCommon.scheduler import get_scheduler
+from DocGenCommon.usage import UsageTracker
+
+SUPPORTED_TYPES = ('.pdf', '.docx')
+
+def collect_documents(patterns: List[str]) -> List[str]:
+    """
+    Expand files, directories (searched recursively) and glob patterns into the
+    supported documents they contain, without duplicates.
+
+    Args:
+        patterns: Paths, directories or glob patterns such as docs/**/*.pdf
+
+    Returns:
+        Absolute paths of the PDF and DOCX documents, sorted within each pattern.
+    """
+    documents = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = [str(match) for match in path.rglob("*")]
+        elif path.exists():
+            matches = [pattern]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        for match in sorted(matches):
+            match_path = Path(match)
+            # skip Word lock files such as ~$design.docx
+            if match_path.is_file() and match_path.suffix.lower() in SUPPORTED_TYPES and not match_path.name.startswith("~$"):
+                documents.append(str(match_path.absolute()))
+    return list(dict.fromkeys(documents))
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values, 0 when it is empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def document_run_id(batch_run_id: str, file_path: str) -> str:
+    """Run ID of a document's review within a batch run, the same whatever the order of the documents."""
+    return f"{batch_run_id}:{hashlib.sha256(file_path.encode('utf-8')).hexdigest()[:12]}"
+
+def review_one(orchestrator: DocumentReviewOrchestrator, file_path: str, run_id: Optional[str] = None) -> Dict:
+    """Review, or resume the review of, one document and return its JSON Lines record, failures included."""
+    usage = UsageTracker()
+    start = time.perf_counter()
+    record = {"type": "document", "document": file_path}
+    if run_id:
+        record["run_id"] = run_id
+    try:
+        record["report"] = orchestrator.review_document(file_path, callbacks=[usage], run_id=run_id)
+        record["status"] = "ok"
+        record["overall_risk_level"] = record["report"]["overall_risk_level"]
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    record["usage"] = usage.snapshot()
+    return record
+
+def recurring_findings(orchestrator: DocumentReviewOrchestrator, records: List[Dict], limit: int = 50) -> List[Dict]:
+    """Findings raised, in near-duplicate forms, for more than one document of the batch, most widespread first."""
+    items = [
+        {"text": text, "agent": agent_name, "document": record["document"]}
+        for record in records if record["status"] == "ok"
+        for agent_name, review in record["report"]["reviews_by_agent"].items()
+        for text in review["findings"]
+    ]
+    clusters = [cluster for cluster in dedup_items(items, orchestrator.deduplicator or MinHashDeduplicator())
+                if len(cluster.documents) > 1]
+    clusters.sort(key=lambda cluster: len(cluster.documents), reverse=True)
+    return [cluster.model_dump() for cluster in clusters[:limit]]
+
+def review_batch(orchestrator: DocumentReviewOrchestrator, documents: List[str], output: IO,
+                 concurrency: int = 4, run_id: Optional[str] = None) -> Dict:
+    """
+    Review documents concurrently with one orchestrator.
+
+    A JSON Lines record is written to output as soon as each document is reviewed,
+    and a summary record after the last one. LLM calls of all documents share the
+    global scheduler's concurrency cap (DOCGEN_LLM_MAX_CONCURRENCY), and the
+    CPUs extracting large PDFs are shared between the documents. Running a
+    batch again with the same run ID resumes the reviews that failed and returns
+    the saved reports of the ones that completed.
+
+    Args:
+        orchestrator: The orchestrator shared by all reviews
+        documents: Paths of the documents to review
+        output: Text stream receiving the JSON Lines records
+        concurrency: Number of documents reviewed at the same time
+        run_id: ID of the batch run, each document is reviewed under a run ID derived from it
+
+    Returns:
+        The batch summary: throughput, per-document latency percentiles, failures
+        and the findings recurring across documents
+    """
+    write_lock = threading.Lock()
+    records = []
+    # every document loaded at the same time gets its share of the PDF extraction workers
+    processor = orchestrator.document_processor
+    pdf_workers = processor.pdf_workers
+    cpus = pdf_workers or int(os.getenv("REVIEW_PDF_WORKERS", "0")) or os.cpu_count() or 1
+    processor.pdf_workers = max(1, cpus // max(1, concurrency))
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = [executor.submit(review_one, orchestrator, document,
+                                       document_run_id(run_id, document) if run_id else None)
+                       for document in documents]
+            for future in as_completed(futures):
+                record = future.result()
+                records.append(record)
+                with write_lock:
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+                detail = record.get("overall_risk_level") or record.get("error")
+                print(f"[{len(records)}/{len(documents)}] {record['status']} {record['document']} "
+                      f"in {record['seconds']}s: {detail}")
+    finally:
+        processor.pdf_workers = pdf_workers
+    wall_time = time.perf_counter() - start
+
+    latencies = [record["seconds"] for record in records]
+    succeeded = [record for record in records if record["status"] == "ok"]
+    summary = {
+        "type": "summary",
+        "documents": len(records),
+        "succeeded": len(succeeded),
+        "failed": len(records) - len(succeeded),
+        "concurrency": concurrency,
+        "run_id": run_id,
+        "wall_time_s": round(wall_time, 2),
+        "documents_per_minute": round(len(records) / wall_time * 60, 2) if wall_time else 0.0,
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_max_s": max(latencies, default=0.0),
+        "failures": [{"document": record["document"], "error": record["error"]}
+                     for record in records if record["status"] != "ok"],
+        "recurring_findings": recurring_findings(orchestrator, records),
+        "usage": orchestrator.usage.snapshot(),
+        "scheduler": get_scheduler().metrics(),
+        "connections": get_registry().connection_stats(),
+    }
+    with write_lock:
+        output.write(json.dumps(summary) + "\n")
+        output.flush()
+    return summary
@@ -0,0 +1,171 @@
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+# MinHash functions are multiply-shift hashes (a * x + b) >> 32 of the 32-bit shingle
+# hashes, a * x wrapping around 64 bits: cheaper than a modulo with the same spread
+_SHIFT = np.uint64(32)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+class FindingCluster(BaseModel):
+    """Near-duplicate findings merged into one, with where they came from."""
+    text: str
+    agents: List[str]
+    documents: List[str] = []
+    variants: List[str] = []
+    count: int
+
+def normalize(text: str) -> str:
+    """Lowercase words of a text, punctuation and spacing dropped."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+def _shingle_hashes(text: str, size: int) -> np.ndarray:
+    """Stable 32-bit hashes of the character n-grams of a normalized text."""
+    normalized = normalize(text)
+    if len(normalized) <= size:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+def _jaccard(left: np.ndarray, right: np.ndarray) -> float:
+    """Jaccard similarity of two sets of shingle hashes."""
+    shared = len(np.intersect1d(left, right))
+    return shared / (len(left) + len(right) - shared)
+
+class MinHashDeduplicator:
+    """
+    Clusters near-duplicate texts with MinHash signatures and LSH banding.
+
+    Texts whose signatures agree on every row of at least one band become candidates,
+    and candidates are merged when their estimated Jaccard similarity reaches the
+    threshold, checked exactly on their shingles, so the work grows with the number of
+    texts rather than with the number of pairs. Everything runs locally with NumPy.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: int = 32, shingle_size: int = 4,
+                 seed: int = 1):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity of the shingles above which two texts are duplicates.
+                Short findings differing by one word ("not encrypted at rest" / "in transit",
+                "no rate limiting" / "rate limiting") already score 0.6 to 0.85, keep it high.
+            num_perm: Hash functions of a signature, a multiple of bands.
+            bands: LSH bands, more bands find less similar candidates.
+            shingle_size: Characters of a shingle.
+            seed: Seed of the hash functions, clusters are reproducible for a given seed.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        # one random multiplier per row to fold a band into a bucket key
+        self._band_mix = rng.integers(1, 1 << 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, texts: Sequence[str], block_shingles: int = 1 << 16) -> np.ndarray:
+        """MinHash signature of every text, an array of shape (len(texts), num_perm)."""
+        return self._signatures([_shingle_hashes(text, self.shingle_size) for text in texts], block_shingles)
+
+    def _signatures(self, shingles: List[np.ndarray], block_shingles: int = 1 << 16) -> np.ndarray:
+        """MinHash signatures of the shingle hashes of every text."""
+        result = np.empty((len(shingles), self.num_perm), dtype=np.uint64)
+        start = 0
+        while start < len(shingles):
+            # a block of texts with about block_shingles shingles, hashed by all functions at once
+            end, size = start, 0
+            while end < len(shingles) and (end == start or size + len(shingles[end]) <= block_shingles):
+                size += len(shingles[end])
+                end += 1
+            hashes = np.concatenate(shingles[start:end])
+            offsets = np.cumsum([0] + [len(item) for item in shingles[start:end - 1]])
+            values = (np.outer(self._a, hashes) + self._b[:, None]) >> _SHIFT
+            # the minimum of every function over each text's shingles
+            result[start:end] = np.minimum.reduceat(values, offsets, axis=1).T
+            start = end
+        return result
+
+    def clusters(self, texts: Sequence[str]) -> List[List[int]]:
+        """Indexes of the texts grouped into near-duplicate clusters, in order of first appearance."""
+        if not texts:
+            return []
+        shingles = [_shingle_hashes(text, self.shingle_size) for text in texts]
+        signatures = self._signatures(shingles)
+        firsts, members = [], []
+        for band in range(self.bands):
+            rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            keys = (rows * self._band_mix).sum(axis=1)  # wraps around, a hash of the band
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            # pair every text with the first text of its bucket: linear in the bucket size
+            new_bucket = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+            first = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+            paired = first != order
+            firsts.append(first[paired])
+            members.append(order[paired])
+        pairs = np.unique(np.stack([np.concatenate(firsts), np.concatenate(members)], axis=1), axis=0)
+        # candidates whose signatures are close to the threshold are compared exactly: the
+        # estimate is off by a few hundredths, enough to merge one-word variants at a high threshold
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        pairs = pairs[similarity >= self.threshold - 0.15]
+        pairs = [(left, right) for left, right in pairs.tolist()
+                 if _jaccard(shingles[left], shingles[right]) >= self.threshold]
+
+        parent = list(range(len(texts)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for left, right in pairs:
+            left, right = find(left), find(right)
+            if left != right:
+                parent[max(left, right)] = min(left, right)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(texts)):
+            groups.setdefault(find(i), []).append(i)
+        return sorted(groups.values(), key=lambda group: group[0])
+
+def dedup_items(items: List[Dict[str, Any]], deduplicator: Optional[MinHashDeduplicator] = None) -> List[FindingCluster]:
+    """
+    Merge near-duplicate findings or recommendations.
+
+    Args:
+        items: {"text", "agent"} dicts, optionally with a "document".
+        deduplicator: Defaults to a MinHashDeduplicator with its default settings.
+
+    Returns:
+        One cluster per distinct finding, in order of first appearance. The longest
+        variant is kept as the text, the agents and documents that raised it as provenance,
+        and the variants worded differently from it, which may still say something else.
+    """
+    deduplicator = deduplicator or MinHashDeduplicator()
+    clusters = []
+    for group in deduplicator.clusters([item["text"] for item in items]):
+        members = [items[i] for i in group]
+        variants = list(dict.fromkeys(member["text"] for member in members))
+        text = max(variants, key=len)
+        # variants differing from the kept text, or from an earlier variant, only by case or punctuation are dropped
+        distinct = {}
+        for variant in variants:
+            if normalize(variant) != normalize(text):
+                distinct.setdefault(normalize(variant), variant)
+        clusters.append(FindingCluster(
+            text=text,
+            agents=list(dict.fromkeys(member["agent"] for member in members)),
+            documents=list(dict.fromkeys(member["document"] for member in members if member.get("document"))),
+            variants=list(distinct.values()),
+            count=len(members)
+        ))
+    return clusters
@@ -1,8 +1,23 @@
 from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import multiprocessing
+import os
+import re
+import threading
 import docx
 from pypdf import PdfReader
 from pydantic import BaseModel
+from DocGenCommon.extraction_cache import cached_extraction
+from DocGenCommon.scheduler import estimate_tokens
+
+# Bump when the extracted content or sections change, so cached extractions are not reused
+EXTRACTOR_VERSION = "1"
+
+class DocumentSection(BaseModel):
+    """A structural unit of a document: a page of a PDF or a heading and its text in a DOCX."""
+    label: str
+    text: str
 
 class Document(BaseModel):
     """Represents a processed document with its content and metadata."""
@@ -10,12 +25,37 @@ class Document(BaseModel):
     file_path: str
     file_type: str
     metadata: Dict = {}
+    # Structure used to split large documents, pages for PDF and headings for DOCX
+    sections: List[DocumentSection] = []
+
+class DocumentChunk(BaseModel):
+    """A token-budgeted part of a document, made of whole sections where possible."""
+    index: int
+    label: str
+    text: str
+    tokens: int
+    # Hash of the normalized text, set for content-defined chunks (see src.core.incremental)
+    digest: str = ""
+
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of a PDF, run in a worker process with its own reader."""
+    reader = PdfReader(file_path)
+    return [reader.pages[number].extract_text() for number in range(start, stop)]
 
 class DocumentProcessor:
     """Handles document loading and processing for different file types."""
-    
-    @staticmethod
-    def load_document(file_path: str) -> Document:
+
+    def __init__(self, pdf_workers: Optional[int] = None):
+        """
+        Args:
+            pdf_workers: Worker processes extracting a large PDF, see extract_pdf_pages.
+                Lowered when several documents are loaded at the same time.
+        """
+        self.pdf_workers = pdf_workers
+
+    def load_document(self, file_path: str) -> Document:
         """
         Load a document from a file path and return a Document object.
         Supports PDF and DOCX formats.
@@ -23,22 +63,178 @@ class DocumentProcessor:
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
-            
+
         file_type = path.suffix.lower()
-        content = ""
-        
-        if file_type == '.pdf':
-            reader = PdfReader(file_path)
-            content = "\n".join(page.extract_text() for page in reader.pages)
-        elif file_type == '.docx':
-            doc = docx.Document(file_path)
-            content = "\n".join(paragraph.text for paragraph in doc.paragraphs)
-        else:
+        if file_type not in ('.pdf', '.docx'):
             raise ValueError(f"Unsupported file type: {file_type}")
-            
+
+        # unchanged files are read from the extraction cache instead of being parsed again
+        extraction = cached_extraction(path, "document_reviewer", EXTRACTOR_VERSION,
+                                       lambda: DocumentProcessor._extract(str(path), file_type, self.pdf_workers))
         return Document(
-            content=content,
+            content=extraction["content"],
             file_path=str(path),
             file_type=file_type,
-            metadata={"page_count": len(reader.pages) if file_type == '.pdf' else len(doc.paragraphs)}
-        ) 
\ No newline at end of file
+            metadata=extraction["metadata"],
+            sections=[DocumentSection(**section) for section in extraction["sections"]]
+        )
+
+    @staticmethod
+    def _extract(file_path: str, file_type: str, pdf_workers: Optional[int] = None) -> Dict:
+        """Parse a PDF or DOCX file into its content, metadata and sections, as plain data."""
+        if file_type == '.pdf':
+            pages = DocumentProcessor.extract_pdf_pages(file_path, workers=pdf_workers)
+            content = "\n".join(pages)
+            sections = [DocumentSection(label=f"page {number}", text=text) for number, text in enumerate(pages, 1)]
+            metadata = {"page_count": len(pages)}
+        else:
+            doc = docx.Document(file_path)
+            content = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+            sections = DocumentProcessor._docx_sections(doc)
+            metadata = {"page_count": len(doc.paragraphs)}
+        return {
+            "content": content,
+            "metadata": metadata,
+            "sections": [section.model_dump() for section in sections],
+        }
+
+    @staticmethod
+    def extract_pdf_pages(file_path: str, workers: Optional[int] = None, min_pages: Optional[int] = None) -> List[str]:
+        """
+        Extract the text of every page of a PDF, in page order.
+
+        PDFs of at least min_pages pages are split into page ranges extracted by a
+        pool of worker processes, smaller ones are extracted in this process.
+
+        Args:
+            file_path: Path of the PDF.
+            workers: Worker processes, defaults to REVIEW_PDF_WORKERS or the CPU count. 1 extracts serially.
+            min_pages: Smallest PDF extracted in parallel, defaults to REVIEW_PDF_PARALLEL_MIN_PAGES (32).
+
+        Returns:
+            The text of each page.
+        """
+        workers = workers or int(os.getenv("REVIEW_PDF_WORKERS", "0")) or os.cpu_count() or 1
+        min_pages = min_pages or int(os.getenv("REVIEW_PDF_PARALLEL_MIN_PAGES", "32"))
+        reader = PdfReader(file_path)
+        page_count = len(reader.pages)
+        if workers <= 1 or page_count < min_pages:
+            return [page.extract_text() for page in reader.pages]
+
+        # a few ranges per worker so a slow range (scanned or dense pages) does not hold up the rest
+        size = max(1, -(-page_count // (workers * 4)))
+        ranges = [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+        # forking a process that runs other threads can copy a lock they hold, start clean workers then
+        context = multiprocessing.get_context("spawn") if threading.active_count() > 1 else None
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as pool:
+            parts = pool.map(_extract_page_range, [file_path] * len(ranges),
+                             [start for start, _ in ranges], [stop for _, stop in ranges])
+            return [text for part in parts for text in part]
+
+    @staticmethod
+    def _docx_sections(doc) -> List[DocumentSection]:
+        """Group DOCX paragraphs under the heading (Heading N or Title style) they follow."""
+        sections, label, lines = [], "start", []
+        for paragraph in doc.paragraphs:
+            style = paragraph.style.name if paragraph.style is not None else ""
+            if style.startswith("Heading") or style == "Title":
+                if any(line.strip() for line in lines):
+                    sections.append(DocumentSection(label=label, text="\n".join(lines)))
+                label, lines = f"section '{paragraph.text.strip()}'", []
+            lines.append(paragraph.text)
+        if any(line.strip() for line in lines):
+            sections.append(DocumentSection(label=label, text="\n".join(lines)))
+        return sections
+
+    @staticmethod
+    def chunk_document(document: Document, max_tokens: int) -> List[DocumentChunk]:
+        """
+        Split a document into chunks of at most max_tokens (estimated) tokens.
+
+        Whole sections (pages or headings) are packed together; a section larger
+        than the budget is split on paragraphs, then on lines, then on characters.
+        Documents without structure are split on markdown headings or blank lines.
+
+        Args:
+            document: The document to split.
+            max_tokens: Token budget of a chunk.
+
+        Returns:
+            The chunks in document order.
+        """
+        sections = document.sections or DocumentProcessor._text_sections(document.content)
+        units = []
+        for section in sections:
+            for text in DocumentProcessor._split_to_budget(section.text, max_tokens):
+                units.append((section.label, text))
+
+        chunks, labels, texts, tokens = [], [], [], 0
+        def flush():
+            if texts:
+                label = labels[0] if labels[0] == labels[-1] else f"{labels[0]} to {labels[-1]}"
+                text = "\n\n".join(texts)
+                chunks.append(DocumentChunk(index=len(chunks), label=label, text=text, tokens=estimate_tokens(text)))
+                labels.clear()
+                texts.clear()
+        for label, text in units:
+            unit_tokens = estimate_tokens(text)
+            if texts and tokens + unit_tokens > max_tokens:
+                flush()
+                tokens = 0
+            labels.append(label)
+            texts.append(text)
+            tokens += unit_tokens
+        flush()
+        return chunks
+
+    def build_index(self, document: Document, chunk_tokens: int):
+        """
+        Build the local BM25 index used to route chunks to agents, once per document.
+
+        Args:
+            document: The document to index.
+            chunk_tokens: Token budget of the indexed chunks.
+        """
+        from src.core.retrieval import BM25Index
+        return BM25Index(self.chunk_document(document, chunk_tokens))
+
+    @staticmethod
+    def _text_sections(content: str) -> List[DocumentSection]:
+        """Sections of unstructured text, at markdown headings or else at blank lines."""
+        lines = content.splitlines()
+        if any(MARKDOWN_HEADING_RE.match(line) for line in lines):
+            sections, label, current = [], "start", []
+            for line in lines:
+                if MARKDOWN_HEADING_RE.match(line):
+                    if any(text.strip() for text in current):
+                        sections.append(DocumentSection(label=label, text="\n".join(current)))
+                    label, current = f"section '{line.lstrip('#').strip()}'", []
+                current.append(line)
+            if any(text.strip() for text in current):
+                sections.append(DocumentSection(label=label, text="\n".join(current)))
+            return sections
+        paragraphs = [paragraph for paragraph in re.split(r"\n\s*\n", content) if paragraph.strip()]
+        return [DocumentSection(label=f"paragraph {number}", text=text) for number, text in enumerate(paragraphs, 1)]
+
+    @staticmethod
+    def _split_to_budget(text: str, max_tokens: int, separators=("\n\n", "\n")) -> List[str]:
+        """Split text that is over the token budget on paragraphs, then lines, then characters."""
+        if estimate_tokens(text) <= max_tokens:
+            return [text]
+        if not separators:
+            size = max(1, max_tokens - 1) * 4
+            return [text[start:start + size] for start in range(0, len(text), size)]
+        # split oversized pieces further, then pack the pieces back up to the budget
+        pieces = [small for piece in text.split(separators[0])
+                  for small in DocumentProcessor._split_to_budget(piece, max_tokens, separators[1:])]
+        parts, current = [], ""
+        for piece in pieces:
+            candidate = f"{current}{separators[0]}{piece}" if current else piece
+            if current and estimate_tokens(candidate) > max_tokens:
+                parts.append(current)
+                current = piece
+            else:
+                current = candidate
+        if current:
+            parts.append(current)
+        return parts
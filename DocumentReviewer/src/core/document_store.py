@@ -0,0 +1,67 @@
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from src.core.document_processor import Document
+
+class DocumentStore:
+    """
+    Holds the documents under review so the workflow state only carries their ID.
+
+    Every agent reads the same Document object, so the text exists once however
+    many agents, copies or checkpoints of the state there are. A document added
+    again while it is still under review (the same file reviewed concurrently)
+    is shared too, and is dropped when its last review releases it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def document_id(document: Document) -> str:
+        """ID of a document: a hash of its path and content."""
+        digest = hashlib.sha256(document.file_path.encode("utf-8"))
+        digest.update(b"\0")
+        # hashed in slices so a large document is not copied whole into bytes
+        for start in range(0, len(document.content), 1 << 16):
+            digest.update(document.content[start:start + (1 << 16)].encode("utf-8"))
+        return digest.hexdigest()[:24]
+
+    def put(self, document: Document, index: Any = None) -> str:
+        """
+        Add a document, and optionally its routing index, for the duration of a review.
+
+        Returns:
+            The ID to put in the workflow state, to be released once the review is over.
+        """
+        document_id = self.document_id(document)
+        with self._lock:
+            entry = self._entries.setdefault(document_id, {"document": document, "index": None, "references": 0})
+            entry["references"] += 1
+            if index is not None:
+                entry["index"] = index
+        return document_id
+
+    def get(self, document_id: str) -> Document:
+        """The document of an ID, KeyError once it has been released."""
+        with self._lock:
+            return self._entries[document_id]["document"]
+
+    def index(self, document_id: str) -> Optional[Any]:
+        """The routing index stored with a document, if any."""
+        with self._lock:
+            return self._entries[document_id]["index"]
+
+    def release(self, document_id: str):
+        """End one review of a document, dropping it after the last one."""
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is not None:
+                entry["references"] -= 1
+                if entry["references"] <= 0:
+                    del self._entries[document_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,206 @@
+import hashlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.core.document_processor import Document, DocumentChunk, DocumentSection
+from src.core.retrieval import BM25Index, tokenize
+from DocGenCommon.scheduler import estimate_tokens
+
+def _normalize(text: str) -> str:
+    """Text with whitespace collapsed, so re-extraction spacing does not change a hash."""
+    return " ".join(text.split())
+
+def chunk_hash(text: str) -> str:
+    """Hash of a chunk's normalized text."""
+    return hashlib.sha256(_normalize(text).encode("utf-8")).hexdigest()[:16]
+
+def content_defined_chunks(document: Document, target_tokens: int = 800) -> List[DocumentChunk]:
+    """
+    Split a document into chunks whose boundaries depend only on the lines around them.
+
+    A chunk ends after a line whose own hash is divisible by a fixed divisor (about one
+    line in target_tokens / 12), once the chunk has a quarter of target_tokens, or when it
+    reaches four times target_tokens. Inserting or editing a paragraph therefore only
+    changes the chunks around it, the chunks after the next boundary hash the same.
+
+    Args:
+        document: The document to split.
+        target_tokens: Average chunk size, in estimated tokens.
+
+    Returns:
+        The chunks in document order, their hash in the digest field.
+    """
+    divisor = max(2, target_tokens // 12)
+    min_tokens, max_tokens = target_tokens // 4, target_tokens * 4
+    sections = document.sections or [DocumentSection(label="start", text=document.content)]
+    chunks, lines, labels, tokens = [], [], [], 0
+
+    def flush():
+        if lines:
+            text = "\n".join(lines)
+            label = labels[0] if labels[0] == labels[-1] else f"{labels[0]} to {labels[-1]}"
+            chunks.append(DocumentChunk(index=len(chunks), label=label, text=text,
+                                        tokens=estimate_tokens(text), digest=chunk_hash(text)))
+            lines.clear()
+            labels.clear()
+
+    for section in sections:
+        for line in section.text.splitlines():
+            if not line.strip():
+                continue
+            lines.append(line)
+            labels.append(section.label)
+            tokens += estimate_tokens(line)
+            natural = int(hashlib.sha1(_normalize(line).encode("utf-8")).hexdigest()[:8], 16) % divisor == 0
+            if (natural and tokens >= min_tokens) or tokens >= max_tokens:
+                flush()
+                tokens = 0
+    flush()
+    return chunks
+
+def fingerprints(chunks: List[DocumentChunk]) -> List[Dict[str, Any]]:
+    """The chunk hashes saved in a report, to diff the next revision against."""
+    return [{"hash": chunk.digest, "label": chunk.label, "tokens": chunk.tokens} for chunk in chunks]
+
+def diff_chunks(previous_hashes: List[str], chunks: List[DocumentChunk]) -> Tuple[List[DocumentChunk], Set[str], Set[str]]:
+    """
+    Compare a revision's chunks with the previous revision's hashes.
+
+    Returns:
+        The changed (new or edited) chunks, the hashes of the unchanged chunks
+        and the hashes of the chunks that were removed or edited.
+    """
+    previous = set(previous_hashes)
+    current = {chunk.digest for chunk in chunks}
+    changed = [chunk for chunk in chunks if chunk.digest not in previous]
+    return changed, current & previous, previous - current
+
+def revision_document(document: Document, changed: List[DocumentChunk]) -> Document:
+    """A document made of the changed chunks only, each one a section."""
+    sections = [DocumentSection(label=chunk.label, text=chunk.text) for chunk in changed]
+    content = "\n\n".join(f"[{chunk.label}]\n{chunk.text}" for chunk in changed)
+    return document.model_copy(update={"content": content, "sections": sections})
+
+def attribute_items(reviews: Dict[str, Any], chunks: List[DocumentChunk], top_k: int = 3,
+                    min_share: float = 0.5, min_terms: int = 3) -> List[Dict[str, Any]]:
+    """
+    Findings and recommendations of reviews with the chunks they are about.
+
+    An item is attributed to the chunks whose BM25 score for its text is at least
+    min_share of the best score, up to top_k of them. An item with fewer than
+    min_terms words to match on, such as the placeholder "Finding 1", or matching
+    no chunk is left unattributed: its chunks list is empty, it is carried over
+    until it is raised again instead of making every chunk be reviewed again.
+
+    Args:
+        reviews: Reviews by agent name, with findings, recommendations and risk_level.
+        chunks: The content-defined chunks the reviews were made on.
+    """
+    index = BM25Index(chunks)
+    items = []
+    for agent_name, review in reviews.items():
+        for kind in ("findings", "recommendations"):
+            for text in review.get(kind, []):
+                sources = []
+                if len({term for term in tokenize(text) if not term.isdigit()}) >= min_terms:
+                    ranked = index.top_k(text, top_k)
+                    sources = [chunk.digest for chunk, score in ranked if score >= min_share * ranked[0][1]]
+                items.append({"agent": agent_name, "kind": kind, "text": text,
+                              "chunks": list(dict.fromkeys(sources)),
+                              "risk_level": review.get("risk_level")})
+    return items
+
+def unattributed(items: List[Dict[str, Any]]) -> int:
+    """Number of items attributed to no chunk, see attribute_items."""
+    return sum(not item["chunks"] for item in items)
+
+def previous_items(report: Dict[str, Any], previous_chunks: Optional[List[DocumentChunk]] = None) -> List[Dict[str, Any]]:
+    """
+    Findings and recommendations of a previous report with the chunks they came from.
+
+    Incremental reports list them under incremental.items and full reviews under
+    provenance. Older reports are attributed on the previous revision's chunks when
+    they are given, otherwise their items are left unattributed.
+    """
+    if report.get("incremental", {}).get("items") is not None:
+        return [item for item in report["incremental"]["items"] if item["status"] != "dropped"]
+    if report.get("provenance") is not None:
+        return report["provenance"]
+    if previous_chunks is not None:
+        return attribute_items(report.get("reviews_by_agent", {}), previous_chunks)
+    items = []
+    for agent_name, review in report.get("reviews_by_agent", {}).items():
+        for kind in ("findings", "recommendations"):
+            items.extend({"agent": agent_name, "kind": kind, "text": text, "chunks": [],
+                          "risk_level": review.get("risk_level")} for text in review.get(kind, []))
+    return items
+
+def revalidation_chunks(previous: List[Dict[str, Any]], unchanged_hashes: Set[str]) -> Set[str]:
+    """
+    Unchanged chunks to review again with the changed ones: the other sources of the
+    previous items that came in part from a changed or removed chunk, so the review
+    sees all the text such an item was based on and raises it again if it still holds.
+    """
+    hashes = set()
+    for item in previous:
+        sources = set(item["chunks"])
+        if not sources <= unchanged_hashes:
+            hashes |= sources & unchanged_hashes
+    return hashes
+
+def merge_items(previous: List[Dict[str, Any]], fresh: List[Dict[str, Any]],
+                unchanged_hashes: Set[str]) -> List[Dict[str, Any]]:
+    """
+    Carry over the previous findings and recommendations whose chunks are all unchanged,
+    unattributed ones included, and add the fresh ones from the review of the changed
+    chunks. A previous item that came from a changed or removed chunk is kept only if
+    the review raised it again.
+
+    Args:
+        previous: Items of the previous report, see previous_items.
+        fresh: Items of the review of the changed chunks, see attribute_items.
+        unchanged_hashes: Hashes of the chunks that did not change.
+
+    Returns:
+        Every item with its status: "fresh", "reused", or "dropped" for a previous
+        item no longer backed by the document.
+    """
+    items = [{**item, "status": "reused" if set(item["chunks"]) <= unchanged_hashes else "dropped"}
+             for item in previous]
+    by_key = {(item["agent"], item["kind"], item["text"]): item for item in items}
+    for item in fresh:
+        key = (item["agent"], item["kind"], item["text"])
+        if key in by_key:
+            # raised again: fresh, and still backed by its unchanged chunks
+            previous_item = by_key[key]
+            sources = previous_item["chunks"] if previous_item["status"] == "reused" else []
+            previous_item.update(status="fresh", risk_level=item["risk_level"],
+                                 chunks=list(dict.fromkeys(sources + item["chunks"])))
+            continue
+        by_key[key] = {**item, "status": "fresh"}
+        items.append(by_key[key])
+    return items
+
+def merged_reviews(items: List[Dict[str, Any]], agent_names: List[str], fresh_reviews: Dict[str, Any],
+                   previous_reviews: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Rebuild each agent's review from the merged items. An agent's risk level is
+    the highest of its fresh review and the reviews its reused items came from.
+    """
+    order = {"LOW": 1, "MEDIUM": 2, "HIGH": 3}
+    reviews = {}
+    for agent_name in agent_names:
+        agent_items = [item for item in items if item["agent"] == agent_name and item["status"] != "dropped"]
+        levels = [item["risk_level"] for item in agent_items if item.get("risk_level") in order]
+        if agent_name in fresh_reviews:
+            levels.append(fresh_reviews[agent_name]["risk_level"])
+        base = fresh_reviews.get(agent_name) or (previous_reviews or {}).get(agent_name) or {}
+        reviews[agent_name] = {
+            **base,
+            "agent_name": agent_name,
+            "findings": [item["text"] for item in agent_items if item["kind"] == "findings"],
+            "recommendations": [item["text"] for item in agent_items if item["kind"] == "recommendations"],
+            "risk_level": max(levels, key=order.get) if levels else base.get("risk_level", "MEDIUM"),
+            "fresh": sum(item["status"] == "fresh" for item in agent_items),
+            "reused": sum(item["status"] == "reused" for item in agent_items),
+        }
+    return reviews
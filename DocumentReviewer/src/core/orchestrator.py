@@ -1,26 +1,63 @@
-from typing import Dict, List, Any, TypedDict
-from langgraph.graph import Graph, StateGraph
+import os
+from typing import Annotated, Dict, List, Any, Optional, TypedDict
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from pydantic import BaseModel
 
-from src.core.document_processor import Document, DocumentProcessor
+from src.core.document_processor import Document, DocumentChunk, DocumentProcessor
+from src.core.incremental import (attribute_items, content_defined_chunks, diff_chunks, fingerprints, merge_items,
+                                  merged_reviews, previous_items, revalidation_chunks, revision_document,
+                                  unattributed)
 from src.agents.enterprise_architect import EnterpriseArchitect
 from src.agents.solution_architect import SolutionArchitect
 from src.agents.infrastructure_architect import InfrastructureArchitect
 from src.agents.security_architect import SecurityArchitect
 from src.agents.aws_architect import AWSCloudArchitect
+from src.agents.consolidated_reviewer import ConsolidatedReviewer
+from src.core.retrieval import BM25Index
+from src.core.dedup import MinHashDeduplicator, dedup_items
+from src.core.document_store import DocumentStore
+from DocGenCommon.checkpoints import get_checkpoint_store, invoke_resumable, new_run_id
+from DocGenCommon.scheduler import estimate_tokens
+from DocGenCommon.settings import env_flag, env_float
+from DocGenCommon.usage import UsageTracker
+
+# fanout: every agent reviews the document in its own call
+# consolidated: one structured-output call reviews it from every perspective
+# auto: consolidated for documents up to REVIEW_CONSOLIDATED_MAX_TOKENS, fanout above
+REVIEW_MODES = ("auto", "fanout", "consolidated")
+
+def merge_reviews(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer combining the reviews written by agents running in parallel."""
+    return {**(left or {}), **(right or {})}
 
 class ReviewState(TypedDict):
-    """State object for the review workflow."""
-    document: Document
-    reviews: Dict[str, Any]
+    """
+    State object for the review workflow. The document and its routing index are
+    kept in the orchestrator's DocumentStore, the state only references them.
+    """
+    document_id: str
+    # "fanout" or "consolidated", chosen per document
+    mode: str
+    # every agent writes its own key, the reducer merges the parallel updates
+    reviews: Annotated[Dict[str, Any], merge_reviews]
     final_report: Dict[str, Any]
 
 class DocumentReviewOrchestrator:
     """Orchestrates the document review process using LangGraph."""
     
-    def __init__(self):
+    def __init__(self, max_concurrency: int = None, mode: str = None):
+        """
+        Args:
+            max_concurrency: Agents reviewing at the same time, defaults to
+                REVIEW_MAX_CONCURRENCY or all of them.
+            mode: One of REVIEW_MODES, defaults to REVIEW_MODE or auto.
+        """
         self.document_processor = DocumentProcessor()
-        # Define agents in the order they should review
+        # Documents under review, shared by every agent instead of being copied into the state
+        self.store = DocumentStore()
+        # Define agents in the order they are reported
         self.agent_order = ["enterprise", "solution", "infrastructure", "security", "aws"]
         self.agents = {
             "enterprise": EnterpriseArchitect(),
@@ -29,10 +66,30 @@ class DocumentReviewOrchestrator:
             "security": SecurityArchitect(),
             "aws": AWSCloudArchitect()
         }
+        self.consolidated_reviewer = ConsolidatedReviewer([self.agents[agent_name] for agent_name in self.agent_order])
+        self.mode = mode or os.getenv("REVIEW_MODE", "auto")
+        if self.mode not in REVIEW_MODES:
+            raise ValueError(f"Unknown review mode {self.mode}, expected one of {', '.join(REVIEW_MODES)}")
+        # Average size of the content-defined chunks diffed by incremental reviews
+        self.incremental_chunk_tokens = int(os.getenv("REVIEW_INCREMENTAL_CHUNK_TOKENS", "800"))
+        # Documents up to this estimate are reviewed in one call in auto mode
+        self.consolidated_max_tokens = int(os.getenv("REVIEW_CONSOLIDATED_MAX_TOKENS", "12000"))
+        # Near-duplicate findings of different agents are merged in the report
+        self.deduplicator = None
+        if env_flag("REVIEW_DEDUP", True):
+            self.deduplicator = MinHashDeduplicator(threshold=env_float("REVIEW_DEDUP_THRESHOLD", 0.9))
+        # LLM calls, tokens and prompt-cache hits of every review run by this orchestrator
+        self.usage = UsageTracker()
+        self.max_concurrency = max_concurrency or int(os.getenv("REVIEW_MAX_CONCURRENCY", len(self.agent_order)))
+        # Reviews are checkpointed after every node so a failed one can be resumed, None when DOCGEN_CHECKPOINTS is off
+        self.checkpoints = get_checkpoint_store()
         self.workflow = self._create_workflow()
         
-    def _create_workflow(self) -> Graph:
-        """Create the LangGraph workflow for document review."""
+    def _create_workflow(self) -> CompiledStateGraph:
+        """
+        Create the LangGraph workflow: every agent reviews in parallel, or the
+        consolidated reviewer reviews for all of them, then the reviews are aggregated.
+        """
         
         # Create the graph
         workflow = StateGraph(ReviewState)
@@ -41,46 +98,95 @@ class DocumentReviewOrchestrator:
         for agent_name in self.agent_order:
             workflow.add_node(agent_name, self._create_agent_node(self.agents[agent_name]))
             
+        workflow.add_node("consolidated", self._consolidated_review)
+        
         # Add aggregator node
         workflow.add_node("aggregator", self._aggregate_reviews)
         
-        # Create sequential connections between agents
-        for i in range(len(self.agent_order) - 1):
-            current_agent = self.agent_order[i]
-            next_agent = self.agent_order[i + 1]
-            
-            # Add edge from current agent to next agent
-            workflow.add_edge(current_agent, next_agent)
-        
-        # Connect last agent to aggregator
-        workflow.add_edge(self.agent_order[-1], "aggregator")
+        # No agent reads another's review, so fan out from the start to every
+        # agent and fan in to the aggregator once all of them have finished
+        workflow.add_conditional_edges(START, self._start_nodes, self.agent_order + ["consolidated"])
+        workflow.add_edge(self.agent_order, "aggregator")
+        workflow.add_edge("consolidated", "aggregator")
+        workflow.add_edge("aggregator", END)
         
-        # Set the entry point to the first agent
-        workflow.set_entry_point(self.agent_order[0])
-        
-        # Compile the graph
-        return workflow.compile()
+        # Compile the graph, saving the state after every node when checkpoints are on
+        return workflow.compile(checkpointer=self.checkpoints.saver if self.checkpoints else None)
     
     def _create_agent_node(self, agent: Any):
         """Create a node function for an agent."""
-        def node_func(state: ReviewState) -> ReviewState:
-            response = agent.analyze_document(state["document"])
-            # Convert AgentResponse to dict for JSON serialization
-            state["reviews"][agent.name] = response.model_dump()
-            return state
+        def node_func(state: ReviewState) -> Dict[str, Any]:
+            document_id = state["document_id"]
+            response = agent.analyze_document(self.store.get(document_id), self.store.index(document_id))
+            # Convert AgentResponse to dict for JSON serialization, only this
+            # agent's key is returned so parallel updates do not collide
+            return {"reviews": {agent.name: response.model_dump()}}
         return node_func
     
-    def _aggregate_reviews(self, state: ReviewState) -> ReviewState:
+    def _start_nodes(self, state: ReviewState) -> List[str]:
+        """The nodes reviewing the document in its mode."""
+        return ["consolidated"] if state["mode"] == "consolidated" else list(self.agent_order)
+
+    def select_mode(self, document: Document, index: Optional[BM25Index] = None) -> str:
+        """
+        The review mode of a document: the configured one, or in auto mode
+        consolidated for documents small enough to be reviewed in one call.
+        Routed documents are always fanned out, each agent reviews its own chunks.
+        """
+        if self.mode != "auto":
+            return self.mode
+        if index is not None or estimate_tokens(document.content) > self.consolidated_max_tokens:
+            return "fanout"
+        return "consolidated"
+
+    def _consolidated_review(self, state: ReviewState) -> Dict[str, Any]:
+        """Review from every perspective in one call, perspectives it missed are reviewed by their agent."""
+        try:
+            document = self.store.get(state["document_id"])
+            responses = self.consolidated_reviewer.analyze_document(document)
+        except Exception as e:
+            print(f"Consolidated review failed ({type(e).__name__}: {e}), falling back to one review per agent")
+            responses = {}
+        missing = [self.agents[agent_name] for agent_name in self.agent_order
+                   if self.agents[agent_name].name not in responses]
+        if missing:
+            print(f"Reviewing {', '.join(agent.name for agent in missing)} separately")
+            with ContextThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                for response in executor.map(lambda agent: agent.analyze_document(document), missing):
+                    responses[response.agent_name] = response
+        return {"reviews": {name: response.model_dump() for name, response in responses.items()}}
+
+    def _aggregate_reviews(self, state: ReviewState) -> Dict[str, Any]:
         """Aggregate reviews from all agents into a final report."""
+        # Report in agent order whatever order the parallel reviews finished in
+        names = [self.agents[agent_name].name for agent_name in self.agent_order]
+        reviews = {name: state["reviews"][name] for name in names if name in state["reviews"]}
         final_report = {
-            "document_path": state["document"].file_path,
-            "overall_risk_level": self._calculate_overall_risk(state["reviews"]),
-            "findings": self._aggregate_findings(state["reviews"]),
-            "recommendations": self._aggregate_recommendations(state["reviews"]),
-            "reviews_by_agent": state["reviews"]
+            "document_path": self.store.get(state["document_id"]).file_path,
+            "overall_risk_level": self._calculate_overall_risk(reviews),
+            "findings": self._aggregate_findings(reviews),
+            "recommendations": self._aggregate_recommendations(reviews),
+            "review_mode": state["mode"],
+            "reviews_by_agent": reviews
+        }
+        index = self.store.index(state["document_id"])
+        if index is not None:
+            final_report["routing"] = self._routing_coverage(index, reviews)
+        return {"final_report": final_report}
+
+    def _routing_coverage(self, index: BM25Index, reviews: Dict) -> Dict[str, Any]:
+        """Which chunks each agent reviewed, and the chunks no agent reviewed."""
+        routed = {name: review["routing"] for name, review in reviews.items() if review.get("routing")}
+        covered = {item["chunk"] for audit in routed.values() for item in audit["selected"]}
+        if len(routed) < len(reviews):
+            # an agent that was not routed reviewed the whole document
+            covered = set(range(len(index.chunks)))
+        return {
+            "total_chunks": len(index.chunks),
+            "chunks_by_agent": {name: [f"{item['chunk']}: {item['label']}" for item in audit["selected"]]
+                                for name, audit in routed.items()},
+            "unreviewed_chunks": [f"{chunk.index}: {chunk.label}" for chunk in index.chunks if chunk.index not in covered],
         }
-        state["final_report"] = final_report
-        return state
     
     def _calculate_overall_risk(self, reviews: Dict) -> str:
         """Calculate overall risk level based on individual agent assessments."""
@@ -95,40 +201,163 @@ class DocumentReviewOrchestrator:
         return "LOW"
     
     def _aggregate_findings(self, reviews: Dict) -> List[str]:
-        """Aggregate findings from all agents."""
-        findings = []
-        for agent_name, review in reviews.items():
-            findings.extend([f"[{agent_name}] {finding}" for finding in review["findings"]])
-        return findings
+        """Aggregate findings from all agents, near-duplicates merged."""
+        return self._aggregate(reviews, "findings")
     
     def _aggregate_recommendations(self, reviews: Dict) -> List[str]:
-        """Aggregate recommendations from all agents."""
-        recommendations = []
-        for agent_name, review in reviews.items():
-            recommendations.extend([f"[{agent_name}] {rec}" for rec in review["recommendations"]])
-        return recommendations
+        """Aggregate recommendations from all agents, near-duplicates merged."""
+        return self._aggregate(reviews, "recommendations")
+
+    def _aggregate(self, reviews: Dict, kind: str) -> List[str]:
+        """
+        Every agent's findings or recommendations, prefixed with the agents that raised them.
+        Near-duplicates are merged into one entry that still lists every differently worded variant.
+        """
+        items = [{"text": text, "agent": agent_name} for agent_name, review in reviews.items() for text in review[kind]]
+        if self.deduplicator is None:
+            return [f"[{item['agent']}] {item['text']}" for item in items]
+        return [
+            f"[{', '.join(cluster.agents)}] {cluster.text}"
+            + "".join(f"\n  also raised as: {variant}" for variant in cluster.variants)
+            for cluster in dedup_items(items, self.deduplicator)
+        ]
     
-    def review_document(self, file_path: str) -> Dict:
+    def review_document(self, file_path: str, callbacks: Optional[List] = None,
+                        previous_report: Optional[Dict] = None, previous_source: Optional[str] = None,
+                        run_id: Optional[str] = None) -> Dict:
         """
         Process and review a document using the agent workflow.
         
+        With a previous report the review is incremental: the document is diffed
+        against the previous revision on content-defined chunks, only the changed
+        chunks are reviewed and their findings are merged with the ones carried
+        over from the previous report. A previous finding is carried over only if
+        all the chunks it came from are unchanged, the others are reviewed again
+        with the changed chunks and dropped unless they are raised again.
+        
+        Reviews are checkpointed under a run ID: reviewing the same document again
+        with the ID of a failed review resumes it, only the agents that had not
+        finished are called again.
+        
         Args:
             file_path: Path to the document file (PDF or DOCX)
+            callbacks: Extra callback handlers for this review, e.g. a per-document UsageTracker
+            previous_report: Report of the previous revision of the document
+            previous_source: Previous revision of the document, needed when the
+                previous report has no chunk hashes, used to attribute the findings
+                of a report without provenance to the chunks they came from
+            run_id: ID of the review to resume, a new review gets a new ID
             
         Returns:
             Dict containing the final consolidated review report
         """
         # Load and process the document
         document = self.document_processor.load_document(file_path)
+        chunks = content_defined_chunks(document, self.incremental_chunk_tokens)
+        if previous_report is not None:
+            return self._review_incremental(document, chunks, previous_report, previous_source, callbacks, run_id)
+        
+        # Build the routing index once, shared by all agents
+        index = None
+        if int(os.getenv("REVIEW_ROUTING_TOP_K", "0")) > 0:
+            index = self.document_processor.build_index(document, int(os.getenv("REVIEW_ROUTING_CHUNK_TOKENS", "1000")))
         
-        # Initialize the workflow state
+        final_report = self._run_workflow(document, index, callbacks, run_id)
+        # chunk hashes the next revision is diffed against, and the chunks each finding came from
+        final_report["chunks"] = fingerprints(chunks)
+        final_report["provenance"] = attribute_items(final_report["reviews_by_agent"], chunks)
+        self._log_unattributed(final_report["provenance"])
+        return final_report
+
+    def _log_unattributed(self, items: List[Dict]) -> None:
+        """Report the findings and recommendations that could not be matched to a chunk."""
+        count = unattributed(items)
+        if count:
+            print(f"{count} of {len(items)} findings and recommendations match no chunk, "
+                  "they are carried over by incremental reviews until raised again")
+
+    def _run_workflow(self, document: Document, index: Optional[BM25Index], callbacks: Optional[List],
+                      run_id: Optional[str] = None) -> Dict:
+        """Run, or resume, the review workflow on a document and return its report with its run ID."""
+        # Initialize the workflow state, the document is passed by reference
+        document_id = self.store.put(document, index)
         initial_state: ReviewState = {
-            "document": document,
+            "document_id": document_id,
+            "mode": self.select_mode(document, index),
             "reviews": {},
             "final_report": {}
         }
         
+        config = {"callbacks": [self.usage] + list(callbacks or []), "max_concurrency": self.max_concurrency}
+        
         # Execute the workflow
-        final_state = self.workflow.invoke(initial_state)
+        try:
+            if self.checkpoints is None:
+                return self.workflow.invoke(initial_state, config=config)["final_report"]
+            # The document is not in the checkpoints, a run is only resumed on the same document
+            run_id = run_id or new_run_id("review")
+            final_state = invoke_resumable(
+                self.workflow, "document_review", initial_state, run_id, config, description=document.file_path,
+                compatible=lambda saved: saved["document_id"] == document_id, store=self.checkpoints
+            )
+        finally:
+            self.store.release(document_id)
         
-        return final_state["final_report"] 
\ No newline at end of file
+        return {**final_state["final_report"], "run_id": run_id}
+
+    def _review_incremental(self, document: Document, chunks: List[DocumentChunk], previous_report: Dict,
+                            previous_source: Optional[str], callbacks: Optional[List], run_id: Optional[str]) -> Dict:
+        """Review the chunks changed since the previous report and merge the findings."""
+        previous_hashes = [chunk["hash"] for chunk in previous_report.get("chunks", [])]
+        previous_chunks = None
+        if not previous_hashes and previous_source is None:
+            raise ValueError("The previous report has no chunk hashes, the previous revision's source is needed")
+        if previous_source is not None and (not previous_hashes or previous_report.get("provenance") is None):
+            previous_document = self.document_processor.load_document(previous_source)
+            previous_chunks = content_defined_chunks(previous_document, self.incremental_chunk_tokens)
+            previous_report = {**previous_report, "chunks": fingerprints(previous_chunks)}
+            previous_hashes = [chunk.digest for chunk in previous_chunks]
+        previous = previous_items(previous_report, previous_chunks)
+        
+        changed, unchanged, removed = diff_chunks(previous_hashes, chunks)
+        # unchanged chunks that findings of changed chunks also came from are reviewed again with them
+        revalidated = revalidation_chunks(previous, unchanged)
+        reviewed = [chunk for chunk in chunks if chunk.digest not in unchanged or chunk.digest in revalidated]
+        print(f"Incremental review: {len(changed)} of {len(chunks)} chunks changed, "
+              f"{len(removed)} previous chunks edited or removed, "
+              f"{len(reviewed) - len(changed)} unchanged chunks reviewed again")
+        fresh, fresh_items, mode = {}, [], "reused"
+        if reviewed:
+            revision_report = self._run_workflow(revision_document(document, reviewed), None, callbacks, run_id)
+            fresh, mode = revision_report["reviews_by_agent"], revision_report["review_mode"]
+            fresh_items = attribute_items(fresh, reviewed)
+            self._log_unattributed(fresh_items)
+            run_id = revision_report.get("run_id")
+        
+        items = merge_items(previous, fresh_items, unchanged)
+        names = [self.agents[agent_name].name for agent_name in self.agent_order]
+        reviews = merged_reviews(items, names, fresh, previous_report.get("reviews_by_agent"))
+        report = {
+            "document_path": document.file_path,
+            "overall_risk_level": self._calculate_overall_risk(reviews),
+            "findings": self._aggregate_findings(reviews),
+            "recommendations": self._aggregate_recommendations(reviews),
+            "review_mode": mode,
+            "reviews_by_agent": reviews,
+            "chunks": fingerprints(chunks),
+            "incremental": {
+                "previous_document": previous_report.get("document_path"),
+                "chunks": len(chunks),
+                "chunks_reviewed": [f"{chunk.index}: {chunk.label}" for chunk in reviewed],
+                "chunks_revalidated": len(reviewed) - len(changed),
+                "chunks_reused": len(chunks) - len(reviewed),
+                "previous_chunks_removed": len(removed),
+                "fresh": sum(item["status"] == "fresh" for item in items),
+                "reused": sum(item["status"] == "reused" for item in items),
+                "dropped": sum(item["status"] == "dropped" for item in items),
+                "items": items,
+            },
+        }
+        if run_id:
+            report["run_id"] = run_id
+        return report
@@ -0,0 +1,99 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from src.core.document_processor import DocumentChunk
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for routing, the focus lists are full of them
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the this to was were will with
+clear clearly described""".split())
+
+
+def stem(word: str) -> str:
+    """Very light suffix stripping, so that plurals and simple verb forms match."""
+    for suffix in ("ations", "ation", "ments", "ment", "ings", "ing", "ies", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, stemmed word tokens without stopwords."""
+    return [stem(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Local BM25 index over the chunks of one document."""
+
+    def __init__(self, chunks: List[DocumentChunk], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            chunks: The document's chunks, see DocumentProcessor.chunk_document.
+            k1: Term frequency saturation.
+            b: Length normalisation.
+        """
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(tokenize(chunk.text)) for chunk in chunks]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        total = len(chunks)
+        self._idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """BM25 score of every chunk for a query."""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        results = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            for term in terms:
+                frequency = counts.get(term, 0)
+                if frequency:
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            results.append(score)
+        return results
+
+    def top_k(self, query: str, k: int) -> List[Tuple[DocumentChunk, float]]:
+        """The k best scoring chunks with a positive score, best first."""
+        ranked = sorted(zip(self.chunks, self.scores(query)), key=lambda item: item[1], reverse=True)
+        return [(chunk, score) for chunk, score in ranked[:k] if score > 0]
+
+
+def focus_query(system_prompt: str) -> str:
+    """The focus list ('- item' lines) of an agent's system prompt, used as its routing query."""
+    items = [line.strip()[1:].strip() for line in system_prompt.splitlines() if line.strip().startswith("-")]
+    return " ".join(items) or system_prompt
+
+
+def route_chunks(index: BM25Index, query: str, k: int) -> Dict:
+    """
+    Select the chunks an agent should review: the first chunk (title and overview)
+    and the top-k chunks for its query, in document order.
+
+    Returns:
+        The selected chunks and an audit record of the routing decision.
+    """
+    ranked = index.top_k(query, k)
+    scores = {chunk.index: score for chunk, score in ranked}
+    selected = sorted({chunk.index for chunk, _ in ranked} | ({0} if index.chunks else set()))
+    chunks = [index.chunks[i] for i in selected]
+    return {
+        "chunks": chunks,
+        "audit": {
+            "selected": [{"chunk": i, "label": index.chunks[i].label, "score": round(scores.get(i, 0.0), 3)}
+                         for i in selected],
+            "total_chunks": len(index.chunks),
+            "selected_tokens": sum(chunk.tokens for chunk in chunks),
+            "total_tokens": sum(chunk.tokens for chunk in index.chunks),
+        },
+    }
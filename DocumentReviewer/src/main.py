@@ -1,9 +1,14 @@
 import os
+import sys
+import contextlib
 import json
 import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-from src.core.orchestrator import DocumentReviewOrchestrator
+from src.core.orchestrator import DocumentReviewOrchestrator, REVIEW_MODES
+from src.core.batch import collect_documents, review_batch
+from DocGenCommon.checkpoints import new_run_id
+from DocGenCommon.clients import get_registry
 
 def validate_file_path(file_path: str) -> str:
     """Validate that the file exists and is of supported type."""
@@ -21,30 +26,103 @@ def main():
     )
     parser.add_argument(
         "file_path",
-        type=validate_file_path,
-        help="Path to the document file (PDF or DOCX) to analyze"
+        nargs="+",
+        help="Path to the document file (PDF or DOCX) to analyze. Several files, directories or "
+             "glob patterns (quoted, e.g. 'docs/**/*.pdf') review a batch"
     )
     parser.add_argument(
         "-o", "--output",
-        help="Custom output path for the JSON report (default: input_file_review_report.json)",
+        help="Custom output path for the JSON report (default: input_file_review_report.json), "
+             "or of the JSON Lines records in batch mode (default: review_batch.jsonl, - for stdout)",
         type=str
     )
+    parser.add_argument(
+        "--documents-concurrency",
+        type=int,
+        default=4,
+        help="Number of documents reviewed at the same time in batch mode (default: 4)"
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        help="Cap on LLM calls in flight across all documents (default: DOCGEN_LLM_MAX_CONCURRENCY or 16)"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Number of agents reviewing in parallel (default: REVIEW_MAX_CONCURRENCY or all agents)"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=REVIEW_MODES,
+        help="fanout: one call per agent, consolidated: one structured call for all perspectives, "
+             "auto: consolidated for small documents (default: REVIEW_MODE or auto)"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        help="Route each agent to the k chunks most relevant to its focus instead of the whole document (REVIEW_ROUTING_TOP_K)"
+    )
+    parser.add_argument(
+        "--previous-report",
+        help="Report of the previous revision: only the parts of the document that changed are reviewed again"
+    )
+    parser.add_argument(
+        "--previous-source",
+        help="Previous revision of the document, needed when the previous report has no chunk hashes"
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Resume the failed review, or batch, of this run ID instead of starting over: only the agents "
+             "that had not finished are called again (default: a new run ID, needs DOCGEN_CHECKPOINTS=1)"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse cached LLM responses for unchanged documents (DOCGEN_LLM_CACHE_DOCUMENT_REVIEWER)"
+    )
     
     # Parse arguments
     args = parser.parse_args()
     
     # Load environment variables (for OpenAI API key)
     load_dotenv()
+    if args.cache:
+        os.environ["DOCGEN_LLM_CACHE_DOCUMENT_REVIEWER"] = "1"
+    if args.top_k is not None:
+        os.environ["REVIEW_ROUTING_TOP_K"] = str(args.top_k)
+    if args.llm_concurrency is not None:
+        os.environ["DOCGEN_LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    
+    batch = len(args.file_path) > 1 or not Path(args.file_path[0]).is_file()
+    if batch:
+        documents = collect_documents(args.file_path)
+        if not documents:
+            parser.error(f"No PDF or DOCX documents found in: {', '.join(args.file_path)}")
+    else:
+        try:
+            args.file_path = validate_file_path(args.file_path[0])
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
     
     # Initialize the orchestrator
-    orchestrator = DocumentReviewOrchestrator()
+    orchestrator = DocumentReviewOrchestrator(max_concurrency=args.max_concurrency, mode=args.mode)
+    
+    if batch:
+        run_batch(parser, args, orchestrator, documents)
+        return
     
     try:
         # Review the document
         print(f"\nAnalyzing document: {args.file_path}")
         print("This may take a few minutes depending on the document size...\n")
         
-        review_report = orchestrator.review_document(args.file_path)
+        previous_report = None
+        if args.previous_report:
+            with open(args.previous_report) as f:
+                previous_report = json.load(f)
+        review_report = orchestrator.review_document(args.file_path, previous_report=previous_report,
+                                                     previous_source=args.previous_source, run_id=args.run_id)
         
         # Print the report in a formatted way
         print("\n=== Document Review Report ===")
@@ -70,10 +148,49 @@ def main():
         with open(output_path, 'w') as f:
             json.dump(review_report, f, indent=2)
         print(f"\nDetailed report saved to: {output_path}")
+        if review_report.get("run_id"):
+            print(f"Run ID: {review_report['run_id']}")
+        print(f"HTTP connections: {get_registry().connection_stats()}")
+        print(f"LLM usage: {orchestrator.usage.snapshot()}")
         
     except Exception as e:
         print(f"Error during document review: {str(e)}")
         parser.exit(1)
 
+def run_batch(parser: argparse.ArgumentParser, args: argparse.Namespace, orchestrator: DocumentReviewOrchestrator,
+              documents: list):
+    """Review the documents matched by the paths, streaming one JSON Lines record per document."""
+    output_path = args.output or "review_batch.jsonl"
+    if output_path == "-":
+        # stdout carries only the records, progress and diagnostics of every thread go to stderr
+        records = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = _run_batch(args, orchestrator, documents, records)
+    else:
+        with open(output_path, "w", encoding="utf-8") as records:
+            summary = _run_batch(args, orchestrator, documents, records)
+        print(f"Records saved to: {output_path}")
+    if summary["failed"]:
+        parser.exit(1)
+
+def _run_batch(args: argparse.Namespace, orchestrator: DocumentReviewOrchestrator, documents: list, output) -> dict:
+    """Review the batch into the output stream, printing progress and the summary."""
+    run_id = None
+    if orchestrator.checkpoints is not None:
+        run_id = args.run_id or new_run_id("batch")
+    print(f"\nReviewing {len(documents)} documents, {args.documents_concurrency} at a time"
+          + (f", batch run ID {run_id}" if run_id else "") + "\n")
+    
+    summary = review_batch(orchestrator, documents, output, concurrency=args.documents_concurrency, run_id=run_id)
+    
+    print(f"\n{summary['succeeded']}/{summary['documents']} documents reviewed in {summary['wall_time_s']}s "
+          f"({summary['documents_per_minute']} per minute), latency p50 {summary['latency_p50_s']}s "
+          f"p95 {summary['latency_p95_s']}s")
+    for failure in summary["failures"]:
+        print(f"- failed: {failure['document']}: {failure['error']}")
+    if summary["failed"] and run_id:
+        print(f"Run the batch again with --run-id {run_id} to resume the failed reviews")
+    return summary
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,27 +1,45 @@
-import re
 import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
 
 load_dotenv()
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_chat_model, get_registry
+from DocGenCommon.outline import iter_file_sections
+from DocGenCommon.scheduler import get_scheduler
+
 def parse_markdown_sections(file_path: str):
-    """Parse a markdown file into sections starting with '##'."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    pattern = r"(## .+?)(?=\n## |$)"
-    matches = re.finditer(pattern, content, flags=re.DOTALL)
-    sections = [(m.group(0).splitlines()[0].strip(), "\n".join(m.group(0).splitlines()[1:]).strip()) for m in matches]
-    return sections
-
-# Use ChatGPT via LangChain
-llm = ChatOpenAI(
-    model="gpt-4",  # Change to "gpt-3.5-turbo" if needed
-    temperature=0.5,
-    #openai_api_key=os.getenv("OPENAI_API_KEY")  # Ensure your API key is set
-)
+    """Parse a markdown file into (header, instruction) sections starting with '##'."""
+    return [(section.header, section.body.strip()) for section in iter_file_sections(file_path, levels=(2,))]
+
+# Opt-in for the LLM response cache, --cache turns it on for the run
+use_llm_cache = None
+
+def get_llm():
+    """Use ChatGPT via LangChain, shared and scheduled through the client registry.
+
+    The model (and the OpenAI SDK) is only created on first use.
+    """
+    return get_chat_model(
+        "openai",
+        "gpt-4",  # Change to "gpt-3.5-turbo" if needed
+        temperature=0.5,
+        cache_pipeline="OPENDOCGEN",
+        use_cache=use_llm_cache,
+        #openai_api_key=os.getenv("OPENAI_API_KEY")  # Ensure your API key is set
+    )
 
 # Prompt template
 prompt_template = ChatPromptTemplate.from_template(
@@ -40,26 +58,172 @@ Please update this section with more detailed, architecture-focused documentatio
 def generate_section_content(header: str, instruction: str) -> str:
     """Generates updated content for one section using ChatGPT."""
 
-    chain = prompt_template | llm
+    chain = prompt_template | get_llm()
     response =  chain.invoke({"header": header, "instruction": instruction})
     return response.content
 
+class SectionJournal:
+    """Append-only JSON Lines journal of finished sections, used to resume a failed run.
+
+    Only the byte offset of each entry is kept in memory, the content is read
+    back from disk when the section is written to the output.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.offsets = {}
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self._load()
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+
+    def _load(self):
+        """Index the entries of an existing journal and drop a torn last line."""
+        valid_end = 0
+        with open(self.path, "r+b") as f:
+            for line in iter(f.readline, b""):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.offsets[entry["key"]] = valid_end
+                valid_end += len(line)
+            f.truncate(valid_end)
+
+    @staticmethod
+    def section_key(header: str, instruction: str) -> str:
+        """Identify a section by its header and prompt, so edited sections are regenerated."""
+        return hashlib.sha256(f"{header}\0{instruction}".encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def record(self, key: str, header: str, content: str):
+        """Durably append a finished section."""
+        line = (json.dumps({"key": key, "header": header, "content": content}) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.offsets[key] = offset
+
+    def load(self, key: str) -> str:
+        """Read the content of a journaled section back from disk."""
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[key])
+            return json.loads(f.readline())["content"]
+
+    def close(self, remove: bool = False):
+        self._file.close()
+        if remove:
+            os.remove(self.path)
+
+def generate_sections(sections, max_workers: int = 1, journal: SectionJournal = None):
+    """Generate every section, keeping at most max_workers LLM calls in flight.
+
+    Yields (index, header, content, latency, resumed) in the original outline order,
+    regardless of the order in which the calls complete. Sections already in the
+    journal are read back instead of generated, new ones are journaled as soon as
+    they finish.
+    """
+    def produce(header, instruction):
+        key = SectionJournal.section_key(header, instruction)
+        if journal is not None and key in journal:
+            return journal.load(key), 0.0, True
+        started = time.perf_counter()
+        content = generate_section_content(header, instruction)
+        latency = time.perf_counter() - started
+        if journal is not None:
+            journal.record(key, header, content)
+        return content, latency, False
+
+    if max_workers <= 1:
+        for index, (header, instruction) in enumerate(sections):
+            print(f"Processing section: {header}")
+            yield (index, header, *produce(header, instruction))
+        return
+
+    # Only a small window of sections is submitted ahead of the one being written,
+    # so finished-but-unwritten content never grows with the document size
+    window = max_workers * 2
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for index, (header, instruction) in enumerate(sections):
+            print(f"Queued section: {header}")
+            pending.append((index, header, executor.submit(produce, header, instruction)))
+            if len(pending) >= window:
+                index, header, future = pending.popleft()
+                yield (index, header, *future.result())
+        while pending:
+            index, header, future = pending.popleft()
+            yield (index, header, *future.result())
+
 def main():
-    input_md = "OpenDocGen/sections.md"
-    output_md = "GeneratedDocs/updated_documentation.md"
+    global use_llm_cache
+    parser = argparse.ArgumentParser(description="Generate architecture documentation from a markdown outline")
+    parser.add_argument("-i", "--input", default="OpenDocGen/sections.md", help="Markdown outline split on '##' headers")
+    parser.add_argument("-o", "--output", default="GeneratedDocs/updated_documentation.md", help="Where to write the generated document")
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=int(os.getenv("OPENDOCGEN_CONCURRENCY", "1")),
+        help="Maximum number of sections generated in parallel (1 = sequential)"
+    )
+    parser.add_argument("--cache", action="store_true", help="Reuse cached responses for unchanged sections")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip sections already recorded in the journal of a previous, interrupted run"
+    )
+    args = parser.parse_args()
+
+    if args.cache:
+        use_llm_cache = True
+
+    input_md = args.input
+    output_md = args.output
 
     sections = parse_markdown_sections(input_md)
-    updated_document = "# Updated Architecture Documentation\n\n"
 
-    for header, instruction in sections:
-        print(f"Processing section: {header}")
-        updated_document += generate_section_content(header, instruction) + "\n\n"
+    # Finished sections are journaled next to the output so a failed run can be resumed
+    journal = SectionJournal(output_md + ".journal", resume=args.resume)
+    if args.resume:
+        print(f"Resuming: {len(journal)} finished sections found in '{journal.path}'")
 
+    started = time.perf_counter()
+    total_latency = 0.0
     with open(output_md, "w", encoding="utf-8") as f:
-        f.write(updated_document)
+        f.write("# Updated Architecture Documentation\n\n")
+        for index, header, content, latency, resumed in generate_sections(sections, args.concurrency, journal):
+            total_latency += latency
+            status = "resumed" if resumed else f"{latency:.2f}s"
+            print(f"  [{index + 1}/{len(sections)}] {header} ({status})")
+            f.write(content + "\n\n")
+            f.flush()
+    wall_time = time.perf_counter() - started
+
+    # Every section made it into the output, the journal is no longer needed
+    journal.close(remove=True)
 
     print(f"Updated documentation saved to '{output_md}'")
+    if sections:
+        print(
+            f"Generated {len(sections)} sections in {wall_time:.2f}s wall time "
+            f"(sum of section latencies {total_latency:.2f}s, "
+            f"speedup x{total_latency / wall_time if wall_time else 1:.2f}, concurrency {args.concurrency})"
+        )
+    print(f"LLM scheduler: {get_scheduler().metrics()}")
+    print(f"HTTP connections: {get_registry().connection_stats()}")
+    llm = get_llm()
+    if llm.cache:
+        stats = llm.cache.stats()
+        print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses")
 
 if __name__ == "__main__":
     main()
-
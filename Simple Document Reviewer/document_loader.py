@@ -1,10 +1,18 @@
 # document_loader.py
 import os
+import sys
 import pdfplumber
 from docx import Document
 from pathlib import Path
 from zipfile import BadZipFile
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.extraction_cache import cached_extraction
+
+# Bump when the extracted pages, paragraphs or tables change, so cached extractions are not reused
+EXTRACTOR_VERSION = "1"
+
 
 def load_document(file_path):
     """
@@ -34,43 +42,15 @@ def load_document(file_path):
     
     # Get file extension
     ext = file_path.suffix.lower()
-    text = ""
     
     try:
         if ext == ".pdf":
-            try:
-                with pdfplumber.open(file_path) as pdf:
-                    # Extract text from each page
-                    for page in pdf.pages:
-                        # Extract text with better handling of layouts and formatting
-                        page_text = page.extract_text(x_tolerance=3, y_tolerance=3)
-                        if page_text:
-                            text += page_text + "\n"
-                        
-                        # Extract tables if present and format them
-                        tables = page.extract_tables()
-                        for table in tables:
-                            for row in table:
-                                # Filter out None values and empty strings
-                                row_text = [str(cell) for cell in row if cell and str(cell).strip()]
-                                if row_text:
-                                    text += " | ".join(row_text) + "\n"
-            except Exception as e:
-                raise ValueError(f"Invalid or corrupted PDF file: {str(e)}")
-                
+            # Unchanged files are read from the extraction cache instead of being parsed again
+            pages = cached_extraction(file_path, "simple_reviewer_pdf", EXTRACTOR_VERSION, lambda: extract_pdf(file_path))
+            text = render_pdf(pages)
         elif ext in [".docx", ".doc"]:
-            try:
-                doc = Document(file_path)
-                # Extract text from paragraphs
-                text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-                # Extract text from tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        text += "\n" + " | ".join([cell.text for cell in row.cells])
-            except BadZipFile:
-                raise ValueError(f"The file appears to be corrupted or not a valid Word document. Please ensure it's a proper .docx file.")
-            except Exception as e:
-                raise ValueError(f"Error reading Word document: {str(e)}")
+            extraction = cached_extraction(file_path, "simple_reviewer_docx", EXTRACTOR_VERSION, lambda: extract_docx(file_path))
+            text = render_docx(extraction)
         else:
             raise ValueError(f"Unsupported file type: {ext}")
         
@@ -86,6 +66,70 @@ def load_document(file_path):
         raise Exception(f"Error processing {file_path}: {str(e)}")
 
 
+def extract_pdf(file_path):
+    """
+    Extract the text and tables of each page of a PDF.
+    
+    Returns:
+        list: One {"text": str, "tables": [[[cell, ...], ...], ...]} per page
+    """
+    try:
+        pages = []
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages:
+                # Extract text with better handling of layouts and formatting
+                page_text = page.extract_text(x_tolerance=3, y_tolerance=3)
+                pages.append({"text": page_text or "", "tables": page.extract_tables()})
+        return pages
+    except Exception as e:
+        raise ValueError(f"Invalid or corrupted PDF file: {str(e)}")
+
+
+def render_pdf(pages):
+    """Text of the extracted PDF pages, each page followed by its tables."""
+    text = ""
+    for page in pages:
+        if page["text"]:
+            text += page["text"] + "\n"
+        
+        # Format the tables of the page
+        for table in page["tables"]:
+            for row in table:
+                # Filter out None values and empty strings
+                row_text = [str(cell) for cell in row if cell and str(cell).strip()]
+                if row_text:
+                    text += " | ".join(row_text) + "\n"
+    return text
+
+
+def extract_docx(file_path):
+    """
+    Extract the paragraphs and tables of a Word document.
+    
+    Returns:
+        dict: {"paragraphs": [str, ...], "tables": [[[cell, ...], ...], ...]}
+    """
+    try:
+        doc = Document(file_path)
+        return {
+            "paragraphs": [paragraph.text for paragraph in doc.paragraphs],
+            "tables": [[[cell.text for cell in row.cells] for row in table.rows] for table in doc.tables],
+        }
+    except BadZipFile:
+        raise ValueError(f"The file appears to be corrupted or not a valid Word document. Please ensure it's a proper .docx file.")
+    except Exception as e:
+        raise ValueError(f"Error reading Word document: {str(e)}")
+
+
+def render_docx(extraction):
+    """Text of the extracted Word document, paragraphs followed by the table rows."""
+    text = "\n".join(extraction["paragraphs"])
+    for table in extraction["tables"]:
+        for row in table:
+            text += "\n" + " | ".join(row)
+    return text
+
+
 def convert_to_markdown(text):
     """
     Convert extracted text to markdown format.
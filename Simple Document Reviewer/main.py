@@ -11,6 +11,8 @@ def main():
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(description='Review a document using AI models')
     parser.add_argument('document_file', help='Path to the document file to review')
+    parser.add_argument('--cache', action='store_true', default=None,
+                        help='Reuse cached LLM responses for identical prompts')
     
     args = parser.parse_args()
 
@@ -21,7 +23,7 @@ def main():
         print(f"Successfully loaded and converted document: {args.document_file}")
         print(f"Using {LLM_PROVIDER.upper()} as the language model provider\n")
 
-        reviews, improvements = review_document(markdown_text, model_provider=LLM_PROVIDER)
+        reviews, improvements = review_document(markdown_text, model_provider=LLM_PROVIDER, use_cache=args.cache)
         
         if reviews is None or improvements is None:
             print("Document review failed. Please check the error messages above.")
@@ -1,11 +1,15 @@
 # review_documentation.py
 import os
+import sys
 import argparse
-from langchain_openai import OpenAI
-from langchain_anthropic import ChatAnthropic
+from pathlib import Path
 from langchain.prompts import PromptTemplate
 from config import API_KEY, ANTHROPIC_API_KEY, LLM_PROVIDER
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_chat_model
+
 
 def load_agent_prompts(prompts_dir="agent_prompts"):
     """
@@ -22,16 +26,18 @@ def load_agent_prompts(prompts_dir="agent_prompts"):
     return agent_prompts
 
 
-def get_llm(model_provider=None):
+def get_llm(model_provider=None, use_cache=None):
     """
     Initialize the language model based on the provider.
     
     Args:
         model_provider (str, optional): The model provider to use ('openai' or 'anthropic').
                                       If None, uses the LLM_PROVIDER from environment.
+        use_cache (bool, optional): Reuse cached responses for identical prompts.
+                                    If None, uses DOCGEN_LLM_CACHE_SIMPLE_REVIEWER.
         
     Returns:
-        LLM: The language model instance
+        LLM: The shared language model instance from the client registry
         
     Raises:
         ValueError: If the model provider is not supported
@@ -42,16 +48,18 @@ def get_llm(model_provider=None):
     if provider == "openai":
         if not API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in the environment")
-        return OpenAI(temperature=0, openai_api_key=API_KEY)
+        return get_chat_model("openai-completion", "gpt-3.5-turbo-instruct", temperature=0, openai_api_key=API_KEY,
+                              cache_pipeline="SIMPLE_REVIEWER", use_cache=use_cache)
     elif provider == "anthropic":
         if not ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY is not set in the environment")
-        return ChatAnthropic(temperature=0, anthropic_api_key=ANTHROPIC_API_KEY, model="claude-2")
+        return get_chat_model("anthropic", "claude-2", temperature=0, anthropic_api_key=ANTHROPIC_API_KEY,
+                              cache_pipeline="SIMPLE_REVIEWER", use_cache=use_cache)
     else:
         raise ValueError(f"Unsupported model provider: {provider}. Use 'openai' or 'anthropic'.")
 
 
-def review_document(markdown_text, model_provider=None):
+def review_document(markdown_text, model_provider=None, use_cache=None):
     """
     Uses LangChain to review the markdown document from various perspectives
     and consolidates the reviews into actionable improvement suggestions.
@@ -60,10 +68,11 @@ def review_document(markdown_text, model_provider=None):
         markdown_text (str): The text to review
         model_provider (str, optional): The model provider to use ('openai' or 'anthropic').
                                       If None, uses the LLM_PROVIDER from environment.
+        use_cache (bool, optional): Reuse cached responses for identical prompts.
     """
     # Initialize the LLM
     try:
-        llm = get_llm(model_provider)
+        llm = get_llm(model_provider, use_cache=use_cache)
     except ValueError as e:
         print(f"Error: {e}")
         return None, None
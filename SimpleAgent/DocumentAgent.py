@@ -1,17 +1,23 @@
-from typing import Dict, List, TypedDict, Callable, Union
-from langgraph.graph import Graph, StateGraph
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from typing import Dict, List, Optional, TypedDict, Callable, Union
+from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from pathlib import Path
 import sys
-import re
 import time
 
 # Load environment variables
 load_dotenv()
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.outline import iter_file_sections
+from DocGenCommon.clients import get_chat_model
+from DocGenCommon.checkpoints import checkpoints_enabled, get_checkpoint_store, invoke_resumable, new_run_id
+
 class DocumentState(TypedDict):
     """The state of the document generation workflow"""
     sections: List[Dict[str, str]]  # List of sections with title and content
@@ -20,30 +26,18 @@ class DocumentState(TypedDict):
     review_feedback: List[str]      # Feedback from review agent
     improvements: List[str]         # Suggested improvements
     final_content: str             # Final improved content
-    error: str                     # Error messages
 
 def parse_markdown_file(file_path: str) -> List[Dict[str, str]]:
     """Parse markdown file into sections"""
-    sections = []
-    current_section = None
-    
     try:
-        with open(file_path, 'r') as file:
-            content = file.read()
-            
-        # Split content by headers
-        parts = re.split(r'^(#+ .*?)$', content, flags=re.MULTILINE)
-        
-        for i in range(1, len(parts), 2):
-            header = parts[i].strip()
-            content = parts[i + 1].strip() if i + 1 < len(parts) else ""
-            sections.append({
-                "title": header,
-                "prompt": content,
+        return [
+            {
+                "title": section.header,
+                "prompt": section.body.strip(),
                 "content": ""
-            })
-        
-        return sections
+            }
+            for section in iter_file_sections(file_path)
+        ]
     except Exception as e:
         raise ValueError(f"Error parsing markdown file: {str(e)}")
 
@@ -55,32 +49,25 @@ def create_initial_state(sections: List[Dict[str, str]]) -> DocumentState:
         generated_content="",
         review_feedback=[],
         improvements=[],
-        final_content="",
-        error=""
+        final_content=""
     )
 
 class DocumentAgent:
     def __init__(self, temperature=0.7, verbose=True):
-        # Initialize different LLMs for different tasks
-        self.writer = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=temperature
-        )
-        self.reviewer = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=0.3
-        )
-        self.improver = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=0.5
-        )
+        # Initialize different LLMs for different tasks, sharing one connection pool
+        self.writer = get_chat_model("openai", "gpt-4-turbo-preview", temperature=temperature)
+        self.reviewer = get_chat_model("openai", "gpt-4-turbo-preview", temperature=0.3)
+        self.improver = get_chat_model("openai", "gpt-4-turbo-preview", temperature=0.5)
         
         self.verbose = verbose
         
+        # Runs are checkpointed after every node so a failed one can be resumed, None when DOCGEN_CHECKPOINTS is off
+        self.checkpoints = get_checkpoint_store()
+        
         # Create the workflow graph
         self.workflow = self._create_workflow()
     
-    def _create_workflow(self) -> Graph:
+    def _create_workflow(self) -> CompiledStateGraph:
         workflow = StateGraph(DocumentState)
         
         # Add nodes
@@ -94,23 +81,23 @@ class DocumentAgent:
         workflow.add_edge("review_content", "improve_content")
         workflow.add_edge("improve_content", "finalize_section")
         
-        # Define conditional routing
-        def router(state: DocumentState) -> Dict[str, str]:
-            if state["current_section"] < len(state["sections"]) - 1:
-                return {"next": "generate_content"}
-            return {"next": "end"}
+        # Define conditional routing: next section, or end after the last one
+        def router(state: DocumentState) -> str:
+            if state["current_section"] < len(state["sections"]):
+                return "generate_content"
+            return "end"
         
-        workflow.add_node("router", router)
-        workflow.add_edge("finalize_section", "router")
         workflow.add_conditional_edges(
-            "router",
-            lambda x: x["next"]
+            "finalize_section",
+            router,
+            {"generate_content": "generate_content", "end": END}
         )
         
         # Set entry point
         workflow.set_entry_point("generate_content")
         
-        return workflow.compile()
+        # Save the state after every node when checkpoints are on
+        return workflow.compile(checkpointer=self.checkpoints.saver if self.checkpoints else None)
     
     def _generate_content(self, state: DocumentState) -> Dict:
         """Generate content for current section"""
@@ -135,7 +122,7 @@ class DocumentAgent:
             
             return {"generated_content": response.content}
         except Exception as e:
-            return {"error": f"Content generation error: {str(e)}"}
+            raise RuntimeError(f"Content generation error: {str(e)}") from e
     
     def _review_content(self, state: DocumentState) -> Dict:
         """Review the generated content"""
@@ -170,7 +157,7 @@ class DocumentAgent:
             
             return {"review_feedback": feedback}
         except Exception as e:
-            return {"error": f"Review error: {str(e)}"}
+            raise RuntimeError(f"Review error: {str(e)}") from e
     
     def _improve_content(self, state: DocumentState) -> Dict:
         """Improve content based on review feedback"""
@@ -196,32 +183,35 @@ class DocumentAgent:
             
             return {"final_content": response.content}
         except Exception as e:
-            return {"error": f"Improvement error: {str(e)}"}
+            raise RuntimeError(f"Improvement error: {str(e)}") from e
     
     def _finalize_section(self, state: DocumentState) -> Dict:
         """Finalize the current section and prepare for the next"""
-        try:
-            # Update the current section's content
-            state["sections"][state["current_section"]]["content"] = state["final_content"]
-            
-            if self.verbose:
-                print(f"Completed section: {state['sections'][state['current_section']]['title']}")
-                print("-" * 50)
-            
-            # Move to next section if available
-            if state["current_section"] < len(state["sections"]) - 1:
-                return {
-                    "current_section": state["current_section"] + 1,
-                    "generated_content": "",
-                    "review_feedback": [],
-                    "final_content": ""
-                }
-            return {}
-        except Exception as e:
-            return {"error": f"Finalization error: {str(e)}"}
+        # Update the current section's content in a new list, the checkpointed state is not modified in place
+        sections = list(state["sections"])
+        sections[state["current_section"]] = {**sections[state["current_section"]], "content": state["final_content"]}
+        
+        if self.verbose:
+            print(f"Completed section: {sections[state['current_section']]['title']}")
+            print("-" * 50)
+        
+        # Move to the next section, the router ends the run after the last one
+        return {
+            "sections": sections,
+            "current_section": state["current_section"] + 1,
+            "generated_content": "",
+            "review_feedback": [],
+            "final_content": ""
+        }
     
-    def generate_document(self, markdown_file: str) -> str:
-        """Process markdown file and generate complete document"""
+    def generate_document(self, markdown_file: str, run_id: Optional[str] = None) -> str:
+        """
+        Process markdown file and generate complete document.
+        
+        Runs are checkpointed under a run ID: generating the same markdown file again
+        with the ID of a failed run resumes it at the failed step, the sections already
+        completed are not generated again.
+        """
         try:
             # Parse markdown file
             if self.verbose:
@@ -237,8 +227,20 @@ class DocumentAgent:
             # Create initial state
             initial_state = create_initial_state(sections)
             
-            # Run the workflow
-            final_state = self.workflow.invoke(initial_state)
+            # Run the workflow, every section takes four steps
+            config = {"recursion_limit": 4 * len(sections) + 10}
+            if self.checkpoints is None:
+                final_state = self.workflow.invoke(initial_state, config)
+            else:
+                run_id = run_id or new_run_id("document")
+                if self.verbose:
+                    print(f"Run ID: {run_id}")
+                outline = [(section["title"], section["prompt"]) for section in sections]
+                final_state = invoke_resumable(
+                    self.workflow, "document_agent", initial_state, run_id, config, description=markdown_file,
+                    compatible=lambda saved: [(section["title"], section["prompt"]) for section in saved["sections"]] == outline,
+                    store=self.checkpoints
+                )
             
             # Combine all sections into final document
             if self.verbose:
@@ -281,11 +283,15 @@ Explore upcoming trends in AI development
             print("Please enter a valid file path.")
             continue
         
+        run_id = None
+        if checkpoints_enabled():
+            run_id = input("Run ID to resume (leave empty for a new run): ").strip() or None
+        
         # Process document
         print("\nStarting document generation process...")
         try:
             agent = DocumentAgent(verbose=True)
-            document = agent.generate_document(file_path)
+            document = agent.generate_document(file_path, run_id=run_id)
             
             # Save the generated document
             output_file = "generated_document.md"
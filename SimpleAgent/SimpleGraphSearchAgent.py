@@ -1,17 +1,21 @@
 from typing import Dict, List, Tuple, Any, TypedDict
 from langgraph.graph import Graph, StateGraph
-from langchain_openai import ChatOpenAI
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from pathlib import Path
 import sys
 
 # Load environment variables
 load_dotenv()
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_chat_model
+
 class AgentState(TypedDict):
     """The state of the agent's workflow"""
     query: str
@@ -31,10 +35,7 @@ def create_initial_state(query: str) -> AgentState:
 class GraphSearchAgent:
     def __init__(self, temperature=0.7):
         # Initialize tools and models
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=temperature
-        )
+        self.llm = get_chat_model("openai", "gpt-4-turbo-preview", temperature=temperature)
         #self.search_tool = DuckDuckGoSearchRun()
         self.search_tool = TavilySearchResults(max_results=2)
         # Create the workflow graph
@@ -3,17 +3,26 @@ from langchain.agents import AgentType, initialize_agent
 from langchain.tools import DuckDuckGoSearchRun
 from langchain.memory import ConversationBufferMemory
 from dotenv import load_dotenv
+from pathlib import Path
 import sys
 
 # Load environment variables
 load_dotenv()
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_registry
+
 class WebSearchAgent:
     def __init__(self, temperature=0.7):
-        # Initialize the language model
+        # Initialize the language model, initialize_agent needs the raw model
+        # so it only shares the registry's OpenAI connection pool
+        http_client, http_async_client = get_registry().http_clients("openai")
         self.llm = ChatOpenAI(
             model="gpt-4-turbo-preview",
-            temperature=temperature
+            temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client
         )
         
         # Initialize the search tool
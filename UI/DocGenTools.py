@@ -1,23 +1,32 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import List
+from pathlib import Path
 from dotenv import load_dotenv
+import sys
 
 # Load environment variables
 load_dotenv()
 
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.clients import get_chat_model
+from DocGenCommon.outline import iter_sections
+
 class DocumentSection(BaseModel):
     title: str = Field(description="The title of the section")
     content: str = Field(description="The generated content for the section")
     improvements: List[str] = Field(description="List of suggested improvements")
 
 class LangChainHandler:
-    def __init__(self, temperature=0.3):
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=temperature
+    def __init__(self, temperature=0.3, use_cache=None):
+        self.llm = get_chat_model(
+            "openai",
+            "gpt-4-turbo-preview",
+            temperature=temperature,
+            cache_pipeline="UI",
+            use_cache=use_cache
         )
         self.parser = PydanticOutputParser(pydantic_object=DocumentSection)
 
@@ -52,28 +61,15 @@ class LangChainHandler:
 
 def extract_sections(markdown_text: str) -> List[dict]:
     """Extract sections from markdown text based on headers."""
-    sections = []
-    current_section = {"title": "", "content": "", "is_empty": True}
-    
-    for line in markdown_text.split('\n'):
-        if line.startswith('#'):
-            if current_section["title"]:  # Don't add the initial empty section
-                sections.append(current_section)
-            current_section = {
-                "title": line.lstrip('#').strip(),
-                "content": "",
-                "is_empty": True
-            }
-        else:
-            content_line = line.strip()
-            if content_line:  # If there's any non-empty content
-                current_section["is_empty"] = False
-            current_section["content"] += line + "\n"
-    
-    if current_section["title"]:  # Add the last section if it exists
-        sections.append(current_section)
-    
-    return sections
+    return [
+        {
+            "title": section.title,
+            "content": section.body,
+            "is_empty": section.is_empty
+        }
+        for section in iter_sections(markdown_text)
+        if section.title  # Skip headers without a title
+    ]
 
 def generate_markdown_download(sections: List[dict]) -> str:
     """Generate a markdown string from the sections."""
@@ -0,0 +1,78 @@
+"""Near-duplicate finding deduplication of the DocumentReviewer, MinHash/LSH against pairwise.
+
+Generates findings the way a batch of reviews produces them (a pool of distinct
+findings, each raised several times with small wording changes) and clusters
+them with the MinHash/LSH deduplicator and, up to --pairwise-max findings, with
+an exact pairwise Jaccard comparison of the same shingles.
+
+    python benchmarks/finding_dedup.py --sizes 1000 10000 100000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "DocumentReviewer"))
+
+from src.core.dedup import MinHashDeduplicator, normalize  # noqa: E402
+
+EDITS = ("", ".", " now", " in the current design", " (see section 3)")
+
+
+def findings(count: int, seed: int = 0) -> list:
+    """count findings drawn from count // 4 distinct ones, with small variations."""
+    rng = random.Random(seed)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    distinct = [" ".join(rng.choice(words) for _ in range(rng.randint(8, 20))) for _ in range(max(1, count // 4))]
+    return [rng.choice(distinct) + rng.choice(EDITS) for _ in range(count)]
+
+
+def pairwise_clusters(texts: list, threshold: float, shingle_size: int) -> int:
+    """Number of clusters found by comparing every pair of texts."""
+    def grams(text):
+        normalized = normalize(text)
+        return {normalized[i:i + shingle_size] for i in range(max(1, len(normalized) - shingle_size + 1))}
+    sets = [grams(text) for text in texts]
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(sets)):
+        for j in range(i + 1, len(sets)):
+            if len(sets[i] & sets[j]) / len(sets[i] | sets[j]) >= threshold:
+                parent[find(j)] = find(i)
+    return len({find(i) for i in range(len(texts))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000, 64000])
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--pairwise-max", type=int, default=2000, help="Largest size also clustered pairwise")
+    args = parser.parse_args()
+
+    deduplicator = MinHashDeduplicator(threshold=args.threshold)
+    print(f"{'findings':>9} {'minhash s':>10} {'clusters':>9} {'pairwise s':>11} {'clusters':>9}")
+    for size in args.sizes:
+        texts = findings(size)
+        start = time.perf_counter()
+        clusters = len(deduplicator.clusters(texts))
+        minhash_time = time.perf_counter() - start
+        line = f"{size:>9} {minhash_time:>10.2f} {clusters:>9}"
+        if size <= args.pairwise_max:
+            start = time.perf_counter()
+            exact = pairwise_clusters(texts, args.threshold, deduplicator.shingle_size)
+            line += f" {time.perf_counter() - start:>11.2f} {exact:>9}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
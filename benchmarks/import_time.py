@@ -0,0 +1,99 @@
+"""Measure the import (cold start) time of every entry point with python -X importtime.
+
+Each entry point is imported in a fresh interpreter, the importtime report is
+parsed and the total, the heaviest top-level imports and the provider SDKs that
+were loaded are printed. The script exits with status 1 when an entry point is
+over the startup budget, so it can guard against eager imports creeping back.
+
+    python benchmarks/import_time.py --budget-ms 1500 --repeat 3
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# name: (working directory, directory added to sys.path, module to import)
+ENTRY_POINTS = {
+    "OpenDocGen": (".", "OpenDocGen", "OpenDocGen"),
+    "DocGenReflect": (".", "DocGenReflect", "DocGenReflect"),
+    "DocGenTeam": (".", "DocGenTeam", "DocGenTeam"),
+    "UIOpenDocGen": (".", "UI", "UIOpenDocGen"),
+    "DocumentAgent": (".", "SimpleAgent", "DocumentAgent"),
+    "DocumentReviewer": ("DocumentReviewer", ".", "src.main"),
+    "Simple Document Reviewer": ("Simple Document Reviewer", ".", "main"),
+}
+
+# Optional provider / tool SDKs that should only be imported when actually used
+PROVIDER_PACKAGES = (
+    "langchain_openai", "langchain_anthropic", "langchain_groq", "langchain_ollama",
+    "langchain_community", "tavily", "duckduckgo_search",
+)
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def measure(cwd: str, path: str, module: str) -> dict:
+    """Import module in a fresh interpreter and summarise its -X importtime report."""
+    env = dict(os.environ)
+    # config modules refuse to import without keys, the values are never used
+    env.setdefault("OPENAI_API_KEY", "import-time-benchmark")
+    env.setdefault("LLM_PROVIDER", "openai")
+    code = f"import sys; sys.path.insert(0, {path!r}); import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT / cwd, env=env, capture_output=True, text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    error = None
+    if result.returncode != 0:
+        error = next((line for line in reversed(result.stderr.splitlines()) if line.strip()), "import failed")
+    return {
+        "total_ms": sum(self_us for _, self_us, _, _ in modules) / 1000,
+        "top": sorted(((name, cumulative) for name, _, cumulative, depth in modules if depth == 0),
+                      key=lambda item: item[1], reverse=True)[:5],
+        "providers": sorted({name.split(".")[0] for name, _, _, _ in modules} & set(PROVIDER_PACKAGES)),
+        "error": error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark of the entry points")
+    parser.add_argument("--budget-ms", type=float, default=2000, help="Maximum import time per entry point")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point, the fastest one is reported")
+    parser.add_argument("entry_points", nargs="*", help=f"Subset of {list(ENTRY_POINTS)}")
+    args = parser.parse_args()
+
+    over_budget, failures = [], []
+    for name in args.entry_points or ENTRY_POINTS:
+        runs = [measure(*ENTRY_POINTS[name]) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["total_ms"])
+        status = "OK" if best["total_ms"] <= args.budget_ms else "OVER BUDGET"
+        if best["error"]:
+            status = f"FAILED ({best['error']})"
+            failures.append(name)
+        elif best["total_ms"] > args.budget_ms:
+            over_budget.append(name)
+        print(f"\n{name}: {best['total_ms']:.0f} ms [{status}]")
+        print(f"  provider SDKs imported: {', '.join(best['providers']) or 'none'}")
+        for module, cumulative in best["top"]:
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    if failures:
+        print(f"\nFailed to import: {', '.join(failures)}")
+    if over_budget:
+        print(f"\nOver the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+    if failures or over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Drive the LLM scheduler against the local fake endpoint.
+
+Starts DocGenCommon/fake_llm_server.py in-process with a low RPM limit and
+random 429s, fires concurrent ChatOpenAI calls through the scheduler and prints
+the scheduler metrics next to what the endpoint observed.
+
+    python benchmarks/llm_scheduler.py --requests 60 --rpm 120 --error-rate 0.2
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from langchain_openai import ChatOpenAI
+
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.fake_llm_server import FakeLLMServer
+from DocGenCommon.scheduler import LLMScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercise the LLM scheduler against a fake endpoint")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=16, help="Callers submitting requests concurrently")
+    parser.add_argument("--rpm", type=int, default=120, help="Endpoint limit before it answers 429")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Random 429 rate of the endpoint")
+    parser.add_argument("--scheduler-rpm", type=float, default=0, help="Client side RPM budget (0 = unlimited)")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(rpm=args.rpm, error_rate=args.error_rate).start()
+    scheduler = LLMScheduler(
+        requests_per_minute=args.scheduler_rpm,
+        max_concurrency=args.max_concurrency,
+        base_delay=0.2,
+        max_retries=8,
+    )
+    llm = scheduler.wrap(ChatOpenAI(model="fake", base_url=server.base_url, api_key="fake", max_retries=0))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(lambda i: llm.invoke(f"section {i}").content, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(results)} calls completed in {elapsed:.2f}s")
+    print("endpoint :", server.counts)
+    print("scheduler:", scheduler.metrics())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark the shared outline parser against the splitters it replaced.
+
+Generates synthetic outlines of growing size and reports the parse time and
+throughput of each implementation, so non-linear behaviour shows up as a
+falling MB/s column.
+
+    python benchmarks/outline_parser.py --sizes 1 2 4 8 16
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Make the shared DocGenCommon package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from DocGenCommon.outline import iter_sections
+
+
+# ---- previous implementations, kept verbatim for comparison ----
+
+def legacy_opendocgen(content):
+    pattern = r"(## .+?)(?=\n## |$)"
+    matches = re.finditer(pattern, content, flags=re.DOTALL)
+    return [(m.group(0).splitlines()[0].strip(), "\n".join(m.group(0).splitlines()[1:]).strip()) for m in matches]
+
+
+def legacy_docgentools(markdown_text):
+    sections = []
+    current_section = {"title": "", "content": "", "is_empty": True}
+    for line in markdown_text.split('\n'):
+        if line.startswith('#'):
+            if current_section["title"]:
+                sections.append(current_section)
+            current_section = {"title": line.lstrip('#').strip(), "content": "", "is_empty": True}
+        else:
+            if line.strip():
+                current_section["is_empty"] = False
+            current_section["content"] += line + "\n"
+    if current_section["title"]:
+        sections.append(current_section)
+    return sections
+
+
+def legacy_documentagent(content):
+    sections = []
+    parts = re.split(r'^(#+ .*?)$', content, flags=re.MULTILINE)
+    for i in range(1, len(parts), 2):
+        sections.append({"title": parts[i].strip(), "prompt": parts[i + 1].strip() if i + 1 < len(parts) else ""})
+    return sections
+
+
+def unified(content):
+    return sum(1 for _ in iter_sections(content))
+
+
+def unified_level2(content):
+    return sum(1 for _ in iter_sections(content, levels=(2,)))
+
+
+IMPLEMENTATIONS = {
+    "OpenDocGen regex": legacy_opendocgen,
+    "DocGenTools +=": legacy_docgentools,
+    "DocumentAgent re.split": legacy_documentagent,
+    "outline (all levels)": unified,
+    "outline (## only)": unified_level2,
+}
+
+
+def make_outline(size_mb: float, section_kb: float) -> str:
+    """Build an outline of roughly size_mb made of sections of roughly section_kb."""
+    line = "Describe the component, its interfaces and the non functional requirements.\n"
+    lines_per_section = max(1, int(section_kb * 1024 / len(line)))
+    body = line * lines_per_section
+    sections = []
+    total = 0
+    index = 0
+    while total < size_mb * 1024 * 1024:
+        chunk = f"## Section {index}\n{body}\n### Detail {index}\n{line}\n"
+        sections.append(chunk)
+        total += len(chunk)
+        index += 1
+    return "".join(sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown outline parsers")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8], help="Outline sizes in MB")
+    parser.add_argument("--section-kb", type=float, nargs="+", default=[2, 256, 1024],
+                        help="Approximate section sizes in KB (small sections and very large ones)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best one is reported")
+    args = parser.parse_args()
+
+    for section_kb in args.section_kb:
+        print(f"\nSections of ~{section_kb:g} KB")
+        print(f"{'implementation':<24}" + "".join(f"{f'{size:g} MB':>18}" for size in args.sizes))
+        outlines = [make_outline(size, section_kb) for size in args.sizes]
+        for name, func in IMPLEMENTATIONS.items():
+            cells = []
+            for outline in outlines:
+                best = float("inf")
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    func(outline)
+                    best = min(best, time.perf_counter() - started)
+                throughput = len(outline) / (1024 * 1024) / best
+                cells.append(f"{best * 1000:8.1f}ms {throughput:5.0f}MB/s")
+            print(f"{name:<24}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
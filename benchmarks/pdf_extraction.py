@@ -0,0 +1,85 @@
+"""PDF text extraction throughput of the DocumentReviewer document processor.
+
+Compares the serial extraction (one reader in this process) with the page
+ranges extracted by a process pool, and checks both return the same pages.
+Without a PDF, a synthetic architecture document is generated.
+
+    python benchmarks/pdf_extraction.py --pages 300 --workers 8
+    python benchmarks/pdf_extraction.py path/to/document.pdf
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "DocumentReviewer"))
+
+from src.core.document_processor import DocumentProcessor  # noqa: E402
+
+LINE = "The {n} service stores customer records in an encrypted database behind a private API gateway."
+
+
+def synthetic_pdf(path: Path, pages: int, lines: int = 45):
+    """Write a PDF of text pages using only the base Helvetica font."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = "\n".join(f"({LINE.format(n=f'{page}-{line}')}) Tj T*" for line in range(lines))
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td\n{text}\nET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    data, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(data))
+
+
+def measure(name: str, extract, repeat: int):
+    """Best of repeat runs, returns the pages."""
+    best, pages = None, []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = extract()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<22} {len(pages):>5} pages {best:7.2f} s {len(pages) / best:9.1f} pages/s")
+    return pages, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf", nargs="?", help="PDF to extract (default: a generated one)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages of the generated PDF")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each mode, the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.pdf) if args.pdf else Path(tmp) / "synthetic.pdf"
+        if not args.pdf:
+            synthetic_pdf(path, args.pages)
+        serial, serial_time = measure("serial", lambda: DocumentProcessor.extract_pdf_pages(str(path), workers=1),
+                                      args.repeat)
+        parallel, parallel_time = measure(
+            f"process pool ({args.workers})",
+            lambda: DocumentProcessor.extract_pdf_pages(str(path), workers=args.workers, min_pages=1),
+            args.repeat)
+    print(f"speed-up: {serial_time / parallel_time:.2f}x, same pages: {serial == parallel}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Peak memory of concurrent DocumentReviewer workflows, document by value or by reference.
+
+Runs the review graph topology (five agents fanned out, then an aggregator)
+with agents that only read the document, so no LLM is called, for several
+documents at the same time. "by value" is the former state carrying the whole
+Document, "by reference" the current state carrying a DocumentStore ID. With
+--checkpoint the graph is compiled with an in-memory checkpointer, which stores a
+copy of the state at every step like a persistent checkpointer would.
+
+    python benchmarks/review_state_memory.py --documents 8 --document-mb 2 --checkpoint
+"""
+import argparse
+import sys
+import threading
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Annotated, Any, Dict, TypedDict
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "DocumentReviewer"))
+
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+from langgraph.graph import END, START, StateGraph  # noqa: E402
+
+from src.core.document_processor import Document  # noqa: E402
+from src.core.document_store import DocumentStore  # noqa: E402
+from src.core.orchestrator import merge_reviews  # noqa: E402
+
+AGENTS = ["enterprise", "solution", "infrastructure", "security", "aws"]
+
+
+class ValueState(TypedDict):
+    document: Document
+    reviews: Annotated[Dict[str, Any], merge_reviews]
+    final_report: Dict[str, Any]
+
+
+class ReferenceState(TypedDict):
+    document_id: str
+    reviews: Annotated[Dict[str, Any], merge_reviews]
+    final_report: Dict[str, Any]
+
+
+def build(state_type, read_document, checkpoint: bool):
+    """The orchestrator's graph with agents that only measure the document."""
+    workflow = StateGraph(state_type)
+    for name in AGENTS:
+        def node(state, name=name):
+            document = read_document(state)
+            return {"reviews": {name: {"characters": len(document.content), "findings": [f"{name} finding"]}}}
+        workflow.add_node(name, node)
+        workflow.add_edge(START, name)
+    workflow.add_node("aggregator", lambda state: {"final_report": {"path": read_document(state).file_path,
+                                                                    "reviews": state["reviews"]}})
+    workflow.add_edge(AGENTS, "aggregator")
+    workflow.add_edge("aggregator", END)
+    return workflow.compile(checkpointer=InMemorySaver() if checkpoint else None)
+
+
+def make_document(number: int, size: int) -> Document:
+    line = f"Document {number}: the service stores records in an encrypted database behind an API gateway.\n"
+    return Document(content=line * (size // len(line)), file_path=f"design-{number}.pdf", file_type=".pdf")
+
+
+def measure(name: str, run, documents: int, size: int):
+    """Peak traced memory of reviewing the documents concurrently, the documents themselves excluded."""
+    inputs = [make_document(number, size) for number in range(documents)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    threads = [threading.Thread(target=run, args=(document,)) for document in inputs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    print(f"{name:<14} peak {peak / 2**20:8.1f} MB, {peak / documents / 2**20:7.2f} MB per concurrent review")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=8, help="Documents reviewed at the same time")
+    parser.add_argument("--document-mb", type=float, default=2.0, help="Size of each document's text")
+    parser.add_argument("--checkpoint", action="store_true", help="Compile the graphs with a checkpointer")
+    args = parser.parse_args()
+    size = int(args.document_mb * 2**20)
+    config = lambda: {"configurable": {"thread_id": str(uuid.uuid4())}}  # noqa: E731
+
+    by_value = build(ValueState, lambda state: state["document"], args.checkpoint)
+    measure("by value", lambda document: by_value.invoke(
+        {"document": document, "reviews": {}, "final_report": {}}, config()), args.documents, size)
+
+    store = DocumentStore()
+    by_reference = build(ReferenceState, lambda state: store.get(state["document_id"]), args.checkpoint)
+
+    def run_by_reference(document):
+        document_id = store.put(document)
+        try:
+            by_reference.invoke({"document_id": document_id, "reviews": {}, "final_report": {}}, config())
+        finally:
+            store.release(document_id)
+    measure("by reference", run_by_reference, args.documents, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Heap growth of the DocGenTeam shared memory over many documents.
+
+Simulates coordinator_agent runs (four agent turns per document) without LLM
+calls and compares an unbounded buffer, like the ConversationBufferMemory the
+team used before, with the bounded TeamMemory, using tracemalloc.
+
+    python benchmarks/team_memory.py --documents 5000 --turn-kb 8
+"""
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "DocGenTeam"))
+
+from TeamMemory import TeamMemory  # noqa: E402
+
+ROLES = ("Architect-Agent", "Reviewer-Agent", "Editor-Agent", "Publisher-Agent")
+
+
+def agent_output(document: int, role: str, size: int) -> str:
+    line = f"{role} output for document {document}: architecture, security and deployment notes.\n"
+    return line * (size // len(line) + 1)
+
+
+def measure(name: str, save, documents: int, size: int, checkpoints: int = 5):
+    """Print the traced heap at a few points of the run."""
+    tracemalloc.start()
+    step = max(1, documents // checkpoints)
+    print(f"\n{name}")
+    for document in range(1, documents + 1):
+        for role in ROLES:
+            save(f"doc-{document}", role, agent_output(document, role, size))
+        if document % step == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"  {document:>7} documents: {current / 2**20:8.1f} MB current, {peak / 2**20:8.1f} MB peak")
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heap growth of the team memory")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--turn-kb", type=int, default=8, help="Size of each agent output")
+    parser.add_argument("--max-kb", type=int, default=64, help="TeamMemory budget per document")
+    parser.add_argument("--max-documents", type=int, default=16)
+    args = parser.parse_args()
+
+    buffer = []
+    measure("Unbounded buffer", lambda document, role, text: buffer.append((role, text)),
+            args.documents, args.turn_kb * 1024)
+    buffer.clear()
+
+    memory = TeamMemory(max_bytes=args.max_kb * 1024, max_documents=args.max_documents)
+    measure(f"TeamMemory ({args.max_kb} KB x {args.max_documents} documents)", memory.save,
+            args.documents, args.turn_kb * 1024)
+    print(f"  metrics: {memory.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Put the script folders on the import path, the projects import their modules as top-level names."""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for folder in (ROOT, ROOT / "DocGenTeam", ROOT / "DocumentReviewer"):
+    if str(folder) not in sys.path:
+        sys.path.insert(0, str(folder))
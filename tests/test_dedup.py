@@ -0,0 +1,40 @@
+from src.core.dedup import MinHashDeduplicator, _jaccard, _shingle_hashes, dedup_items
+
+
+def item(text, agent="Security Architect"):
+    return {"text": text, "agent": agent}
+
+
+def test_rewordings_merge_and_keep_their_variants():
+    clusters = dedup_items([
+        item("Data at rest is not encrypted in the customer database."),
+        item("data at rest is not encrypted in the customer database", "Data Architect"),
+        item("Data at rest is not encrypted in the customer databases.", "Solution Architect"),
+    ])
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert cluster.count == 3
+    assert cluster.agents == ["Security Architect", "Data Architect", "Solution Architect"]
+    assert cluster.text == "Data at rest is not encrypted in the customer databases."
+    # the case and punctuation variant is the same finding, the plural is kept
+    assert cluster.variants == ["Data at rest is not encrypted in the customer database."]
+
+
+def test_findings_saying_different_things_stay_apart():
+    texts = ["Data is not encrypted at rest.", "Data is not encrypted in transit.",
+             "The API has no rate limiting.", "The API has rate limiting."]
+    assert [len(cluster.agents) for cluster in dedup_items([item(text) for text in texts])] == [1, 1, 1, 1]
+
+
+def test_threshold_is_checked_exactly():
+    left, right = "The API gateway has no request rate limiting.", "The API gateway has request rate limiting."
+    similarity = _jaccard(_shingle_hashes(left, 4), _shingle_hashes(right, 4))
+    assert 0.5 < similarity < 0.9
+    assert MinHashDeduplicator(threshold=similarity - 0.01).clusters([left, right]) == [[0, 1]]
+    assert MinHashDeduplicator(threshold=similarity + 0.01).clusters([left, right]) == [[0], [1]]
+
+
+def test_signatures_are_reproducible():
+    texts = ["one finding", "another finding"]
+    assert (MinHashDeduplicator(seed=3).signatures(texts) == MinHashDeduplicator(seed=3).signatures(texts)).all()
+    assert MinHashDeduplicator().clusters([]) == []
@@ -0,0 +1,50 @@
+from DocPatch import apply_patch, section_headers
+
+DOCUMENT = """Preamble text.
+
+# Title
+
+## Security
+
+old security
+
+### Encryption
+
+old enc
+
+## Deployment
+
+deploy
+"""
+
+
+def test_replace_covers_the_subsections():
+    patched = apply_patch(DOCUMENT, [{
+        "op": "replace", "section": "## Security",
+        "content": "## Security\n\nnew security\n\n### Encryption\n\nnew enc",
+    }])
+    assert patched.count("### Encryption") == 1
+    assert "old enc" not in patched and "new enc" in patched
+    assert patched == DOCUMENT.replace("old security", "new security").replace("old enc", "new enc")
+
+
+def test_untouched_sections_are_kept_byte_for_byte():
+    document = DOCUMENT.replace("deploy\n", "deploy  \n\n\n\nmore\n")
+    patched = apply_patch(document, [{"op": "replace", "section": "### Encryption", "content": "### Encryption\nnew"}])
+    assert patched == document.replace("### Encryption\n\nold enc", "### Encryption\nnew")
+
+
+def test_insert_after_and_delete_span_the_subtree():
+    patched = apply_patch(DOCUMENT, [
+        {"op": "insert_after", "section": "## Security", "content": "## Compliance\n\nrules"},
+        {"op": "delete", "section": "## Deployment"},
+    ])
+    assert patched.endswith("old enc\n\n## Compliance\n\nrules\n\n")
+    assert section_headers(patched) == ["# Title", "## Security", "### Encryption", "## Compliance"]
+
+
+def test_headers_in_code_blocks_are_not_sections():
+    document = "## Usage\n\n```\n## not a header\n```\n\n## Next\n"
+    assert section_headers(document) == ["## Usage", "## Next"]
+    patched = apply_patch(document, [{"op": "replace", "section": "## Usage", "content": "## Usage\nnew"}])
+    assert patched == "## Usage\nnew\n\n## Next\n"
@@ -0,0 +1,72 @@
+from src.core.document_processor import Document, DocumentSection
+from src.core.incremental import (attribute_items, chunk_hash, content_defined_chunks, diff_chunks, merge_items,
+                                  revalidation_chunks)
+
+TOPICS = ["storage", "network", "identity", "logging", "billing", "backup", "search", "queue"]
+
+
+def document(paragraphs):
+    return Document(content="\n".join(paragraphs), file_path="doc.pdf", file_type=".pdf",
+                    sections=[DocumentSection(label="page 1", text="\n".join(paragraphs))])
+
+
+def paragraphs():
+    lines = [f"The {topic} service keeps its {topic} records in region {i} with {topic} replicas."
+             for i, topic in enumerate(TOPICS * 8)]
+    lines[5] = "The audit trail is written to an unencrypted bucket shared by all tenants."
+    return lines
+
+
+def test_edit_revalidates_only_the_edited_chunk():
+    before = content_defined_chunks(document(paragraphs()), target_tokens=100)
+    reviews = {"Security Architect": {
+        "findings": ["Finding 1", "Finding 2", "The audit trail bucket is unencrypted and shared by tenants"],
+        "recommendations": ["Recommendation 1"], "risk_level": "MEDIUM"}}
+    previous = attribute_items(reviews, before)
+    assert [item["chunks"] for item in previous[:2]] == [[], []]
+    assert previous[2]["chunks"] == [before[0].digest]
+
+    edited = paragraphs()
+    edited[30] = edited[30].replace("records", "entries")
+    after = content_defined_chunks(document(edited), target_tokens=100)
+    changed, unchanged, removed = diff_chunks([chunk.digest for chunk in before], after)
+    assert len(changed) == 1 and len(removed) == 1
+
+    revalidated = revalidation_chunks(previous, unchanged)
+    reviewed = [chunk for chunk in after if chunk.digest not in unchanged or chunk.digest in revalidated]
+    assert reviewed == changed
+
+    items = merge_items(previous, [], unchanged)
+    assert {item["status"] for item in items} == {"reused"}
+
+
+def test_local_edit_keeps_the_other_chunk_boundaries():
+    before = content_defined_chunks(document(paragraphs()), target_tokens=100)
+    edited = paragraphs()
+    edited.insert(20, "A new paragraph about the network failover runbook and its owners.")
+    after = content_defined_chunks(document(edited), target_tokens=100)
+
+    changed, unchanged, removed = diff_chunks([chunk.digest for chunk in before], after)
+    assert len(changed) == len(removed) == 1
+    assert len(unchanged) == len(before) - 1
+    # the chunks after the edit hash the same though their position moved
+    assert [chunk.digest for chunk in after[-3:]] == [chunk.digest for chunk in before[-3:]]
+
+
+def test_chunks_ignore_blank_lines_and_spacing():
+    lines = paragraphs()
+    reflowed = content_defined_chunks(document(lines[:10] + ["", "   "] + lines[10:]), target_tokens=100)
+    assert [chunk.digest for chunk in reflowed] == \
+        [chunk.digest for chunk in content_defined_chunks(document(lines), target_tokens=100)]
+    assert chunk_hash("a  b\n c ") == chunk_hash("a b c")
+
+
+def test_dropped_and_fresh_items():
+    previous = [{"agent": "A", "kind": "findings", "text": "edited", "chunks": ["x", "y"], "risk_level": "HIGH"},
+                {"agent": "A", "kind": "findings", "text": "kept", "chunks": ["y"], "risk_level": "LOW"},
+                {"agent": "A", "kind": "findings", "text": "raised again", "chunks": ["x"], "risk_level": "LOW"}]
+    fresh = [{"agent": "A", "kind": "findings", "text": "raised again", "chunks": ["z"], "risk_level": "HIGH"}]
+    assert revalidation_chunks(previous, {"y"}) == {"y"}
+    statuses = {item["text"]: (item["status"], item["chunks"]) for item in merge_items(previous, fresh, {"y"})}
+    assert statuses == {"edited": ("dropped", ["x", "y"]), "kept": ("reused", ["y"]),
+                        "raised again": ("fresh", ["z"])}
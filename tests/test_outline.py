@@ -0,0 +1,61 @@
+import io
+
+from DocGenCommon.outline import iter_file_sections, iter_sections, iter_stream_sections
+
+OUTLINE = """Preamble.
+
+# Title
+
+## Usage
+
+```bash
+# a shell comment, not a header
+~~~
+## still code
+```
+
+text after the code
+
+~~~~
+### fenced with tildes
+~~~~
+
+## Next
+body
+"""
+
+
+def headers(sections):
+    return [section.header for section in sections]
+
+
+def test_headers_in_fenced_code_are_body_text():
+    sections = list(iter_sections(OUTLINE))
+    assert headers(sections) == ["# Title", "## Usage", "## Next"]
+    assert "# a shell comment, not a header\n" in sections[1].body
+    assert "### fenced with tildes\n" in sections[1].body
+    assert sections[1].body.endswith("~~~~\n\n")
+
+
+def test_levels_and_preamble():
+    sections = list(iter_sections(OUTLINE, levels=(2,), include_preamble=True))
+    assert headers(sections) == ["", "## Usage", "## Next"]
+    assert sections[0].body == "Preamble.\n\n# Title\n\n"
+    assert (sections[2].title, sections[2].level, sections[2].line_no) == ("Next", 2, 19)
+
+
+def test_every_source_gives_the_same_sections():
+    expected = list(iter_sections(OUTLINE))
+    assert list(iter_sections(OUTLINE.encode("utf-8"))) == expected
+    assert list(iter_sections(io.StringIO(OUTLINE))) == expected
+    assert list(iter_sections(OUTLINE.replace("\n", "\r\n"))) == expected
+    chunks = [OUTLINE[i:i + 7] for i in range(0, len(OUTLINE), 7)]
+    assert list(iter_stream_sections(chunks)) == expected
+
+
+def test_file_sections_with_and_without_mmap(tmp_path):
+    path = tmp_path / "outline.md"
+    path.write_text(OUTLINE, encoding="utf-8")
+    expected = list(iter_sections(OUTLINE))
+    assert list(iter_file_sections(str(path))) == expected
+    assert list(iter_file_sections(str(path), use_mmap=True)) == expected
@@ -0,0 +1,42 @@
+from Publisher import apply_branding, normalize_markdown, publish
+
+DOCUMENT = """Title
+=====
+
+Intro text.
+
+#### Jumped level
+* first
++ second
+1) numbered
+
+* * *
+
+| a | b |
+|---|---|
+| long cell | x |
+
+```
+# not a heading
+* not a list
+```
+"""
+
+
+def test_normalize_is_idempotent():
+    normalized, fixes, _ = normalize_markdown(DOCUMENT)
+    assert fixes
+    assert normalize_markdown(normalized) == (normalized, [], [])
+
+
+def test_thematic_breaks_are_not_list_items():
+    normalized = normalize_markdown("# T\n\n* a\n\n* * *\n\n___\n\n- - -\n")[0]
+    assert normalized == "# T\n\n- a\n\n* * *\n\n___\n\n- - -\n"
+
+
+def test_branding_from_an_earlier_day_is_not_applied_again():
+    branded = publish(DOCUMENT).document
+    assert branded.startswith("> **PenCo Architecture** | Title | Published ")
+    older = branded.replace(branded.splitlines()[0], "> **PenCo Architecture** | Title | Published 2020-01-01")
+    assert apply_branding(older) == older
+    assert publish(older).document == older
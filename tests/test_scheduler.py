@@ -0,0 +1,48 @@
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from DocGenCommon.scheduler import LLMScheduler
+
+
+def test_cancelled_calls_give_their_slot_back():
+    scheduler = LLMScheduler(max_concurrency=1, initial_concurrency=1)
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def main():
+        # cancelled while waiting for the slot held by the first call, then while in flight
+        first = asyncio.ensure_future(scheduler.acall(slow))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(scheduler.acall(slow))
+        await asyncio.sleep(0.05)
+        second.cancel()
+        first.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        in_flight = scheduler.metrics()["in_flight"]
+        # wake up a waiting acquire, so a leaked slot fails the test instead of hanging it
+        with scheduler._cond:
+            scheduler.limit = 2
+            scheduler._cond.notify_all()
+        await asyncio.sleep(0.05)
+        return in_flight
+
+    assert asyncio.run(main()) == 0
+    assert scheduler.metrics()["in_flight"] == 0
+
+
+def test_astream_streams_under_a_slot():
+    async def chunks(text):
+        for word in text.split():
+            yield word
+
+    scheduler = LLMScheduler()
+    runnable = scheduler.wrap(RunnableLambda(chunks))
+
+    async def main():
+        return [chunk async for chunk in runnable.astream("one two three")]
+
+    assert asyncio.run(main()) == ["one", "two", "three"]
+    assert scheduler.metrics()["completed"] == 1